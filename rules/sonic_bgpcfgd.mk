@@ -2,8 +2,9 @@
 
 SONIC_BGPCFGD = sonic_bgpcfgd-1.0-py3-none-any.whl
 $(SONIC_BGPCFGD)_SRC_PATH = $(SRC_PATH)/sonic-bgpcfgd
-# These dependencies are only needed because they are dependencies
-# of sonic-config-engine and bgpcfgd explicitly calls sonic-cfggen
+# bgpcfgd uses the ip_filters module of sonic-config-engine. The other
+# dependencies are only needed because they are dependencies of
+# sonic-config-engine and bgpcfgd explicitly calls sonic-cfggen
 # as part of its unit tests.
 # TODO: Refactor unit tests so that these dependencies are not needed
 
@@ -1,23 +1,302 @@
+import re
+import time
+from collections import OrderedDict
+
+from .log import log_debug, log_info
+
+
+class ConfigIndex(object):
+    """
+    Parsed model of the FRR configuration, indexed by prefix-list, community-list, route-map and peer-group.
+    The model is built from the output of 'show running-config' and can be updated in place with
+    the commands which bgpcfgd pushes to FRR, because both of them are sequences of FRR commands.
+    """
+    RE_PREFIX_LIST = re.compile(r'^(ip|ipv6) prefix-list (\S+) (?:seq (\d+) )?((?:permit|deny) .+)$')
+    RE_NO_PREFIX_LIST = re.compile(r'^no (ip|ipv6) prefix-list (\S+)(?: seq (\d+))?(?: ((?:permit|deny) .+))?$')
+    RE_PREFIX_LIST_ANY = re.compile(r'^(?:no )?(?:ip|ipv6) prefix-list ')
+    RE_COMMUNITY_LIST = re.compile(r'^bgp community-list standard (\S+) (permit|deny) (.+)$')
+    RE_NO_COMMUNITY_LIST = re.compile(r'^no bgp community-list standard (\S+)(?: (permit|deny) (.+))?$')
+    RE_COMMUNITY_LIST_ANY = re.compile(r'^(?:no )?bgp community-list ')
+    RE_ROUTE_MAP = re.compile(r'^route-map (\S+) (permit|deny) (\d+)$')
+    RE_NO_ROUTE_MAP = re.compile(r'^no route-map (\S+)(?: (permit|deny) (\d+))?$')
+    RE_ROUTE_MAP_ANY = re.compile(r'^(?:no )?route-map ')
+    RE_ROUTE_MAP_SUBCOMMAND = re.compile(r'^(?:no )?(match|set|call|on-match|continue|description)\b')
+    RE_PEER_GROUP = re.compile(r'^neighbor (\S+) peer-group$')
+    RE_PEER_GROUP_MEMBER = re.compile(r'^neighbor (\S+) peer-group (\S+)$')
+    RE_NEIGHBOR_ROUTE_MAP = re.compile(r'^neighbor (\S+) route-map (\S+) (in|out)$')
+    RE_NO_NEIGHBOR = re.compile(r'^no neighbor (\S+)(?: (peer-group)(?: (\S+))?| (route-map) (\S+) (in|out))?$')
+    RE_NO_ROUTER_BGP = re.compile(r'^no router bgp\b')
+
+    def __init__(self):
+        self.prefix_lists = {}            # (family, name) -> { seq: rule }
+        self.community_lists = {}         # name -> [ (action, value) ]
+        self.route_maps = {}              # name -> { seq: { 'action': action, 'lines': [ sub-commands ] } }
+        self.peer_groups = OrderedDict()  # name -> { neighbor: None } peer-group members
+        self.neighbor_route_maps = {}     # (neighbor or peer-group, direction) -> route-map name
+        self.route_map_entry = None       # route-map entry which receives sub-commands
+
+    def apply(self, lines, strict=False):
+        """
+        Apply FRR commands to the model
+        :param lines: list of FRR commands. Leading spaces and lines started with '!' are ignored
+        :param strict: when True, changes of indexed objects which the model can't follow are reported
+        :return: True if all commands, which touch indexed objects, were applied. False otherwise
+        """
+        res = True
+        self.route_map_entry = None
+        for line in lines:
+            s_line = line.strip()
+            if s_line == '' or s_line.startswith('!'):
+                continue
+            if self.route_map_entry is not None:
+                if self.RE_ROUTE_MAP_SUBCOMMAND.match(s_line):
+                    self.__apply_route_map_subcommand(s_line)
+                    continue
+                self.route_map_entry = None
+            if not self.__apply_command(s_line, strict):
+                log_debug("ConfigIndex::apply. Can't follow the command '%s'" % s_line)
+                res = False
+        self.route_map_entry = None
+        return res
+
+    def __apply_command(self, line, strict):
+        """
+        Apply FRR command, which doesn't belong to a route-map entry, to the model
+        :param line: FRR command without leading spaces
+        :param strict: when True, changes of indexed objects which the model can't follow are reported
+        :return: False if the command changes an indexed object in a way the model can't follow
+        """
+        if line.startswith('neighbor ') or line.startswith('no neighbor '):
+            return self.__apply_neighbor_command(line, strict)
+        if self.RE_ROUTE_MAP_ANY.match(line):
+            return self.__apply_route_map_command(line)
+        if self.RE_PREFIX_LIST_ANY.match(line):
+            return self.__apply_prefix_list_command(line)
+        if self.RE_COMMUNITY_LIST_ANY.match(line):
+            return self.__apply_community_list_command(line)
+        if self.RE_NO_ROUTER_BGP.match(line):
+            return False
+        return True
+
+    def __apply_prefix_list_command(self, line):
+        m = self.RE_PREFIX_LIST.match(line)
+        if m:
+            family, name, seq, rule = m.groups()
+            entries = self.prefix_lists.setdefault((family, name), {})
+            if seq is None:  # FRR assigns the next multiple of 5
+                seq = (max(entries.keys()) // 5 + 1) * 5 if entries else 5
+            entries[int(seq)] = rule
+            return True
+        m = self.RE_NO_PREFIX_LIST.match(line)
+        if m:
+            family, name, seq, rule = m.groups()
+            if seq is None and rule is None:
+                self.prefix_lists.pop((family, name), None)
+                return True
+            entries = self.prefix_lists.get((family, name), {})
+            for entry_seq, entry_rule in list(entries.items()):
+                if (seq is None or int(seq) == entry_seq) and (rule is None or rule == entry_rule):
+                    del entries[entry_seq]
+            if not entries:
+                self.prefix_lists.pop((family, name), None)
+            return True
+        return 'description' in line.split()
+
+    def __apply_community_list_command(self, line):
+        m = self.RE_COMMUNITY_LIST.match(line)
+        if m:
+            name, action, value = m.groups()
+            entries = self.community_lists.setdefault(name, [])
+            if (action, value) not in entries:
+                entries.append((action, value))
+            return True
+        m = self.RE_NO_COMMUNITY_LIST.match(line)
+        if m:
+            name, action, value = m.groups()
+            if action is None:
+                self.community_lists.pop(name, None)
+                return True
+            entries = self.community_lists.get(name, [])
+            if (action, value) in entries:
+                entries.remove((action, value))
+            if not entries:
+                self.community_lists.pop(name, None)
+            return True
+        return False
+
+    def __apply_route_map_command(self, line):
+        m = self.RE_ROUTE_MAP.match(line)
+        if m:
+            name, action, seq = m.groups()
+            entries = self.route_maps.setdefault(name, {})
+            entry = entries.get(int(seq))
+            if entry is None or entry['action'] != action:
+                entry = entries[int(seq)] = {'action': action, 'lines': []}
+            self.route_map_entry = entry
+            return True
+        m = self.RE_NO_ROUTE_MAP.match(line)
+        if m:
+            name, _, seq = m.groups()
+            if seq is None:
+                self.route_maps.pop(name, None)
+            else:
+                self.route_maps.get(name, {}).pop(int(seq), None)
+            return True
+        return False
+
+    def __apply_route_map_subcommand(self, line):
+        """
+        Apply a sub-command to the current route-map entry. A sub-command replaces an existing
+        sub-command of the same kind. 'no' removes sub-commands of the kind.
+        """
+        entry = self.route_map_entry
+        if line.startswith('no '):
+            kind = self.__route_map_subcommand_kind(line[3:])
+            entry['lines'] = [s_line for s_line in entry['lines'] if self.__route_map_subcommand_kind(s_line) != kind]
+            return
+        kind = self.__route_map_subcommand_kind(line)
+        for idx, s_line in enumerate(entry['lines']):
+            if self.__route_map_subcommand_kind(s_line) == kind:
+                entry['lines'][idx] = line
+                return
+        entry['lines'].append(line)
+
+    @staticmethod
+    def __route_map_subcommand_kind(line):
+        """
+        Return the part of a route-map sub-command which identifies it inside of an entry,
+        for example 'match ip address prefix-list' or 'set community'
+        """
+        words = line.split()
+        if words[0] not in ('match', 'set') or len(words) < 2:
+            return words[0]
+        if len(words) > 3 and words[2] == 'address':
+            return ' '.join(words[:4] if words[3] == 'prefix-list' else words[:3])
+        return ' '.join(words[:2])
+
+    def __apply_neighbor_command(self, line, strict):
+        m = self.RE_PEER_GROUP.match(line)
+        if m:
+            self.peer_groups.setdefault(m.group(1), OrderedDict())
+            return True
+        m = self.RE_PEER_GROUP_MEMBER.match(line)
+        if m:
+            neighbor, peer_group = m.groups()
+            self.peer_groups.setdefault(peer_group, OrderedDict())[neighbor] = None
+            return True
+        m = self.RE_NEIGHBOR_ROUTE_MAP.match(line)
+        if m:
+            neighbor, route_map, direction = m.groups()
+            current = self.neighbor_route_maps.setdefault((neighbor, direction), route_map)
+            # the model doesn't follow address-families. Another route-map could be set in other address-family
+            return not strict or current == route_map
+        m = self.RE_NO_NEIGHBOR.match(line)
+        if m:
+            neighbor, _, peer_group, route_map_kw, route_map, direction = m.groups()
+            if route_map_kw:
+                if self.neighbor_route_maps.get((neighbor, direction)) == route_map:
+                    del self.neighbor_route_maps[(neighbor, direction)]
+                return True
+            if peer_group:
+                self.peer_groups.get(peer_group, {}).pop(neighbor, None)
+                return True
+            # the neighbor or the peer-group is removed
+            self.peer_groups.pop(neighbor, None)
+            for members in self.peer_groups.values():
+                members.pop(neighbor, None)
+            for direction in ('in', 'out'):
+                self.neighbor_route_maps.pop((neighbor, direction), None)
+            return True
+        return True  # the other neighbor attributes aren't indexed
+
+    def get_prefix_list(self, family, name):
+        """
+        Get prefix-list rules
+        :param family: 'ip' or 'ipv6'
+        :param name: name of the prefix-list
+        :return: list of rules like 'permit 10.0.0.0/8 le 32' in the sequence number order.
+                 The list is empty if the prefix-list doesn't exist
+        """
+        entries = self.prefix_lists.get((family, name), {})
+        return [entries[seq] for seq in sorted(entries.keys())]
+
+    def get_community_list(self, name):
+        """
+        Get standard community-list entries
+        :param name: name of the community-list
+        :return: list of tuples (action, community value)
+        """
+        return list(self.community_lists.get(name, []))
+
+    def get_route_map(self, name):
+        """
+        Get route-map entries
+        :param name: name of the route-map
+        :return: OrderedDict: sequence number -> tuple (action, list of sub-commands) in the sequence number order
+        """
+        entries = self.route_maps.get(name, {})
+        return OrderedDict((seq, (entries[seq]['action'], list(entries[seq]['lines']))) for seq in sorted(entries.keys()))
+
+    def get_peer_groups(self):
+        """ Get names of configured peer-groups in order of configuration """
+        return list(self.peer_groups.keys())
+
+    def get_peer_group_members(self, peer_group):
+        """ Get neighbors which belong to the peer-group """
+        return list(self.peer_groups.get(peer_group, {}).keys())
+
+    def get_neighbor_route_map(self, neighbor, direction):
+        """
+        Get route-map which is applied to the neighbor or the peer-group
+        :param neighbor: neighbor address or peer-group name
+        :param direction: 'in' or 'out'
+        :return: the name of the route-map or None
+        """
+        return self.neighbor_route_maps.get((neighbor, direction))
+
+
 class ConfigMgr(object):
     """ The class represents frr configuration """
+    FULL_REFRESH_INTERVAL = 300  # the cached config is read from FRR again after this number of seconds
+
     def __init__(self, frr):
         self.frr = frr
         self.current_config = None
         self.current_config_raw = None
         self.changes = ""
         self.peer_groups_to_restart = []
+        self.index = ConfigIndex()
+        self.generation = 0          # changed, when the cached config doesn't follow FRR anymore
+        self.loaded_generation = None
+        self.loaded_at = None
+        self.raw_outdated = False    # the index has changes which are not in current_config_raw yet
 
     def reset(self):
-        """ Reset stored config """
-        self.current_config = None
-        self.current_config_raw = None
+        """ Reset changes prepared for FRR """
         self.changes = ""
         self.peer_groups_to_restart = []
 
-    def update(self):
+    def invalidate(self):
+        """ Force to read the config from FRR on the next self.update() """
+        self.generation += 1
+
+    def update(self, force=False):
+        """
+        Make sure the cached config follows FRR. The config is read from FRR
+        only if the cache was invalidated or it is older than FULL_REFRESH_INTERVAL
+        :param force: read the config from FRR unconditionally
+        """
+        if not force and self.loaded_generation == self.generation \
+                and time.monotonic() - self.loaded_at < self.FULL_REFRESH_INTERVAL:
+            return
+        self.read()
+
+    def read(self):
         """ Read current config from FRR """
         self.current_config = None
         self.current_config_raw = None
+        self.loaded_generation = self.generation
+        self.loaded_at = time.monotonic()
         out = self.frr.get_config()
         text = []
         for line in out.split('\n'):
@@ -27,6 +306,9 @@ class ConfigMgr(object):
         text += ["     "]  # Add empty line to have something to work on, if there is no text
         self.current_config_raw = text
         self.current_config = self.to_canonical(out)  # FIXME: use text as an input
+        self.index = ConfigIndex()
+        self.index.apply(text)
+        self.raw_outdated = False
 
     def push_list(self, cmdlist):
         """
@@ -53,18 +335,58 @@ class ConfigMgr(object):
     def commit(self):
         """
         Write configuration change to FRR.
+        The cached config is updated with the committed changes
         :return: True if change was applied successfully, False otherwise
         """
         if self.changes.strip() == "":
             return True
         rc_write = self.frr.write(self.changes)
+        self.__apply_changes(rc_write)
         rc_restart = self.frr.restart_peer_groups(self.peer_groups_to_restart)
         self.reset()
         return rc_write and rc_restart
 
+    def __apply_changes(self, rc_write):
+        """
+        Apply the committed changes to the cached config
+        :param rc_write: True if FRR has accepted the changes
+        """
+        if self.loaded_generation is None:
+            return  # the config is not read yet
+        if not rc_write or not self.index.apply(self.changes.split('\n'), strict=True):
+            log_info("ConfigMgr::commit(): the cached config will be read from FRR again")
+            self.invalidate()
+        self.raw_outdated = True
+
     def get_text(self):
+        if self.raw_outdated:
+            self.read()
         return self.current_config_raw
 
+    def get_prefix_list(self, family, name):
+        """ Return rules of prefix-list 'name'. family is 'ip' or 'ipv6'. See ConfigIndex.get_prefix_list() """
+        return self.index.get_prefix_list(family, name)
+
+    def get_community_list(self, name):
+        """ Return entries of standard community-list 'name'. See ConfigIndex.get_community_list() """
+        return self.index.get_community_list(name)
+
+    def get_route_map(self, name):
+        """ Return entries of route-map 'name'. See ConfigIndex.get_route_map() """
+        return self.index.get_route_map(name)
+
+    def get_peer_groups(self):
+        """ Return configured peer-group names """
+        return self.index.get_peer_groups()
+
+    def get_peer_group_members(self, peer_group):
+        """ Return neighbors of the peer-group """
+        return self.index.get_peer_group_members(peer_group)
+
+    def get_neighbor_route_map(self, neighbor, direction):
+        """ Return route-map applied to the neighbor or the peer-group in the direction 'in' or 'out' """
+        return self.index.get_neighbor_route_map(neighbor, direction)
+
     @staticmethod
     def to_canonical(raw_config):
         """
@@ -111,4 +433,4 @@ class ConfigMgr(object):
             spaces = len(lines) - 1
             out += " " * spaces + lines[-1] + "\n"
 
-        return out
\ No newline at end of file
+        return out
@@ -1,4 +1,4 @@
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 
 from .log import log_err
 
@@ -8,7 +8,13 @@ class Directory(object):
         as some value is changed. This class works as DB cache mostly """
     def __init__(self):
         self.data = defaultdict(dict)  # storage. A key is a slot name, a value is a dictionary with data
-        self.notify = defaultdict(lambda: defaultdict(list))  # registered callbacks: slot -> path -> handlers[]
+        self.notify_trie = {}  # registered callbacks: slot -> trie of paths split by '/'. See new_trie_node()
+        self.batch_handlers = None  # handlers to run at the end of the current batch
+
+    @staticmethod
+    def new_trie_node():
+        """ Node of the path trie. 'handlers' are registered for the path of the node """
+        return {'handlers': [], 'children': {}}
 
     @staticmethod
     def get_slot_name(db, table):
@@ -71,11 +77,48 @@ class Directory(object):
         """
         slot = self.get_slot_name(db, table)
         self.data[slot][key] = value
-        if slot in self.notify:
-            for path in self.notify[slot].keys():
-                if self.path_exist(db, table, path):
-                    for handler in self.notify[slot][path]:
-                        handler()
+        if slot not in self.notify_trie:
+            return
+        root = self.notify_trie[slot]
+        handlers = list(root['handlers'])  # handlers of the whole slot
+        if key in root['children']:
+            self.collect_handlers(root['children'][key], value, handlers)
+        self.run_handlers(handlers)
+
+    def collect_handlers(self, node, value, handlers):
+        """
+        Collect handlers of the trie node and its descendants, which paths exist in the value
+        :param node: trie node
+        :param value: stored value which corresponds to the node
+        :param handlers: list where the handlers are added
+        """
+        handlers.extend(node['handlers'])
+        for p, child in node['children'].items():
+            if isinstance(value, dict) and p in value:
+                self.collect_handlers(child, value[p], handlers)
+
+    def run_handlers(self, handlers):
+        """
+        Run each handler once. The handlers are postponed till the end of the batch, if a batch is started
+        :param handlers: list of handlers
+        """
+        if self.batch_handlers is not None:
+            for handler in handlers:
+                self.batch_handlers[handler] = None
+            return
+        for handler in OrderedDict.fromkeys(handlers):
+            handler()
+
+    def start_batch(self):
+        """ Postpone notifications till self.end_batch(). Each handler is run once per batch """
+        if self.batch_handlers is None:
+            self.batch_handlers = OrderedDict()
+
+    def end_batch(self):
+        """ Run handlers which were notified during the batch """
+        handlers, self.batch_handlers = self.batch_handlers, None
+        if handlers:
+            self.run_handlers(list(handlers.keys()))
 
     def get(self, db, table, key):
         """
@@ -156,4 +199,8 @@ class Directory(object):
         """
         for db, table, path in deps:
             slot = self.get_slot_name(db, table)
-            self.notify[slot][path].append(handler)
\ No newline at end of file
+            node = self.notify_trie.setdefault(slot, self.new_trie_node())
+            if path != '':
+                for p in path.split('/'):
+                    node = node['children'].setdefault(p, self.new_trie_node())
+            node['handlers'].append(handler)
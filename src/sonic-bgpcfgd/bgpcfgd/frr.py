@@ -1,15 +1,29 @@
 import os
 import datetime
+import re
 import time
 import tempfile
 
 from bgpcfgd.log import log_err, log_info, log_warn, log_crit
 from .vars import g_debug
 from .utils import run_command
+from .vty import get_client, vty_execute
 
 
 class FRR(object):
     """Proxy object with FRR"""
+    POLICY_DAEMONS = ['bgpd', 'zebra']  # daemons which keep route-maps and prefix-lists
+    RE_BGP_BLOCK = re.compile(r'^router bgp \d+( vrf \S+)?$')
+    RE_ROUTE_MAP_BLOCK = re.compile(r'^route-map \S+ (permit|deny) \d+$')
+    RE_ROUTE_MAP_SUBCOMMAND = re.compile(r'^(no )?(match|set|call|on-match|continue|description)\b')
+    RE_POLICY_COMMAND = re.compile(r'^((no )?(ip|ipv6) prefix-list|no route-map) ')
+    RE_BGPD_COMMAND = re.compile(r'^(no )?bgp (community-list|as-path access-list) ')
+    BGP_NODE_KEYWORDS = {
+        'neighbor', 'bgp', 'address-family', 'exit-address-family', 'exit', 'network', 'redistribute',
+        'maximum-paths', 'aggregate-address', 'timers', 'table-map', 'distance', 'import', 'export',
+        'rd', 'rt', 'label', 'nexthop', 'coalesce-time', 'update-delay', 'write-quanta', 'read-quanta',
+    }
+
     def __init__(self, daemons):
         self.daemons = daemons
 
@@ -21,6 +35,9 @@ class FRR(object):
         stop_time = datetime.datetime.now() + datetime.timedelta(seconds=seconds)
         log_info("Start waiting for FRR daemons: %s" % str(datetime.datetime.now()))
         while datetime.datetime.now() < stop_time:
+            if all(get_client(daemon).connect(force=True) for daemon in self.daemons):
+                log_info("All required daemons have accepted vty connections: %s" % str(datetime.datetime.now()))
+                return
             ret_code, out, err = run_command(["vtysh", "-c", "show daemons"], hide_errors=True)
             if ret_code == 0 and all(daemon in out for daemon in self.daemons):
                 log_info("All required daemons have connected to vtysh: %s" % str(datetime.datetime.now()))
@@ -32,14 +49,35 @@ class FRR(object):
 
     @staticmethod
     def get_config():
+        """
+        Read the running configuration. It's read from bgpd through its vty socket if possible.
+        bgpd has all route-maps, prefix-lists, community-lists and bgp configuration.
+        :return: the running configuration as a string. An empty string on error
+        """
+        replies = vty_execute('bgpd', ['show running-config'])
+        if replies is not None:
+            ret_code, out = replies[0]
+            if ret_code == 0:
+                return out
+            log_warn("can't read running config from bgpd vty: rc=%d out='%s'" % (ret_code, out))
         ret_code, out, err = run_command(["vtysh", "-c", "show running-config"])
         if ret_code != 0:
             log_crit("can't update running config: rc=%d out='%s' err='%s'" % (ret_code, out, err))
             return ""
         return out
 
-    @staticmethod
-    def write(config_text):
+    def write(self, config_text):
+        """
+        Apply configuration to FRR. The configuration is sent through the daemons vty sockets
+        if FRR.split_config() knows where all of the commands go, otherwise through 'vtysh -f'
+        :param config_text: FRR configuration
+        :return: True if the configuration was applied successfully, False otherwise
+        """
+        blocks = self.split_config(config_text)
+        if blocks is not None:
+            res = self.__write_vty(blocks)
+            if res is not None:
+                return res
         fd, tmp_filename = tempfile.mkstemp(dir='/tmp')
         os.close(fd)
         with open(tmp_filename, 'w') as fp:
@@ -54,15 +92,110 @@ class FRR(object):
                 os.remove(tmp_filename)
         return ret_code == 0
 
+    def split_config(self, config_text):
+        """
+        Split FRR configuration into blocks of commands, which are executed by the same daemons.
+        A block is either a top-level command or a command which enters a node and commands of the node
+        :param config_text: FRR configuration
+        :return: list of tuples (list of daemons, list of commands).
+                 None if the configuration has a command which isn't known to this function
+        """
+        blocks = []
+        node = None  # 'bgp', 'bgp-af', 'route-map' or None
+        policy_daemons = [daemon for daemon in self.POLICY_DAEMONS if daemon in self.daemons]
+        for line in config_text.split('\n'):
+            line = line.strip()
+            if line == '' or line.startswith('!'):
+                continue
+            if self.RE_BGP_BLOCK.match(line):
+                blocks.append((['bgpd'], [line]))
+                node = 'bgp'
+            elif self.RE_ROUTE_MAP_BLOCK.match(line):
+                blocks.append((policy_daemons, [line]))
+                node = 'route-map'
+            elif self.RE_POLICY_COMMAND.match(line):
+                blocks.append((policy_daemons, [line]))
+                node = None
+            elif self.RE_BGPD_COMMAND.match(line):
+                blocks.append((['bgpd'], [line]))
+                node = None
+            elif node == 'route-map' and self.RE_ROUTE_MAP_SUBCOMMAND.match(line):
+                blocks[-1][1].append(line)
+            elif node in ('bgp', 'bgp-af') and self.__bgp_keyword(line) in self.BGP_NODE_KEYWORDS:
+                blocks[-1][1].append(line)
+                if line.startswith('address-family '):
+                    node = 'bgp-af'
+                elif line == 'exit-address-family':
+                    node = 'bgp'
+                elif line == 'exit':
+                    node = 'bgp' if node == 'bgp-af' else None
+            else:
+                return None
+        return blocks
+
     @staticmethod
-    def restart_peer_groups(peer_groups):
+    def __bgp_keyword(line):
+        words = line.split()
+        if words[0] == 'no' and len(words) > 1:
+            return words[1]
+        return words[0]
+
+    def __write_vty(self, blocks):
+        """
+        Send blocks of commands to the daemons. All commands for a daemon are sent in one request.
+        A command is successful if one of the daemons, which received it, accepted it.
+        :param blocks: output of FRR.split_config()
+        :return: True if all commands were applied successfully, False otherwise.
+                 None if a daemon can't be reached through its vty socket
+        """
+        requests = {}  # daemon -> list of tuples (command, (block index, command index) or None)
+        for block_idx, (daemons, commands) in enumerate(blocks):
+            for daemon in daemons:
+                request = requests.setdefault(daemon, [])
+                request.append(('configure terminal', None))
+                request.extend((command, (block_idx, cmd_idx)) for cmd_idx, command in enumerate(commands))
+                request.append(('end', None))
+        res = True
+        succeeded = set()
+        failures = {}  # (block index, command index) -> list of tuples (daemon, return code, output)
+        for daemon, request in requests.items():
+            replies = vty_execute(daemon, [command for command, _ in request])
+            if replies is None:
+                return None
+            for (command, position), (ret_code, out) in zip(request, replies):
+                if position is None:
+                    if ret_code != 0:
+                        log_err("FRR::write(): '%s' failed in daemon '%s': rc='%d', out='%s'" % (command, daemon, ret_code, out))
+                        res = False
+                elif ret_code == 0:
+                    succeeded.add(position)
+                else:
+                    failures.setdefault(position, []).append((daemon, ret_code, out))
+        for position in sorted(failures.keys()):
+            if position in succeeded:
+                continue
+            res = False
+            block_idx, cmd_idx = position
+            for daemon, ret_code, out in failures[position]:
+                err_tuple = blocks[block_idx][1][cmd_idx], daemon, ret_code, out
+                log_err("ConfigMgr::commit(): can't push configuration '%s' to daemon '%s', rc='%d', out='%s'" % err_tuple)
+        return res
+
+    def restart_peer_groups(self, peer_groups):
         """ Restart peer-groups which support BBR
         :param peer_groups: List of peer_groups to restart
         :return: True if restart of all peer-groups was successful, False otherwise
         """
+        peer_groups = sorted(set(peer_groups))
+        commands = ["clear bgp peer-group %s soft in" % peer_group for peer_group in peer_groups]
+        replies = vty_execute('bgpd', commands) if commands else None
         res = True
-        for peer_group in sorted(peer_groups):
-            rc, out, err = run_command(["vtysh", "-c", "clear bgp peer-group %s soft in" % peer_group])
+        for peer_group, command, reply in zip(peer_groups, commands, replies or [None] * len(commands)):
+            if reply is not None:
+                rc, out = reply
+                err = ""
+            else:
+                rc, out, err = run_command(["vtysh", "-c", command])
             if rc != 0:
                 log_value = peer_group, rc, out, err
                 log_crit("Can't restart bgp peer-group '%s'. rc='%d', out='%s', err='%s'" % log_value)
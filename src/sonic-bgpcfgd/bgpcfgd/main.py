@@ -60,7 +60,7 @@ def do_work():
         # Static Route Managers
         StaticRouteMgr(common_objs, "CONFIG_DB", "STATIC_ROUTE"),
     ]
-    runner = Runner(common_objs['cfg_mgr'])
+    runner = Runner(common_objs['cfg_mgr'], batch=True, directory=common_objs['directory'])
     for mgr in managers:
         runner.add_manager(mgr)
     runner.run()
@@ -1,13 +1,18 @@
+import hashlib
 import json
+import time
 from swsscommon import swsscommon
 
 import jinja2
+import jinja2.meta
+import jinja2.nodes
 import netaddr
 
 from .log import log_warn, log_err, log_info, log_debug, log_crit
 from .manager import Manager
 from .template import TemplateFabric
 from .utils import run_command
+from .vty import vty_execute
 
 
 class BGPPeerGroupMgr(object):
@@ -23,6 +28,60 @@ class BGPPeerGroupMgr(object):
         tf = common_objs['tf']
         self.policy_template = tf.from_file(base_template + "policies.conf.j2")
         self.peergroup_template = tf.from_file(base_template + "peer-group.conf.j2")
+        self.template_vars = {
+            'policy': self.get_template_vars(self.policy_template),
+            'peer-group': self.get_template_vars(self.peergroup_template),
+        }
+        self.rendered = {}  # 'policy' or 'peer-group' -> (hash of the template inputs, rendered text)
+
+    @staticmethod
+    def get_template_vars(template):
+        """
+        Find variables, which the template refers to
+        :param template: Jinja2 template object
+        :return: sorted list of the variable names. None if the template includes or extends
+                 other templates, so all variables could be used
+        """
+        env = template.environment
+        source = env.loader.get_source(env, template.name)[0]
+        ast = env.parse(source)
+        if ast.find(jinja2.nodes.Include) is not None or ast.find(jinja2.nodes.Extends) is not None:
+            return None
+        return sorted(jinja2.meta.find_undeclared_variables(ast))
+
+    @staticmethod
+    def to_hashable_text(value):
+        """
+        Convert the value to a text, which doesn't depend on the order of dictionary keys and set items
+        :param value: value of a template variable
+        :return: the text
+        """
+        if isinstance(value, dict):
+            items = sorted((repr(key), BGPPeerGroupMgr.to_hashable_text(item)) for key, item in value.items())
+            return '{%s}' % ','.join('%s:%s' % item for item in items)
+        if isinstance(value, (set, frozenset)):
+            return '{%s}' % ','.join(sorted(BGPPeerGroupMgr.to_hashable_text(item) for item in value))
+        if isinstance(value, (list, tuple)):
+            return '[%s]' % ','.join(BGPPeerGroupMgr.to_hashable_text(item) for item in value)
+        return repr(value)
+
+    def render(self, kind, template, kwargs):
+        """
+        Render the template. The rendered text is reused, while the variables which the template refers to
+        have the same values
+        :param kind: 'policy' or 'peer-group'
+        :param template: Jinja2 template object
+        :param kwargs: dictionary with parameters for rendering
+        :return: the rendered text
+        """
+        names = self.template_vars[kind]
+        inputs = kwargs if names is None else {name: kwargs.get(name) for name in names}
+        inputs_hash = hashlib.sha1(self.to_hashable_text(inputs).encode('utf-8')).hexdigest()
+        if kind in self.rendered and self.rendered[kind][0] == inputs_hash:
+            return self.rendered[kind][1]
+        text = template.render(**kwargs)
+        self.rendered[kind] = inputs_hash, text
+        return text
 
     def update(self, name, **kwargs):
         """
@@ -41,7 +100,7 @@ class BGPPeerGroupMgr(object):
         :param kwargs: dictionary with parameters for rendering
         """
         try:
-            policy = self.policy_template.render(**kwargs)
+            policy = self.render('policy', self.policy_template, kwargs)
         except jinja2.TemplateError as e:
             log_err("Can't render policy template name: '%s': %s" % (name, str(e)))
             return False
@@ -55,7 +114,7 @@ class BGPPeerGroupMgr(object):
         :param kwargs: dictionary with parameters for rendering
         """
         try:
-            pg = self.peergroup_template.render(**kwargs)
+            pg = self.render('peer-group', self.peergroup_template, kwargs)
         except jinja2.TemplateError as e:
             log_err("Can't render peer-group template: '%s': %s" % (name, str(e)))
             return False
@@ -81,6 +140,9 @@ class BGPPeerGroupMgr(object):
 
 class BGPPeerMgrBase(Manager):
     """ Manager of BGP peers """
+    PEERS_CACHE_TTL = 10  # seconds. Peer managers constructed within this time share one load of peers from FRR
+    peers_cache = None    # tuple (time of the load, set of peers)
+
     def __init__(self, common_objs, db_name, table_name, peer_type, check_neig_meta):
         """
         Initialize the object
@@ -211,6 +273,7 @@ class BGPPeerMgrBase(Manager):
             kwargs['CONFIG_DB__DEVICE_NEIGHBOR_METADATA'] = neigmeta
 
         tag = data['name'] if 'name' in data else nbr
+        start = time.monotonic()
         self.peer_group_mgr.update(tag, **kwargs)
 
         try:
@@ -219,6 +282,7 @@ class BGPPeerMgrBase(Manager):
             msg = "Peer '(%s|%s)'. Error in rendering the template for 'SET' command '%s'" % print_data
             log_err("%s: %s" % (msg, str(e)))
             return True
+        log_debug("Peer '(%s|%s)': templates have been rendered in %d us" % (vrf, nbr, (time.monotonic() - start) * 1000000))
         if cmd is not None:
             self.apply_op(cmd, vrf)
             key = (vrf, nbr)
@@ -369,24 +433,65 @@ class BGPPeerMgrBase(Manager):
         else:
             return tuple(key.split('|', 1))
 
+    @staticmethod
+    def run_show_commands(commands):
+        """
+        Run show commands in bgpd. The commands are sent in one request through bgpd vty socket,
+        vtysh is used when the socket isn't available
+        :param commands: list of commands
+        :return: list of tuples: integer exit code, stdout as a string, stderr as a string
+        """
+        replies = vty_execute('bgpd', commands)
+        if replies is not None:
+            return [(ret_code, out, "" if ret_code == 0 else out) for ret_code, out in replies]
+        return [run_command(["vtysh", "-c", command]) for command in commands]
+
     @staticmethod
     def load_peers():
         """
-        Load peers from FRR.
+        Load peers from FRR. The result is cached for PEERS_CACHE_TTL seconds,
+        so the peer managers which are constructed at startup read FRR once
         :return: set of peers, which are already installed in FRR
         """
-        command = ["vtysh", "-c", "show bgp vrfs json"]
-        ret_code, out, err = run_command(command)
+        now = time.monotonic()
+        cache = BGPPeerMgrBase.peers_cache
+        if cache is None or now - cache[0] >= BGPPeerMgrBase.PEERS_CACHE_TTL:
+            cache = now, BGPPeerMgrBase.read_peers()
+            BGPPeerMgrBase.peers_cache = cache
+        return set(cache[1])
+
+    @staticmethod
+    def read_peers():
+        """
+        Read peers of all vrfs from FRR with one command. Only the neighbor addresses are kept
+        :return: set of tuples (vrf name, neighbor address)
+        """
+        ret_code, out, err = BGPPeerMgrBase.run_show_commands(["show bgp vrf all neighbors json"])[0]
+        if ret_code != 0:
+            log_warn("Can't read neighbors of all vrfs: %s. Reading neighbors of each vrf" % err)
+            return BGPPeerMgrBase.read_peers_by_vrf()
+        peers = set()
+        for vrf, js_vrf in json.loads(out).items():
+            # besides neighbors, a vrf object has 'vrfId' and 'vrfName' attributes
+            peers.update((vrf, nbr) for nbr, js_nbr in js_vrf.items() if isinstance(js_nbr, dict))
+        return peers
+
+    @staticmethod
+    def read_peers_by_vrf():
+        """
+        Read peers from FRR with one command for each vrf
+        :return: set of tuples (vrf name, neighbor address)
+        """
+        ret_code, out, err = BGPPeerMgrBase.run_show_commands(["show bgp vrfs json"])[0]
         if ret_code == 0:
             js_vrf = json.loads(out)
-            vrfs = js_vrf['vrfs'].keys()
+            vrfs = list(js_vrf['vrfs'].keys())
         else:
             log_crit("Can't read bgp vrfs: %s" % err)
             raise Exception("Can't read bgp vrfs: %s" % err)
         peers = set()
-        for vrf in vrfs:
-            command = ["vtysh", "-c", 'show bgp vrf %s neighbors json' % str(vrf)]
-            ret_code, out, err = run_command(command)
+        commands = ['show bgp vrf %s neighbors json' % str(vrf) for vrf in vrfs]
+        for vrf, (ret_code, out, err) in zip(vrfs, BGPPeerMgrBase.run_show_commands(commands)):
             if ret_code == 0:
                 js_bgp = json.loads(out)
                 for nbr in js_bgp.keys():
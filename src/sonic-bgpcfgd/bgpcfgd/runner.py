@@ -1,7 +1,8 @@
-from collections import defaultdict
+import time
+from collections import defaultdict, OrderedDict
 from swsscommon import swsscommon
 
-from .log import log_debug, log_crit
+from .log import log_debug, log_crit, log_info
 
 
 g_run = True
@@ -19,14 +20,32 @@ class Runner(object):
         when corresponding db/table is updated
     """
     SELECT_TIMEOUT = 1000
+    BATCH_WINDOW = 1.0          # seconds. Maximum time to collect events of one batch
+    BATCH_IDLE_TIMEOUT = 50     # milliseconds. The batch is complete when no events arrived during this time
+    COUNTERS_LOG_INTERVAL = 300 # seconds between logs of the batch mode counters
 
-    def __init__(self, cfg_manager):
-        """ Constructor """
+    def __init__(self, cfg_manager, batch=False, directory=None):
+        """
+        Constructor
+        :param cfg_manager: ConfigMgr object. Changes are committed to FRR after each event or batch of events
+        :param batch: when True, events are collected into batches. Only the resulting operation for
+                      each key is dispatched, tables are dispatched in the order of their dependencies and
+                      changes are committed once per batch
+        :param directory: Directory object. In the batch mode its handlers are run once per batch
+        """
         self.cfg_manager = cfg_manager
+        self.batch = batch
+        self.directory = directory
         self.db_connectors = {}
         self.selector = swsscommon.Select()
         self.callbacks = defaultdict(lambda: defaultdict(list))  # db -> table -> handlers[]
         self.subscribers = set()
+        self.tables = []              # list of (db_name, table_name, subscriber) in order of registration
+        self.table_deps = defaultdict(set)  # (db_name, table_name) -> set of (db_name, table_name) it depends on
+        self.table_order = None
+        self.counters = defaultdict(lambda: defaultdict(int))  # (db_name, table_name) -> counter name -> value
+        self.handler_counters = defaultdict(lambda: defaultdict(int))  # (db_name, table_name, handler name) -> counter name -> value
+        self.counters_logged_at = time.monotonic()
 
     def add_manager(self, manager):
         """
@@ -46,7 +65,11 @@ class Runner(object):
             subscriber = swsscommon.SubscriberStateTable(conn, table_name)
             self.subscribers.add(subscriber)
             self.selector.addSelectable(subscriber)
+            self.tables.append((db_name, table_name, subscriber))
         self.callbacks[db][table_name].append(manager.handler)
+        for dep_db_name, dep_table_name, _ in manager.deps:
+            self.table_deps[(db_name, table_name)].add((dep_db_name, dep_table_name))
+        self.table_order = None
 
     def run(self):
         """ Main loop """
@@ -57,14 +80,168 @@ class Runner(object):
             elif state == self.selector.ERROR:
                 raise Exception("Received error from select")
 
-            for subscriber in self.subscribers:
-                while True:
-                    key, op, fvs = subscriber.pop()
-                    if not key:
-                        break
-                    log_debug("Received message : '%s'" % str((key, op, fvs)))
-                    for callback in self.callbacks[subscriber.getDbConnector().getDbId()][subscriber.getTableName()]:
-                        callback(key, op, dict(fvs))
+            if self.batch:
+                self.__process_batch()
+            else:
+                for subscriber in self.subscribers:
+                    while True:
+                        key, op, fvs = subscriber.pop()
+                        if not key:
+                            break
+                        log_debug("Received message : '%s'" % str((key, op, fvs)))
+                        for callback in self.callbacks[subscriber.getDbConnector().getDbId()][subscriber.getTableName()]:
+                            callback(key, op, dict(fvs))
             rc = self.cfg_manager.commit()
             if not rc:
                 log_crit("Runner::commit was unsuccessful")
+            if self.batch and time.monotonic() - self.counters_logged_at >= self.COUNTERS_LOG_INTERVAL:
+                self.log_counters()
+
+    def __process_batch(self):
+        """
+        Collect events until no new events arrive during BATCH_IDLE_TIMEOUT, but no longer than
+        BATCH_WINDOW, and dispatch them
+        """
+        deadline = time.monotonic() + self.BATCH_WINDOW
+        events = {}
+        received = defaultdict(int)
+        while True:
+            self.__drain(events, received)
+            timeout = min(int((deadline - time.monotonic()) * 1000), self.BATCH_IDLE_TIMEOUT)
+            if timeout <= 0:
+                break
+            state, _ = self.selector.select(timeout)
+            if state == self.selector.ERROR:
+                raise Exception("Received error from select")
+            elif state == self.selector.TIMEOUT:
+                break
+        if self.directory is not None:
+            self.directory.start_batch()
+        self.__dispatch(events, received)
+        if self.directory is not None:
+            self.directory.end_batch()
+
+    def __drain(self, events, received):
+        """
+        Read all available events and coalesce them with already collected events
+        :param events: collected events. (db_name, table_name) -> OrderedDict: key -> list of (op, data)
+        :param received: number of events received during the batch, before coalescing. (db_name, table_name) -> number
+        """
+        for db_name, table_name, subscriber in self.tables:
+            entries = subscriber.pops()
+            if not entries:
+                continue
+            self.counters[(db_name, table_name)]['received'] += len(entries)
+            received[(db_name, table_name)] += len(entries)
+            table_events = events.setdefault((db_name, table_name), OrderedDict())
+            for key, op, fvs in entries:
+                log_debug("Received message : '%s'" % str((key, op, fvs)))
+                self.coalesce(table_events, key, op, dict(fvs))
+
+    @staticmethod
+    def coalesce(table_events, key, op, data):
+        """
+        Add an event to the collected events of a table. Only the last 'SET' for a key is kept.
+        A 'DEL' drops the previous events of the key. A 'DEL' before the last 'SET' is kept, because
+        a 'SET' of an existing entry is not always handled as a replacement of the entry
+        :param table_events: OrderedDict: key -> list of (op, data)
+        :param key: key of the event
+        :param op: operation of the event
+        :param data: data of the event
+        """
+        ops = table_events.get(key, [])
+        if op == swsscommon.DEL_COMMAND:
+            ops = [(op, data)]
+        elif ops and ops[0][0] == swsscommon.DEL_COMMAND:
+            ops = [ops[0], (op, data)]
+        else:
+            ops = [(op, data)]
+        table_events[key] = ops
+
+    def __dispatch(self, events, received):
+        """
+        Run handlers for collected events. Tables are processed in the order of dependencies of their managers
+        :param events: collected events. (db_name, table_name) -> OrderedDict: key -> list of (op, data)
+        :param received: number of events received during the batch, before coalescing. (db_name, table_name) -> number
+        """
+        for table in self.get_table_order():
+            table_events = events.get(table)
+            if not table_events:
+                continue
+            db_name, table_name = table
+            counters = self.counters[table]
+            counters['queue_depth'] = received[table]
+            counters['max_queue_depth'] = max(counters['max_queue_depth'], received[table])
+            callbacks = self.callbacks[swsscommon.SonicDBConfig.getDbId(db_name)][table_name]
+            handler_times_us = defaultdict(int)
+            dispatched = 0
+            for key, ops in table_events.items():
+                for op, data in ops:
+                    dispatched += 1
+                    for callback in callbacks:
+                        start = time.monotonic()
+                        callback(key, op, data)
+                        handler_times_us[callback] += int((time.monotonic() - start) * 1000000)
+            counters['dispatched'] += dispatched
+            for callback, elapsed_us in handler_times_us.items():
+                handler_counters = self.handler_counters[(db_name, table_name, self.get_handler_name(callback))]
+                handler_counters['calls'] += dispatched
+                handler_counters['time_us'] += elapsed_us
+                handler_counters['max_batch_time_us'] = max(handler_counters['max_batch_time_us'], elapsed_us)
+            log_debug("Runner::dispatched %d of %d received events of '%s|%s'" % (dispatched, received[table], db_name, table_name))
+
+    @staticmethod
+    def get_handler_name(handler):
+        """
+        Get the name of a handler for the counters: the class name of a manager, or the function name
+        :param handler: handler of events
+        :return: name of the handler
+        """
+        owner = getattr(handler, '__self__', None)
+        if owner is not None:
+            return type(owner).__name__
+        return getattr(handler, '__name__', str(handler))
+
+    def get_table_order(self):
+        """
+        Order tables so that a table goes after the tables which its managers depend on.
+        Tables without dependencies between them keep the order of registration
+        :return: list of (db_name, table_name)
+        """
+        if self.table_order is not None:
+            return self.table_order
+        tables = [(db_name, table_name) for db_name, table_name, _ in self.tables]
+        order = []
+        while tables:
+            for table in tables:
+                if all(dep not in tables or dep == table for dep in self.table_deps[table]):
+                    break
+            else:
+                table = tables[0]  # circular dependency
+            order.append(table)
+            tables.remove(table)
+        self.table_order = order
+        return order
+
+    def get_counters(self):
+        """
+        Get the counters of the batch mode.
+        Per table:
+            received - number of received events
+            dispatched - number of events which were dispatched to handlers after coalescing
+            queue_depth, max_queue_depth - the last and maximum number of events received during one batch
+        Per handler of a table:
+            calls - number of events the handler was called for
+            time_us - total time spent in the handler
+            max_batch_time_us - maximum time spent in the handler for one batch
+        :return: dictionary: 'db_name|table_name' or 'db_name|table_name|handler name' -> dictionary with counters
+        """
+        counters = {"%s|%s" % table: dict(table_counters) for table, table_counters in self.counters.items()}
+        counters.update({"%s|%s|%s" % handler: dict(handler_counters) for handler, handler_counters in self.handler_counters.items()})
+        return counters
+
+    def log_counters(self):
+        """ Write the counters of the batch mode to the syslog """
+        self.counters_logged_at = time.monotonic()
+        for name, counters in sorted(self.get_counters().items()):
+            log_info("Runner::counters '%s': %s" % (name, ", ".join("%s=%d" % item for item in sorted(counters.items()))))
@@ -1,8 +1,7 @@
-from collections import OrderedDict
 from functools import partial
 
+import ip_filters
 import jinja2
-import netaddr
 
 from .log import log_err
 
@@ -15,6 +14,7 @@ class TemplateFabric(object):
         j2_env.filters['ipv4'] = self.is_ipv4
         j2_env.filters['ipv6'] = self.is_ipv6
         j2_env.filters['pfx_filter'] = self.pfx_filter
+        j2_env.filters['ip_network'] = ip_filters.ip_network
         for attr in ['ip', 'network', 'prefixlen', 'netmask']:
             j2_env.filters[attr] = partial(self.prefix_attr, attr)
         self.env = j2_env
@@ -38,30 +38,12 @@ class TemplateFabric(object):
     @staticmethod
     def is_ipv4(value):
         """ Return True if the value is an ipv4 address """
-        if not value:
-            return False
-        if isinstance(value, netaddr.IPNetwork):
-            addr = value
-        else:
-            try:
-                addr = netaddr.IPNetwork(str(value))
-            except (netaddr.NotRegisteredError, netaddr.AddrFormatError, netaddr.AddrConversionError):
-                return False
-        return addr.version == 4
+        return ip_filters.is_ipv4(value)
 
     @staticmethod
     def is_ipv6(value):
         """ Return True if the value is an ipv6 address """
-        if not value:
-            return False
-        if isinstance(value, netaddr.IPNetwork):
-            addr = value
-        else:
-            try:
-                addr = netaddr.IPNetwork(str(value))
-            except (netaddr.NotRegisteredError, netaddr.AddrFormatError, netaddr.AddrConversionError):
-                return False
-        return addr.version == 6
+        return ip_filters.is_ipv6(value)
 
     @staticmethod
     def prefix_attr(attr, value):
@@ -73,12 +55,7 @@ class TemplateFabric(object):
         """
         if not value:
             return None
-        else:
-            try:
-                prefix = netaddr.IPNetwork(str(value).strip())
-            except (netaddr.NotRegisteredError, netaddr.AddrFormatError, netaddr.AddrConversionError):
-                return None
-        return str(getattr(prefix, attr))
+        return ip_filters.prefix_attr(attr, str(value).strip())
 
     @staticmethod
     def pfx_filter(value):
@@ -86,23 +63,6 @@ class TemplateFabric(object):
            string or tuple - This filter skips the string keys and only
            take into account the tuple.
            For eg - VLAN_INTERFACE|Vlan1000 vs VLAN_INTERFACE|Vlan1000|192.168.0.1/21
+           Invalid ip addresses are logged and skipped.
         """
-        table = OrderedDict()
-
-        if not value:
-            return table
-
-        for key, val in value.items():
-            if not isinstance(key, tuple):
-                continue
-            intf, ip_address = key
-            if '/' not in ip_address:
-                if TemplateFabric.is_ipv4(ip_address):
-                    table[(intf, "%s/32" % ip_address)] = val
-                elif TemplateFabric.is_ipv6(ip_address):
-                    table[(intf, "%s/128" % ip_address)] = val
-                else:
-                    log_err("'%s' is invalid ip address" % ip_address)
-            else:
-                table[key] = val
-        return table
+        return ip_filters.pfx_filter(value, log_invalid=log_err)
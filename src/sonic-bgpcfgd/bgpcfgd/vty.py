@@ -0,0 +1,126 @@
+"""
+Long-lived connections to the vty sockets of FRR daemons.
+A request is a list of commands. The commands are written to the socket at once,
+and the replies are read afterwards, so a request costs one round-trip.
+"""
+import os
+import socket
+import time
+
+from .log import log_debug, log_err, log_info
+
+
+class VtyClient(object):
+    """ Connection to the vty socket of one FRR daemon """
+    VTY_DIR = '/run/frr'
+    TIMEOUT = 120             # seconds to wait for a reply
+    RECONNECT_INTERVAL = 10   # seconds between connection attempts, when the daemon isn't available
+    CMD_SUCCESS = 0
+
+    def __init__(self, daemon):
+        """
+        Initialize the object
+        :param daemon: name of the FRR daemon. For example 'bgpd'
+        """
+        self.daemon = daemon
+        self.path = os.path.join(self.VTY_DIR, '%s.vty' % daemon)
+        self.sock = None
+        self.buffer = bytearray()
+        self.failed_at = None
+
+    def connect(self, force=False):
+        """
+        Connect to the daemon, if it's not connected
+        :param force: don't wait RECONNECT_INTERVAL after a failed attempt
+        :return: True if the connection is established, False otherwise
+        """
+        if self.sock is not None:
+            return True
+        if not force and self.failed_at is not None and time.monotonic() - self.failed_at < self.RECONNECT_INTERVAL:
+            return False
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.TIMEOUT)
+        try:
+            sock.connect(self.path)
+        except socket.error as e:
+            log_debug("VtyClient::can't connect to '%s': %s" % (self.path, str(e)))
+            sock.close()
+            self.failed_at = time.monotonic()
+            return False
+        self.sock = sock
+        self.buffer = bytearray()
+        replies = self.__execute(['enable'])
+        if replies is None or replies[0][0] != self.CMD_SUCCESS:
+            log_err("VtyClient::'enable' command failed for daemon '%s'" % self.daemon)
+            self.close()
+            self.failed_at = time.monotonic()
+            return False
+        self.failed_at = None
+        log_info("VtyClient::connected to daemon '%s'" % self.daemon)
+        return True
+
+    def close(self):
+        """ Close the connection """
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def execute(self, commands):
+        """
+        Execute commands in the daemon
+        :param commands: list of commands
+        :return: list of tuples (return code, output), one for each command.
+                 None if the daemon isn't connected or the connection was broken
+        """
+        if not self.connect():
+            return None
+        return self.__execute(commands)
+
+    def __execute(self, commands):
+        data = b''.join(command.encode('utf-8') + b'\0' for command in commands)
+        try:
+            self.sock.sendall(data)
+            return [self.__read_reply() for _ in commands]
+        except socket.error as e:
+            log_err("VtyClient::connection to daemon '%s' failed: %s" % (self.daemon, str(e)))
+            self.close()
+            return None
+
+    def __read_reply(self):
+        """
+        Read one reply. A reply is terminated by three zero bytes followed by the return code
+        :return: a tuple (return code, output)
+        """
+        start = 0
+        while True:
+            pos = self.buffer.find(b'\0\0\0', start)
+            if pos >= 0 and len(self.buffer) > pos + 3:
+                output = self.buffer[:pos].decode('utf-8', 'replace')
+                ret_code = self.buffer[pos + 3]
+                del self.buffer[:pos + 4]
+                return ret_code, output
+            start = max(len(self.buffer) - 3, 0)
+            data = self.sock.recv(65536)
+            if not data:
+                raise socket.error("connection closed by the daemon")
+            self.buffer.extend(data)
+
+
+g_clients = {}
+
+
+def get_client(daemon):
+    """ Get the shared connection to the daemon """
+    if daemon not in g_clients:
+        g_clients[daemon] = VtyClient(daemon)
+    return g_clients[daemon]
+
+
+def vty_execute(daemon, commands):
+    """
+    Execute commands in the daemon through the shared connection
+    :param daemon: name of the FRR daemon
+    :param commands: list of commands
+    :return: list of tuples (return code, output), or None if the daemon can't be reached through its vty socket
+    """
+    return get_client(daemon).execute(commands)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""directory_benchmark
+
+Measure Directory.put() notifications with a synthetic set of peers.
+Every peer subscribes to its own entry of DEVICE_NEIGHBOR_METADATA and
+to localhost/bgp_asn of DEVICE_METADATA. The entries of all peers are put
+one by one, and then once more inside a batch, the way Runner dispatches them.
+The legacy directory checks every subscribed path of the slot on each put.
+
+Usage (from src/sonic-bgpcfgd):
+    python -m tests.directory_benchmark [-n ROUNDS] [-p PEERS]
+"""
+
+from __future__ import print_function
+
+import argparse
+import sys
+import timeit
+
+from collections import defaultdict
+
+from bgpcfgd.directory import Directory
+
+
+class LegacyDirectory(Directory):
+    """ Directory which notifies handlers of all existing paths of the slot """
+    def __init__(self):
+        super(LegacyDirectory, self).__init__()
+        self.notify = defaultdict(lambda: defaultdict(list))  # registered callbacks: slot -> path -> handlers[]
+
+    def subscribe(self, deps, handler):
+        for db, table, path in deps:
+            slot = self.get_slot_name(db, table)
+            self.notify[slot][path].append(handler)
+
+    def put(self, db, table, key, value):
+        slot = self.get_slot_name(db, table)
+        self.data[slot][key] = value
+        if slot in self.notify:
+            for path in self.notify[slot].keys():
+                if self.path_exist(db, table, path):
+                    for handler in self.notify[slot][path]:
+                        handler()
+
+
+class Peer(object):
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+
+    def on_deps_change(self):
+        self.calls += 1
+
+
+def get_directory(cls, peers):
+    directory = cls()
+    directory.put("CONFIG_DB", "DEVICE_METADATA", "localhost", {"bgp_asn": "65100"})
+    for peer in peers:
+        deps = [
+            ("CONFIG_DB", "DEVICE_METADATA", "localhost/bgp_asn"),
+            ("CONFIG_DB", "DEVICE_NEIGHBOR_METADATA", "%s/hwsku" % peer.name),
+        ]
+        directory.subscribe(deps, peer.on_deps_change)
+    return directory
+
+
+def put_peers(directory, peers, batch):
+    if batch:
+        directory.start_batch()
+    for peer in peers:
+        directory.put("CONFIG_DB", "DEVICE_NEIGHBOR_METADATA", peer.name, {"hwsku": "Arista-VM", "type": "LeafRouter"})
+    if batch:
+        directory.end_batch()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark notifications of the bgpcfgd Directory.")
+    parser.add_argument("-n", "--rounds", type=int, default=3, help="number of timed rounds")
+    parser.add_argument("-p", "--peers", type=int, default=2000, help="number of synthetic peers")
+    args = parser.parse_args()
+
+    print('{:<10} {:<8} {:>12} {:>14}'.format('directory', 'batch', 'best (ms)', 'handler calls'))
+    for name, cls in [('legacy', LegacyDirectory), ('indexed', Directory)]:
+        for batch in [False, True]:
+            if cls is LegacyDirectory and batch:
+                continue
+            peers = [Peer('ARISTA%02dT1' % index) for index in range(args.peers)]
+            directory = get_directory(cls, peers)
+            best = min(timeit.repeat(lambda: put_peers(directory, peers, batch), number=1, repeat=args.rounds))
+            calls = sum(peer.calls for peer in peers) // args.rounds
+            print('{:<10} {:<8} {:>12.2f} {:>14}'.format(name, str(batch), best * 1000, calls))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
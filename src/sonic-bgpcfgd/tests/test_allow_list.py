@@ -1,6 +1,7 @@
 from unittest.mock import MagicMock, patch
 
 import bgpcfgd.frr
+from bgpcfgd.config import ConfigMgr
 from bgpcfgd.directory import Directory
 from bgpcfgd.template import TemplateFabric
 import bgpcfgd
@@ -37,10 +38,9 @@ def set_del_test(op, args, currect_config, expected_config, update_global_defaul
     #
     bgpcfgd.frr.run_command = lambda cmd: (0, "", "")
     #
-    cfg_mgr = MagicMock()
-    cfg_mgr.update.return_value = None
+    cfg_mgr = ConfigMgr(MagicMock())
+    cfg_mgr.frr.get_config.return_value = "\n".join(currect_config)
     cfg_mgr.push_list = push_list
-    cfg_mgr.get_text.return_value = currect_config
     common_objs = {
         'directory': Directory(),
         'cfg_mgr':   cfg_mgr,
@@ -566,9 +566,9 @@ def test_set_handler_with_community_data_is_already_presented():
 @patch.dict("sys.modules", swsscommon=swsscommon_module_mock)
 def test_set_handler_no_community_data_is_already_presented():
     from bgpcfgd.managers_allow_list import BGPAllowListMgr
-    cfg_mgr = MagicMock()
-    cfg_mgr.update.return_value = None
-    cfg_mgr.get_text.return_value = [
+    cfg_mgr = ConfigMgr(MagicMock())
+    cfg_mgr.push_list = MagicMock()
+    cfg_mgr.frr.get_config.return_value = "\n".join([
         'ip prefix-list PL_ALLOW_LIST_DEPLOYMENT_ID_5_COMMUNITY_empty_V4 seq 10 deny 0.0.0.0/0 le 17',
         'ip prefix-list PL_ALLOW_LIST_DEPLOYMENT_ID_5_COMMUNITY_empty_V4 seq 20 permit 20.20.30.0/24 le 32',
         'ip prefix-list PL_ALLOW_LIST_DEPLOYMENT_ID_5_COMMUNITY_empty_V4 seq 30 permit 40.50.0.0/16 le 32',
@@ -585,7 +585,7 @@ def test_set_handler_no_community_data_is_already_presented():
         'route-map ALLOW_LIST_DEPLOYMENT_ID_5_V6 permit 65535',
         ' set community 123:123 additive',
         ""
-    ]
+    ])
     common_objs = {
             'directory': Directory(),
             'cfg_mgr': cfg_mgr,
@@ -738,9 +738,9 @@ def test___set_handler_validate():
 @patch.dict("sys.modules", swsscommon=swsscommon_module_mock)
 def test___find_peer_group_by_deployment_id():
     from bgpcfgd.managers_allow_list import BGPAllowListMgr
-    cfg_mgr = MagicMock()
-    cfg_mgr.update.return_value = None
-    cfg_mgr.get_text.return_value = [
+    cfg_mgr = ConfigMgr(MagicMock())
+    cfg_mgr.push_list = MagicMock()
+    cfg_mgr.frr.get_config.return_value = "\n".join([
         'router bgp 64601',
         ' neighbor BGPSLBPassive peer-group',
         ' neighbor BGPSLBPassive remote-as 65432',
@@ -818,7 +818,7 @@ def test___find_peer_group_by_deployment_id():
         'route-map TO_BGP_PEER_V4 permit 100',
         'route-map TO_BGP_PEER_V6 permit 100',
         'route-map TO_BGP_SPEAKER deny 1',
-    ]
+    ])
     common_objs = {
         'directory': Directory(),
         'cfg_mgr':   cfg_mgr,
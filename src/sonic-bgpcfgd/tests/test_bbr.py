@@ -1,5 +1,6 @@
 from unittest.mock import MagicMock, patch
 
+from bgpcfgd.config import ConfigMgr
 from bgpcfgd.directory import Directory
 from bgpcfgd.template import TemplateFabric
 from copy import deepcopy
@@ -372,7 +373,8 @@ def test__get_available_peer_groups():
         'constants': global_constants,
     }
     m = BBRMgr(common_objs, "CONFIG_DB", "BGP_BBR")
-    m.cfg_mgr.get_text = MagicMock(return_value=[
+    m.cfg_mgr = ConfigMgr(MagicMock())
+    m.cfg_mgr.frr.get_config.return_value = "\n".join([
         '  neighbor PEER_V4 peer-group',
         '  neighbor PEER_V6 peer-group',
         '  address-family ipv4',
@@ -21,11 +21,13 @@ def constructor():
     }
 
     return_value_map = {
+        "['vtysh', '-c', 'show bgp vrf all neighbors json']": (0, "{\"default\": {\"vrfId\": 0, \"vrfName\": \"default\", \"10.10.10.1\": {}, \"20.20.20.1\": {}, \"fc00:10::1\": {}}}", ""),
         "['vtysh', '-c', 'show bgp vrfs json']": (0, "{\"vrfs\": {\"default\": {}}}", ""),
         "['vtysh', '-c', 'show bgp vrf default neighbors json']": (0, "{\"10.10.10.1\": {}, \"20.20.20.1\": {}, \"fc00:10::1\": {}}", "")
     }
 
     bgpcfgd.managers_bgp.run_command = lambda cmd: return_value_map[str(cmd)]
+    bgpcfgd.managers_bgp.BGPPeerMgrBase.peers_cache = None
     m = bgpcfgd.managers_bgp.BGPPeerMgrBase(common_objs, "CONFIG_DB", swsscommon.CFG_BGP_NEIGHBOR_TABLE_NAME, "general", True)
     assert m.peer_type == "general"
     assert m.check_neig_meta == ('bgp' in constants and 'use_neighbors_meta' in constants['bgp'] and constants['bgp']['use_neighbors_meta'])
@@ -85,6 +87,23 @@ def test_add_peer_ipv6():
     res = m.set_handler("fc00:20::1", {"local_addr": "fc00:20::20", "admin_status": "up"})
     assert res, "Expect True return value"
 
+def test_add_peer_peer_group_cached():
+    m = constructor()
+    pg_mgr = m.peer_group_mgr
+    pg_mgr.policy_template = MagicMock(wraps=pg_mgr.policy_template)
+    pg_mgr.peergroup_template = MagicMock(wraps=pg_mgr.peergroup_template)
+    assert m.set_handler("30.30.30.1", {"local_addr": "30.30.30.30", "admin_status": "up"})
+    assert m.set_handler("30.30.30.2", {"local_addr": "30.30.30.30", "admin_status": "up"})
+    assert pg_mgr.policy_template.render.call_count == 1
+    assert pg_mgr.peergroup_template.render.call_count == 1
+    # the peer-group template refers to DEVICE_METADATA
+    m.directory.put("CONFIG_DB", swsscommon.CFG_DEVICE_METADATA_TABLE_NAME, "localhost", {"bgp_asn": "65100", "type": "ToRRouter"})
+    assert m.set_handler("30.30.30.3", {"local_addr": "30.30.30.30", "admin_status": "up"})
+    assert pg_mgr.peergroup_template.render.call_count == 2
+    pushed = [call[0][0] for call in m.cfg_mgr.push.call_args_list]
+    assert sum('neighbor PEER_V4 allowas-in 1' in cmd for cmd in pushed) == 1
+    assert sum('neighbor 30.30.30.3 ' in cmd for cmd in pushed) > 0
+
 @patch('bgpcfgd.managers_bgp.log_warn')
 def test_add_peer_no_local_addr(mocked_log_warn):
     m = constructor()
@@ -110,3 +129,33 @@ def test_del_handler_nonexist_peer(mocked_log_warn):
     m = constructor()
     m.del_handler("40.40.40.1")
     mocked_log_warn.assert_called_with("Peer '(default|40.40.40.1)' has not been found")
+
+def test_load_peers():
+    commands = []
+    return_value_map = {
+        "show bgp vrf all neighbors json": (0, '{"default": {"vrfId": 0, "vrfName": "default", "10.10.10.1": {"remoteAs": 65200}},'
+                                               ' "Vnet1": {"vrfId": 5, "vrfName": "Vnet1", "20.20.20.1": {}}}', ""),
+    }
+    def run_command(cmd):
+        commands.append(cmd[2])
+        return return_value_map[cmd[2]]
+    bgpcfgd.managers_bgp.run_command = run_command
+    bgpcfgd.managers_bgp.BGPPeerMgrBase.peers_cache = None
+    peers = bgpcfgd.managers_bgp.BGPPeerMgrBase.load_peers()
+    assert peers == {("default", "10.10.10.1"), ("Vnet1", "20.20.20.1")}
+    # the second load is served from the cache
+    peers.add(("default", "30.30.30.1"))
+    assert bgpcfgd.managers_bgp.BGPPeerMgrBase.load_peers() == {("default", "10.10.10.1"), ("Vnet1", "20.20.20.1")}
+    assert commands == ["show bgp vrf all neighbors json"]
+
+def test_load_peers_by_vrf():
+    return_value_map = {
+        "show bgp vrf all neighbors json": (1, "", "% Unknown command"),
+        "show bgp vrfs json": (0, '{"vrfs": {"default": {}, "Vnet1": {}}}', ""),
+        "show bgp vrf default neighbors json": (0, '{"10.10.10.1": {}}', ""),
+        "show bgp vrf Vnet1 neighbors json": (0, '{"20.20.20.1": {}}', ""),
+    }
+    bgpcfgd.managers_bgp.run_command = lambda cmd: return_value_map[cmd[2]]
+    bgpcfgd.managers_bgp.BGPPeerMgrBase.peers_cache = None
+    peers = bgpcfgd.managers_bgp.BGPPeerMgrBase.load_peers()
+    assert peers == {("default", "10.10.10.1"), ("Vnet1", "20.20.20.1")}
@@ -1,3 +1,4 @@
+from collections import OrderedDict
 from unittest.mock import MagicMock
 
 from bgpcfgd.config import ConfigMgr
@@ -205,3 +206,116 @@ def test_from_canonical():
     c = ConfigMgr(frr)
     raw = c.from_canonical(canonical)
     assert raw == expected
+
+running_config = """!
+router bgp 65100
+ neighbor PEER_V4 peer-group
+ neighbor PEER_V6 peer-group
+ neighbor 10.0.0.1 remote-as 64600
+ neighbor 10.0.0.1 peer-group PEER_V4
+ address-family ipv4 unicast
+  neighbor PEER_V4 route-map FROM_BGP_PEER_V4 in
+  neighbor PEER_V4 route-map TO_BGP_PEER_V4 out
+ exit-address-family
+!
+ip prefix-list PL_A seq 10 deny 0.0.0.0/0 le 17
+ip prefix-list PL_A seq 20 permit 10.0.0.0/8 le 32
+ipv6 prefix-list PL_A seq 10 deny ::/0 le 59
+!
+bgp community-list standard CL_A permit 1010:2020
+!
+route-map FROM_BGP_PEER_V4 permit 10
+ call ALLOW_LIST_DEPLOYMENT_ID_0_V4
+ on-match next
+!
+route-map ALLOW_LIST_DEPLOYMENT_ID_0_V4 permit 10
+ match ip address prefix-list PL_A
+ match community CL_A
+!
+route-map ALLOW_LIST_DEPLOYMENT_ID_0_V4 permit 65535
+ set community 123:123 additive
+!
+"""
+
+def get_updated_config_mgr():
+    frr = MagicMock()
+    frr.get_config = MagicMock(return_value=running_config)
+    frr.write = MagicMock(return_value=True)
+    frr.restart_peer_groups = MagicMock(return_value=True)
+    c = ConfigMgr(frr)
+    c.update()
+    return c
+
+def test_index():
+    c = get_updated_config_mgr()
+    assert c.get_prefix_list('ip', 'PL_A') == ['deny 0.0.0.0/0 le 17', 'permit 10.0.0.0/8 le 32']
+    assert c.get_prefix_list('ipv6', 'PL_A') == ['deny ::/0 le 59']
+    assert c.get_prefix_list('ip', 'PL_B') == []
+    assert c.get_community_list('CL_A') == [('permit', '1010:2020')]
+    assert c.get_route_map('ALLOW_LIST_DEPLOYMENT_ID_0_V4') == OrderedDict([
+        (10, ('permit', ['match ip address prefix-list PL_A', 'match community CL_A'])),
+        (65535, ('permit', ['set community 123:123 additive'])),
+    ])
+    assert c.get_route_map('FROM_BGP_PEER_V4')[10] == ('permit', ['call ALLOW_LIST_DEPLOYMENT_ID_0_V4', 'on-match next'])
+    assert c.get_peer_groups() == ['PEER_V4', 'PEER_V6']
+    assert c.get_peer_group_members('PEER_V4') == ['10.0.0.1']
+    assert c.get_neighbor_route_map('PEER_V4', 'in') == 'FROM_BGP_PEER_V4'
+    assert c.get_neighbor_route_map('PEER_V6', 'in') is None
+
+def test_update_cached():
+    c = get_updated_config_mgr()
+    c.update()
+    assert c.frr.get_config.call_count == 1
+    c.loaded_at -= ConfigMgr.FULL_REFRESH_INTERVAL
+    c.update()
+    assert c.frr.get_config.call_count == 2
+    c.invalidate()
+    c.update()
+    assert c.frr.get_config.call_count == 3
+    c.update(force=True)
+    assert c.frr.get_config.call_count == 4
+
+def test_commit_updates_index():
+    c = get_updated_config_mgr()
+    c.push_list([
+        'no ip prefix-list PL_A',
+        'ip prefix-list PL_A seq 10 permit 20.0.0.0/8 le 32',
+        'ip prefix-list PL_A permit 30.0.0.0/8 le 32',
+        'no bgp community-list standard CL_A',
+        'bgp community-list standard CL_B permit 3030:4040',
+        'route-map ALLOW_LIST_DEPLOYMENT_ID_0_V4 permit 20',
+        ' match ip address prefix-list PL_B',
+        'route-map ALLOW_LIST_DEPLOYMENT_ID_0_V4 permit 65535',
+        ' set community 5060:12345 additive',
+        'no route-map ALLOW_LIST_DEPLOYMENT_ID_0_V4 permit 10',
+    ])
+    c.push("router bgp 65100\n neighbor PEER_V6_INT peer-group\n no neighbor PEER_V4 route-map FROM_BGP_PEER_V4 in")
+    assert c.commit()
+    assert c.changes == ""
+    assert c.frr.get_config.call_count == 1
+    c.update()
+    assert c.frr.get_config.call_count == 1
+    assert c.get_prefix_list('ip', 'PL_A') == ['permit 20.0.0.0/8 le 32', 'permit 30.0.0.0/8 le 32']
+    assert c.get_community_list('CL_A') == []
+    assert c.get_community_list('CL_B') == [('permit', '3030:4040')]
+    assert c.get_route_map('ALLOW_LIST_DEPLOYMENT_ID_0_V4') == OrderedDict([
+        (20, ('permit', ['match ip address prefix-list PL_B'])),
+        (65535, ('permit', ['set community 5060:12345 additive'])),
+    ])
+    assert c.get_peer_groups() == ['PEER_V4', 'PEER_V6', 'PEER_V6_INT']
+    assert c.get_neighbor_route_map('PEER_V4', 'in') is None
+    # the text is read from FRR again, when it's requested after changes
+    c.get_text()
+    assert c.frr.get_config.call_count == 2
+
+def test_commit_invalidates_cache():
+    c = get_updated_config_mgr()
+    c.push_list(['no router bgp 65100'])
+    assert c.commit()
+    c.update()
+    assert c.frr.get_config.call_count == 2
+    c.frr.write.return_value = False
+    c.push_list(['ip prefix-list PL_B seq 10 permit 20.0.0.0/8 le 32'])
+    assert not c.commit()
+    c.update()
+    assert c.frr.get_config.call_count == 3
@@ -55,3 +55,41 @@ def test_directory(mocked_log_err):
     # Test remove_slot() with nonexist table
     directory.remove_slot("db_name", "table_nonexist")
     mocked_log_err.assert_called_with("Directory: Can't remove slot 'db_name__table_nonexist'. The slot doesn't exist")
+
+
+def test_notify():
+    calls = []
+    directory = Directory()
+    directory.subscribe([("db_name", "table", "key1/key1_1")], lambda: calls.append("key1_1"))
+    directory.subscribe([("db_name", "table", "key2")], lambda: calls.append("key2"))
+    directory.subscribe([("db_name", "table", "")], lambda: calls.append("table"))
+    both = lambda: calls.append("both")
+    directory.subscribe([("db_name", "table", "key1"), ("db_name", "table", "key2")], both)
+
+    # only handlers of existing paths under the changed key are notified. Each handler is called once
+    directory.put("db_name", "table", "key1", {"key1_2": "value"})
+    assert calls == ["table", "both"]
+    del calls[:]
+    directory.put("db_name", "table", "key1", {"key1_1": "value"})
+    assert calls == ["table", "both", "key1_1"]
+    del calls[:]
+    directory.put("db_name", "table", "key3", "value")
+    assert calls == ["table"]
+    del calls[:]
+    directory.put("db_name", "table_other", "key1", {"key1_1": "value"})
+    assert calls == []
+
+
+def test_notify_batch():
+    calls = []
+    directory = Directory()
+    directory.subscribe([("db_name", "table", "key1"), ("db_name", "table", "key2")], lambda: calls.append("handler"))
+    directory.start_batch()
+    directory.put("db_name", "table", "key1", "value")
+    directory.put("db_name", "table", "key2", "value")
+    directory.put("db_name", "table", "key1", "value")
+    assert calls == []
+    directory.end_batch()
+    assert calls == ["handler"]
+    directory.put("db_name", "table", "key1", "value")
+    assert calls == ["handler", "handler"]
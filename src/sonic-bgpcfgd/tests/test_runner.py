@@ -0,0 +1,125 @@
+from collections import OrderedDict
+from unittest.mock import MagicMock, patch
+
+from . import swsscommon_test
+
+with patch.dict("sys.modules", swsscommon=swsscommon_test):
+    import bgpcfgd.runner
+    from bgpcfgd.runner import Runner
+
+
+class FakeSubscriber(object):
+    def __init__(self, batches):
+        self.batches = batches
+
+    def pops(self):
+        return self.batches.pop(0) if self.batches else []
+
+
+class FakeManager(object):
+    def __init__(self, db_name, table_name, deps, calls):
+        self.db_name = db_name
+        self.table_name = table_name
+        self.deps = deps
+        self.calls = calls
+
+    def get_database(self):
+        return self.db_name
+
+    def get_table_name(self):
+        return self.table_name
+
+    def handler(self, key, op, data):
+        self.calls.append((self.table_name, key, op, data))
+
+
+def get_swsscommon(subscribers):
+    swsscommon = MagicMock(SET_COMMAND='SET', DEL_COMMAND='DEL')
+    swsscommon.SonicDBConfig.getDbId = lambda db_name: db_name
+    swsscommon.SubscriberStateTable = lambda conn, table_name: subscribers[table_name]
+    selector = swsscommon.Select.return_value
+    selector.TIMEOUT = 1
+    selector.ERROR = 2
+    selector.select.return_value = (selector.TIMEOUT, None)
+    return swsscommon
+
+
+def test_coalesce():
+    with patch.object(bgpcfgd.runner, 'swsscommon', get_swsscommon({})):
+        events = OrderedDict()
+        Runner.coalesce(events, 'a', 'SET', {'v': '1'})
+        Runner.coalesce(events, 'b', 'DEL', {})
+        Runner.coalesce(events, 'a', 'SET', {'v': '2'})
+        Runner.coalesce(events, 'b', 'SET', {'v': '3'})
+        Runner.coalesce(events, 'b', 'SET', {'v': '4'})
+        Runner.coalesce(events, 'c', 'SET', {'v': '5'})
+        Runner.coalesce(events, 'c', 'DEL', {})
+        assert events == OrderedDict([
+            ('a', [('SET', {'v': '2'})]),
+            ('b', [('DEL', {}), ('SET', {'v': '4'})]),
+            ('c', [('DEL', {})]),
+        ])
+
+
+def test_batch():
+    calls = []
+    subscribers = {
+        'BGP_NEIGHBOR': FakeSubscriber([
+            [('10.0.0.1', 'SET', (('asn', '1'),)), ('10.0.0.1', 'SET', (('asn', '2'),))],
+            [('10.0.0.2', 'DEL', ())],
+        ]),
+        'DEVICE_METADATA': FakeSubscriber([
+            [('localhost', 'SET', (('bgp_asn', '65100'),))],
+        ]),
+    }
+    swsscommon = get_swsscommon(subscribers)
+    with patch.object(bgpcfgd.runner, 'swsscommon', swsscommon):
+        cfg_mgr = MagicMock()
+        runner = Runner(cfg_mgr, batch=True)
+        # registered before the table it depends on
+        runner.add_manager(FakeManager('CONFIG_DB', 'BGP_NEIGHBOR', [('CONFIG_DB', 'DEVICE_METADATA', 'localhost/bgp_asn')], calls))
+        runner.add_manager(FakeManager('CONFIG_DB', 'DEVICE_METADATA', [], calls))
+        assert runner.get_table_order() == [('CONFIG_DB', 'DEVICE_METADATA'), ('CONFIG_DB', 'BGP_NEIGHBOR')]
+        # the first select returns a new event, the second one times out
+        selector = swsscommon.Select.return_value
+        selector.select.side_effect = [(0, None), (selector.TIMEOUT, None)]
+        runner._Runner__process_batch()
+    assert calls == [
+        ('DEVICE_METADATA', 'localhost', 'SET', {'bgp_asn': '65100'}),
+        ('BGP_NEIGHBOR', '10.0.0.1', 'SET', {'asn': '2'}),
+        ('BGP_NEIGHBOR', '10.0.0.2', 'DEL', {}),
+    ]
+    counters = runner.get_counters()
+    assert counters['CONFIG_DB|BGP_NEIGHBOR']['received'] == 3
+    assert counters['CONFIG_DB|BGP_NEIGHBOR']['dispatched'] == 2
+    # the queue depth is the backlog before coalescing
+    assert counters['CONFIG_DB|BGP_NEIGHBOR']['max_queue_depth'] == 3
+    assert counters['CONFIG_DB|DEVICE_METADATA']['dispatched'] == 1
+    assert counters['CONFIG_DB|BGP_NEIGHBOR|FakeManager']['calls'] == 2
+    assert counters['CONFIG_DB|DEVICE_METADATA|FakeManager']['calls'] == 1
+    assert 'time_us' in counters['CONFIG_DB|DEVICE_METADATA|FakeManager']
+
+    with patch.object(bgpcfgd.runner, 'log_info') as log_info:
+        runner.log_counters()
+    messages = [call[0][0] for call in log_info.call_args_list]
+    assert len(messages) == 4
+    assert "Runner::counters 'CONFIG_DB|BGP_NEIGHBOR': dispatched=2, max_queue_depth=3, queue_depth=3, received=3" in messages
+
+
+def test_batch_directory():
+    subscribers = {
+        'DEVICE_METADATA': FakeSubscriber([
+            [('localhost', 'SET', (('bgp_asn', '65100'),)), ('localhost', 'SET', (('bgp_asn', '65101'),))],
+        ]),
+    }
+    swsscommon = get_swsscommon(subscribers)
+    with patch.object(bgpcfgd.runner, 'swsscommon', swsscommon):
+        directory = MagicMock()
+        runner = Runner(MagicMock(), batch=True, directory=directory)
+        manager = FakeManager('CONFIG_DB', 'DEVICE_METADATA', [], [])
+        manager.handler = lambda key, op, data: directory.put('CONFIG_DB', 'DEVICE_METADATA', key, data)
+        runner.add_manager(manager)
+        selector = swsscommon.Select.return_value
+        selector.select.side_effect = [(selector.TIMEOUT, None)]
+        runner._Runner__process_batch()
+    assert [call[0] for call in directory.mock_calls] == ['start_batch', 'put', 'end_batch']
@@ -0,0 +1,163 @@
+import os
+import socket
+import tempfile
+import threading
+from unittest.mock import patch
+
+import bgpcfgd.frr
+import bgpcfgd.vty
+from bgpcfgd.vty import VtyClient
+
+
+class FakeDaemon(object):
+    """ Serves the vty socket of a FRR daemon. handler(command) returns (return code, output) """
+    def __init__(self, directory, daemon, handler):
+        self.commands = []
+        self.handler = handler
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.bind(os.path.join(directory, '%s.vty' % daemon))
+        self.sock.listen(1)
+        self.thread = threading.Thread(target=self.serve)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def serve(self):
+        conn, _ = self.sock.accept()
+        data = b''
+        while True:
+            chunk = conn.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+            replies = b''
+            while b'\0' in data:
+                command, data = data.split(b'\0', 1)
+                command = command.decode()
+                self.commands.append(command)
+                ret_code, out = self.handler(command)
+                replies += out.encode() + b'\0\0\0' + bytes([ret_code])
+            # split replies to check reassembling
+            for idx in range(0, len(replies), 5):
+                conn.sendall(replies[idx:idx + 5])
+        conn.close()
+
+
+def accept_all(command):
+    return 0, 'output of %s' % command if command.startswith('show') else ''
+
+
+def with_daemons(handlers):
+    def decorator(func):
+        def wrapper():
+            with tempfile.TemporaryDirectory() as directory:
+                daemons = {name: FakeDaemon(directory, name, handler) for name, handler in handlers.items()}
+                with patch.object(VtyClient, 'VTY_DIR', directory), patch.dict(bgpcfgd.vty.g_clients, clear=True):
+                    func(daemons)
+                    for client in bgpcfgd.vty.g_clients.values():
+                        client.close()
+        return wrapper
+    return decorator
+
+
+@with_daemons({'bgpd': accept_all})
+def test_execute(daemons):
+    replies = bgpcfgd.vty.vty_execute('bgpd', ['show bgp summary', 'clear bgp peer-group PEER_V4 soft in'])
+    assert replies == [(0, 'output of show bgp summary'), (0, '')]
+    replies = bgpcfgd.vty.vty_execute('bgpd', ['show version'])
+    assert replies == [(0, 'output of show version')]
+    assert daemons['bgpd'].commands == ['enable', 'show bgp summary', 'clear bgp peer-group PEER_V4 soft in', 'show version']
+
+
+def test_execute_no_daemon():
+    with tempfile.TemporaryDirectory() as directory:
+        with patch.object(VtyClient, 'VTY_DIR', directory):
+            client = VtyClient('bgpd')
+            assert client.execute(['show version']) is None
+            assert client.failed_at is not None
+
+
+@with_daemons({'bgpd': accept_all})
+def test_frr_get_config(daemons):
+    bgpcfgd.frr.run_command = lambda cmd: (1, "", "vtysh must not be called")
+    f = bgpcfgd.frr.FRR(["bgpd", "zebra"])
+    assert f.get_config() == 'output of show running-config'
+
+
+def test_split_config():
+    f = bgpcfgd.frr.FRR(["bgpd", "zebra", "staticd"])
+    blocks = f.split_config("""router bgp 65100
+  neighbor PEER_V4 peer-group
+  address-family ipv4
+    neighbor PEER_V4 route-map FROM_BGP_PEER_V4 in
+  exit-address-family
+!
+route-map FROM_BGP_PEER_V4 permit 10
+ match community COMMUNITY_A
+ set community 123:123 additive
+no ip prefix-list PL_A
+bgp community-list standard COMMUNITY_A permit 1010:2020
+""")
+    assert blocks == [
+        (['bgpd'], ['router bgp 65100', 'neighbor PEER_V4 peer-group', 'address-family ipv4',
+                    'neighbor PEER_V4 route-map FROM_BGP_PEER_V4 in', 'exit-address-family']),
+        (['bgpd', 'zebra'], ['route-map FROM_BGP_PEER_V4 permit 10', 'match community COMMUNITY_A',
+                             'set community 123:123 additive']),
+        (['bgpd', 'zebra'], ['no ip prefix-list PL_A']),
+        (['bgpd'], ['bgp community-list standard COMMUNITY_A permit 1010:2020']),
+    ]
+    assert f.split_config("vrf Vrf1\n ip route 10.0.0.0/8 10.1.0.1\n") is None
+    assert f.split_config("router bgp 65100\n ip protocol bgp route-map RM_SET_SRC\n") is None
+
+
+def zebra_handler(command):
+    if command.startswith('match community'):
+        return 2, '% Unknown command'
+    return 0, ''
+
+
+@with_daemons({'bgpd': accept_all, 'zebra': zebra_handler})
+def test_frr_write(daemons):
+    bgpcfgd.frr.run_command = lambda cmd: (1, "", "vtysh must not be called")
+    f = bgpcfgd.frr.FRR(["bgpd", "zebra"])
+    assert f.write("router bgp 65100\n neighbor PEER_V4 peer-group\nroute-map A permit 10\n match community B")
+    assert daemons['bgpd'].commands == [
+        'enable',
+        'configure terminal', 'router bgp 65100', 'neighbor PEER_V4 peer-group', 'end',
+        'configure terminal', 'route-map A permit 10', 'match community B', 'end',
+    ]
+    assert daemons['zebra'].commands == ['enable', 'configure terminal', 'route-map A permit 10', 'match community B', 'end']
+
+
+@with_daemons({'bgpd': zebra_handler, 'zebra': zebra_handler})
+def test_frr_write_fail(daemons):
+    bgpcfgd.frr.run_command = lambda cmd: (1, "", "vtysh must not be called")
+    f = bgpcfgd.frr.FRR(["bgpd", "zebra"])
+    assert not f.write("route-map A permit 10\n match community B")
+
+
+@with_daemons({'bgpd': accept_all})
+def test_frr_write_fallback(daemons):
+    commands = []
+    def run_command(cmd):
+        commands.append(cmd)
+        return 0, "", ""
+    bgpcfgd.frr.run_command = run_command
+    f = bgpcfgd.frr.FRR(["bgpd", "zebra"])
+    assert f.write("ip route 10.0.0.0/8 10.1.0.1")
+    assert len(commands) == 1 and commands[0][:2] == ["vtysh", "-f"]
+    assert daemons['bgpd'].commands == []
+
+
+def bgpd_clear_handler(command):
+    return (1, 'failed') if 'pg_2' in command else (0, '')
+
+
+@with_daemons({'bgpd': bgpd_clear_handler})
+def test_frr_restart_peer_groups(daemons):
+    bgpcfgd.frr.run_command = lambda cmd: (1, "", "vtysh must not be called")
+    f = bgpcfgd.frr.FRR(["bgpd"])
+    assert f.restart_peer_groups(["pg_1", "pg_3", "pg_1"])
+    assert not f.restart_peer_groups(["pg_2"])
+    assert daemons['bgpd'].commands == [
+        'enable', 'clear bgp peer-group pg_1 soft in', 'clear bgp peer-group pg_3 soft in', 'clear bgp peer-group pg_2 soft in'
+    ]
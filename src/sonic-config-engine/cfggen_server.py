@@ -0,0 +1,275 @@
+"""cfggen_server.py
+
+Resident render server for sonic-cfggen and the thin client talking to it.
+
+`sonic-cfggen --serve` keeps the CONFIG_DB contents of every namespace it is
+asked about in memory, kept fresh through keyspace notifications, along with
+the compiled jinja2 templates. sonic-cfggen invocations reading from the DB
+forward their command line to it over a UNIX socket and fall back to
+rendering in-process whenever the server is absent or declines the request.
+
+The client side only uses the standard library so that it can run before
+sonic-cfggen imports jinja2, swsscommon and friends.
+"""
+
+from __future__ import print_function
+
+import copy
+import json
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+
+CFGGEN_SERVER_SOCKET = '/var/run/sonic-cfggen.sock'
+
+# Environment variables that change the data sonic-cfggen renders
+FORWARDED_ENV = ['NAMESPACE_ID']
+
+_LENGTH = struct.Struct('!I')
+
+
+def _send_message(sock, message):
+    payload = json.dumps(message).encode('utf-8')
+    sock.sendall(_LENGTH.pack(len(payload)) + payload)
+
+
+def _recv_exactly(sock, size):
+    chunks = []
+    while size > 0:
+        chunk = sock.recv(min(size, 1 << 16))
+        if not chunk:
+            raise EOFError('connection closed')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def _recv_message(sock):
+    (size,) = _LENGTH.unpack(_recv_exactly(sock, _LENGTH.size))
+    return json.loads(_recv_exactly(sock, size).decode('utf-8'))
+
+
+###############################################################################
+#
+# Client
+#
+###############################################################################
+
+def render_on_server(argv, socket_path=CFGGEN_SERVER_SOCKET):
+    """ Run a sonic-cfggen command line on the render server.
+
+    Returns the exit code of the command after copying its output to
+    stdout/stderr, or None if the command has to be run in-process.
+    """
+    if not os.path.exists(socket_path):
+        return None
+
+    request = {
+        'argv': argv,
+        'cwd': os.getcwd(),
+        'env': dict((name, os.environ[name]) for name in FORWARDED_ENV if name in os.environ),
+    }
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(socket_path)
+            _send_message(sock, request)
+            reply = _recv_message(sock)
+        finally:
+            sock.close()
+    except (socket.error, EOFError, ValueError):
+        return None
+
+    if reply.get('fallback'):
+        return None
+    sys.stdout.write(reply.get('stdout', ''))
+    sys.stderr.write(reply.get('stderr', ''))
+    return reply.get('rc', 0)
+
+
+###############################################################################
+#
+# Server
+#
+###############################################################################
+
+class ConfigDBCache(object):
+    """ In-memory copy of the CONFIG_DB of one namespace.
+
+    Keyspace notifications only mark keys dirty; dirty keys are re-read right
+    before the next request is served. If the notification stream breaks the
+    whole DB is read again.
+
+    Before a request is served, a token is published on a channel the same
+    pubsub listens to. Redis delivers messages in order, so once the listener
+    has seen the token, it has also seen the notifications of every write
+    completed before the request, like `sonic-cfggen -w` run just before.
+    """
+
+    SYNC_TIMEOUT = 5
+
+    def __init__(self, connector_factory):
+        self.connector_factory = connector_factory
+        self.lock = threading.Lock()
+        self.synced = threading.Condition(self.lock)
+        self.configdb = None
+        self.config = None
+        self.dirty_keys = set()
+        self.listener = None
+        self.sync_channel = 'CFGGEN_SERVER_SYNC:{}:{}'.format(os.getpid(), id(self))
+        self.sync_token = 0
+        self.seen_token = 0
+
+    def _listen(self, pubsub):
+        try:
+            while True:
+                item = pubsub.listen_message()
+                if item['type'] == 'pmessage':
+                    key = item['channel'].split(':', 1)[1]
+                    with self.lock:
+                        self.dirty_keys.add(key)
+                elif item['type'] == 'message' and item['channel'] == self.sync_channel:
+                    with self.lock:
+                        self.seen_token = max(self.seen_token, int(item['data']))
+                        self.synced.notify_all()
+        except Exception:
+            pass
+        # Notifications may have been lost, reload everything next time
+        with self.lock:
+            self.config = None
+            self.synced.notify_all()
+
+    def _start(self):
+        self.configdb = self.connector_factory()
+        # Subscribe before the whole DB is read, so that no write after the
+        # read started is missed. Keys written during the read are refreshed
+        # once more on the next request, which is harmless.
+        pubsub = self.configdb.get_redis_client(self.configdb.db_name).pubsub()
+        pubsub.psubscribe("__keyspace@{}__:*".format(self.configdb.get_dbid(self.configdb.db_name)))
+        pubsub.subscribe(self.sync_channel)
+        self.listener = threading.Thread(target=self._listen, args=(pubsub,))
+        self.listener.daemon = True
+        self.listener.start()
+        self.config = self.configdb.get_config()
+
+    def _sync(self):
+        """ Wait until the listener has seen the notifications of all writes done so far.
+        Return False if it didn't in time. Called with the lock held.
+        """
+        self.sync_token += 1
+        token = self.sync_token
+        self.configdb.get_redis_client(self.configdb.db_name).publish(self.sync_channel, str(token))
+        deadline = time.time() + self.SYNC_TIMEOUT
+        while self.seen_token < token and self.config is not None:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False
+            self.synced.wait(remaining)
+        return self.config is not None
+
+    def _refresh_key(self, key):
+        separator = self.configdb.TABLE_NAME_SEPARATOR
+        if separator not in key:
+            # Not a CONFIG_DB table entry (e.g. CONFIG_DB_INITIALIZED)
+            return
+        (table, row) = key.split(separator, 1)
+        entry = self.configdb.get_entry(table, row)
+        row_key = self.configdb.deserialize_key(row)
+        if entry:
+            self.config.setdefault(table, {})[row_key] = entry
+        elif table in self.config:
+            self.config[table].pop(row_key, None)
+            if not self.config[table]:
+                del self.config[table]
+
+    def get_config(self):
+        """ Return a private copy of the up to date CONFIG_DB contents """
+        with self.lock:
+            if (self.config is None or self.listener is None or not self.listener.is_alive()
+                    or not self._sync()):
+                self._start()
+            else:
+                dirty_keys, self.dirty_keys = self.dirty_keys, set()
+                for key in dirty_keys:
+                    self._refresh_key(key)
+            return copy.deepcopy(self.config)
+
+
+class RenderServer(object):
+    """ Serve sonic-cfggen requests one at a time on a UNIX socket.
+
+    handler(argv) runs one sonic-cfggen command line and returns
+    (rc, stdout, stderr), or None if the command cannot be served here.
+    Requests are handled sequentially because they run in the caller's
+    working directory and environment.
+    """
+
+    def __init__(self, handler, socket_path=CFGGEN_SERVER_SOCKET):
+        self.handler = handler
+        self.socket_path = socket_path
+        self.sock = None
+
+    def _is_trusted_peer(self, conn):
+        if not hasattr(socket, 'SO_PEERCRED'):
+            return True
+        creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+        _, uid, _ = struct.unpack('3i', creds)
+        return uid in (0, os.getuid())
+
+    def _serve_request(self, request):
+        saved_cwd = os.getcwd()
+        saved_env = dict((name, os.environ.get(name)) for name in FORWARDED_ENV)
+        try:
+            os.chdir(request.get('cwd', '/'))
+            for name in FORWARDED_ENV:
+                if name in request.get('env', {}):
+                    os.environ[name] = request['env'][name]
+                else:
+                    os.environ.pop(name, None)
+            result = self.handler(request['argv'])
+        finally:
+            os.chdir(saved_cwd)
+            for name, value in saved_env.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
+        if result is None:
+            return {'fallback': True}
+        rc, stdout, stderr = result
+        return {'rc': rc, 'stdout': stdout, 'stderr': stderr}
+
+    def serve_forever(self):
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o077)
+        try:
+            self.sock.bind(self.socket_path)
+        finally:
+            os.umask(old_umask)
+        self.sock.listen(16)
+
+        try:
+            while True:
+                conn, _ = self.sock.accept()
+                try:
+                    if not self._is_trusted_peer(conn):
+                        continue
+                    request = _recv_message(conn)
+                    try:
+                        reply = self._serve_request(request)
+                    except Exception:
+                        reply = {'fallback': True}
+                    _send_message(conn, reply)
+                except (socket.error, EOFError, ValueError):
+                    pass
+                finally:
+                    conn.close()
+        finally:
+            self.sock.close()
+            os.remove(self.socket_path)
@@ -0,0 +1,93 @@
+"""configdb_diff.py
+
+Write only what changed to CONFIG_DB.
+
+ConfigDBConnector.mod_config() writes every entry it is given and each write
+is a keyspace notification for every daemon subscribed to CONFIG_DB.
+get_config_changes() trims the data down to the entries and fields that
+differ from what is already in the DB, so that writing the result with
+mod_config() leaves the DB in the same state as writing all of the data.
+"""
+
+KEY_SEPARATOR = '|'
+
+# Number of entries written per mod_config() pipeline
+CONFIG_DB_WRITE_CHUNK_SIZE = 1000
+
+
+def _serialize_key(key):
+    if isinstance(key, tuple):
+        return KEY_SEPARATOR.join(key)
+    return str(key)
+
+
+def _raw_field(field, value):
+    """ Return the (field, value) pair stored in redis for a typed field """
+    if isinstance(value, list):
+        return (field + '@', ','.join(value))
+    return (field, str(value))
+
+
+def _get_entry_changes(current_entry, entry):
+    current_fields = dict(_raw_field(field, value) for field, value in current_entry.items())
+    changes = {}
+    for field, value in entry.items():
+        (raw_field, raw_value) = _raw_field(field, value)
+        if current_fields.get(raw_field) != raw_value:
+            changes[field] = value
+    return changes
+
+
+def get_config_changes(current, data):
+    """ Compare data about to be written with mod_config() to the current
+    CONFIG_DB contents.
+
+    Returns (changes, count): the subset of data that mod_config() still has
+    to write, and the number of entries it modifies or deletes.
+    """
+    changes = {}
+    count = 0
+    for table, table_data in data.items():
+        current_table = dict((_serialize_key(key), entry) for key, entry in current.get(table, {}).items())
+        if table_data is None:
+            if current_table:
+                changes[table] = None
+                count += len(current_table)
+            continue
+
+        for key, entry in table_data.items():
+            current_entry = current_table.get(_serialize_key(key))
+            if entry is None:
+                if current_entry is None:
+                    continue
+            elif current_entry is not None:
+                entry = _get_entry_changes(current_entry, entry)
+                if not entry:
+                    continue
+            changes.setdefault(table, {})[key] = entry
+            count += 1
+    return (changes, count)
+
+
+def apply_config_changes(configdb, changes, chunk_size=CONFIG_DB_WRITE_CHUNK_SIZE):
+    """ Write changes with mod_config(), at most chunk_size entries at a time """
+    chunk = {}
+    size = 0
+    for table, table_data in changes.items():
+        if table_data is None:
+            chunk[table] = None
+            size += 1
+        else:
+            for key, entry in table_data.items():
+                chunk.setdefault(table, {})[key] = entry
+                size += 1
+                if size >= chunk_size:
+                    configdb.mod_config(chunk)
+                    chunk = {}
+                    size = 0
+        if size >= chunk_size:
+            configdb.mod_config(chunk)
+            chunk = {}
+            size = 0
+    if chunk:
+        configdb.mod_config(chunk)
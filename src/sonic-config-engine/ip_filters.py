@@ -0,0 +1,159 @@
+"""ip_filters.py
+
+IP address jinja2 filters shared by sonic-cfggen and bgpcfgd.
+
+Templates apply these filters to the same few addresses over and over, so
+parsed addresses are memoized. Address family checks try the standard library
+ipaddress module first, which is much faster than netaddr, and only fall back
+to netaddr for notations ipaddress does not accept. Anything that is printed
+still comes from netaddr so that rendered output does not change.
+"""
+
+import ipaddress
+import sys
+
+from collections import OrderedDict
+
+import netaddr
+
+PY3x = sys.version_info >= (3, 0)
+
+# Number of distinct values remembered by each memoized parser
+CACHE_SIZE = 4096
+
+try:
+    from functools import lru_cache
+except ImportError:
+    lru_cache = None
+
+
+def _memoize(func):
+    """ lru_cache, or a dict that is emptied when full on Python 2 """
+    if lru_cache is not None:
+        return lru_cache(maxsize=CACHE_SIZE)(func)
+
+    cache = {}
+
+    def wrapper(*args):
+        try:
+            return cache[args]
+        except KeyError:
+            pass
+        if len(cache) >= CACHE_SIZE:
+            cache.clear()
+        result = cache[args] = func(*args)
+        return result
+
+    wrapper.cache_clear = cache.clear
+    return wrapper
+
+
+@_memoize
+def _parse_network(value):
+    """ Return the netaddr.IPNetwork for a string, or None if it is not one.
+    The object is shared, it must never be handed out to templates. """
+    try:
+        return netaddr.IPNetwork(value)
+    except Exception:
+        return None
+
+
+@_memoize
+def _ip_version(value):
+    """ Return 4 or 6 for an address or prefix string, or None if it is neither """
+    # Python 3.9+ ipaddress accepts IPv6 scope ids, netaddr does not
+    if PY3x and '%' not in value:
+        try:
+            return ipaddress.ip_interface(value).version
+        except ValueError:
+            pass
+    network = _parse_network(value)
+    return network.version if network is not None else None
+
+
+@_memoize
+def _prefix_attr(attr, value):
+    network = _parse_network(value)
+    if network is None:
+        return None
+    return str(getattr(network, attr))
+
+
+def clear_caches():
+    """ Forget all memoized addresses """
+    for func in [_parse_network, _ip_version, _prefix_attr]:
+        func.cache_clear()
+
+
+def is_ipv4(value):
+    """ Return True if the value is an ipv4 address """
+    if not value:
+        return False
+    if isinstance(value, netaddr.IPNetwork):
+        return value.version == 4
+    return _ip_version(str(value)) == 4
+
+
+def is_ipv6(value):
+    """ Return True if the value is an ipv6 address """
+    if not value:
+        return False
+    if isinstance(value, netaddr.IPNetwork):
+        return value.version == 6
+    return _ip_version(str(value)) == 6
+
+
+def prefix_attr(attr, value):
+    """
+    Extract attribute from IPNetwork object
+    :param attr: attribute to extract
+    :param value: the string representation of ip prefix which will be converted to IPNetwork.
+    :return: the value of the extracted attribute
+    """
+    if not value:
+        return None
+    return _prefix_attr(attr, str(value))
+
+
+def ip_network(value):
+    """ Extract network for network prefix """
+    if isinstance(value, netaddr.IPNetwork):
+        return value.network
+    network = _parse_network(str(value))
+    if network is None:
+        return "Invalid ip address %s" % value
+    return network.network
+
+
+def pfx_filter(value, log_invalid=None):
+    """INTERFACE Table can have keys in one of the two formats:
+       string or tuple - This filter skips the string keys and only
+       take into account the tuple.
+       For eg - VLAN_INTERFACE|Vlan1000 vs VLAN_INTERFACE|Vlan1000|192.168.0.1/21
+       Addresses without prefix length get a host prefix length. Invalid
+       addresses raise ValueError, or are passed to log_invalid(message) and
+       skipped if it is given.
+    """
+    table = OrderedDict()
+
+    if not value:
+        return table
+
+    for key, val in value.items():
+        if not isinstance(key, tuple):
+            continue
+        intf, ip_address = key
+        if '/' not in ip_address:
+            version = _ip_version(str(ip_address))
+            if version == 4:
+                table[(intf, "%s/32" % ip_address)] = val
+            elif version == 6:
+                table[(intf, "%s/128" % ip_address)] = val
+            elif log_invalid is None:
+                raise ValueError("'%s' is invalid ip address" % ip_address)
+            else:
+                log_invalid("'%s' is invalid ip address" % ip_address)
+        else:
+            table[key] = val
+    return table
+
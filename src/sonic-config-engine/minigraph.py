@@ -1,10 +1,13 @@
 from __future__ import print_function
 
+import hashlib
 import ipaddress
 import math
 import os
+import pickle
 import sys
 import json
+import tempfile
 from collections import defaultdict
 
 from lxml import etree as ET
@@ -1150,12 +1153,180 @@ def enable_internal_bgp_session(bgp_sessions, filename, asic_name):
             (local_sub_role == BACKEND_ASIC_SUB_ROLE and peer_sub_role == FRONTEND_ASIC_SUB_ROLE)):
             bgp_sessions[peer_ip].update({'admin_status': 'up'})
 
+###############################################################################
+#
+# Parsed minigraph cache
+#
+###############################################################################
+
+MINIGRAPH_CACHE_DIR = '/var/cache/sonic/minigraph'
+
+# Bump when the layout of a cache entry changes
+MINIGRAPH_CACHE_VERSION = 1
+
+def _update_file_digest(digest, filename):
+    if filename is None or not os.path.isfile(filename):
+        digest.update(b'\0')
+        return
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+
+def _port_config_digest(ports, alias_map, alias_asic_map):
+    data = json.dumps([ports, alias_map, alias_asic_map], sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+class MinigraphCache(object):
+    """ On-disk cache of parse_xml() results.
+
+    There is one entry per (minigraph, platform, port config, hwsku config,
+    asic) combination, replaced whenever the content key changes. The content
+    key covers the input files, the parser sources and the Python version.
+    Port data may come from CONFIG_DB rather than from a file, so an entry is
+    only used if get_port_config() still returns what it returned when the
+    entry was written.
+    """
+
+    def __init__(self, cache_dir, filename, platform=None, port_config_file=None, asic_name=None, hwsku_config_file=None):
+        self.cache_dir = cache_dir
+        self.platform = platform
+        self.port_config_file = port_config_file
+        self.asic_name = asic_name
+        self.hwsku_config_file = hwsku_config_file
+
+        inputs = [os.path.abspath(filename), platform, port_config_file, asic_name, hwsku_config_file]
+        slot = hashlib.sha256(json.dumps(inputs).encode()).hexdigest()
+        self.cache_file = os.path.join(cache_dir, slot + '.pickle')
+
+        digest = hashlib.sha256()
+        digest.update(json.dumps([MINIGRAPH_CACHE_VERSION, sys.version_info[0]] + inputs).encode())
+        for source in [filename, port_config_file, hwsku_config_file, __file__, get_port_config.__code__.co_filename]:
+            _update_file_digest(digest, source)
+        self.key = digest.hexdigest()
+
+    def _is_trusted(self, path):
+        # Entries are unpickled, only use ones nobody else could have written
+        st = os.stat(path)
+        return st.st_uid == os.getuid() and not st.st_mode & 0o022
+
+    def load(self):
+        """ Return the cached parse_xml() results, or None on a miss """
+        try:
+            if not self._is_trusted(self.cache_dir) or not self._is_trusted(self.cache_file):
+                return None
+            with open(self.cache_file, 'rb') as f:
+                entry = pickle.load(f)
+        except Exception:
+            return None
+        if entry.get('key') != self.key:
+            return None
+
+        (ports, alias_map, alias_asic_map) = get_port_config(hwsku=entry['hwsku'], platform=self.platform, port_config_file=self.port_config_file, asic_name=self.asic_name, hwsku_config_file=self.hwsku_config_file)
+        if _port_config_digest(ports, alias_map, alias_asic_map) != entry['port_config']:
+            return None
+        port_alias_map.update(alias_map)
+        port_alias_asic_map.update(alias_asic_map)
+        return entry['results']
+
+    def store(self, hwsku, port_config, results):
+        """ Save parse_xml() results; failures only cost the next parse """
+        entry = {
+            'key': self.key,
+            'hwsku': hwsku,
+            'port_config': port_config,
+            'results': results,
+        }
+        try:
+            if not os.path.isdir(self.cache_dir):
+                os.makedirs(self.cache_dir, 0o700)
+            (fd, tmp_file) = tempfile.mkstemp(dir=self.cache_dir)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(entry, f, pickle.HIGHEST_PROTOCOL)
+                os.rename(tmp_file, self.cache_file)
+            except Exception:
+                os.remove(tmp_file)
+                raise
+        except Exception:
+            pass
+
 ###############################################################################
 #
 # Main functions
 #
 ###############################################################################
-def parse_xml(filename, platform=None, port_config_file=None, asic_name=None, hwsku_config_file=None):
+
+# Top-level minigraph sections handled by parse_xml(). Sections still held
+# back at the end of the file are handled in this order.
+MINIGRAPH_SECTIONS = [
+    "MetadataDeclaration",
+    "DpgDec",
+    "CpgDec",
+    "PngDec",
+    "UngDec",
+    "LinkMetadataDeclaration",
+    "DeviceInfos",
+]
+
+def iter_minigraph_sections(filename, tags):
+    """ Stream the top-level sections of a minigraph xml file.
+
+    Each direct child of the root element whose tag is in tags is yielded
+    as soon as its end tag has been parsed, so the file is read in a single
+    pass and a caller looking for one section can stop early. Every direct
+    child of the root is detached from the tree once parsed and the ones
+    not in tags are dropped, so a section only stays in memory while the
+    caller holds on to it.
+    """
+    tags = set(tags)
+    for _, elem in ET.iterparse(filename, events=('end',)):
+        parent = elem.getparent()
+        if parent is None or parent.getparent() is not None:
+            continue
+        parent.remove(elem)
+        if elem.tag in tags:
+            yield elem
+
+def _iter_sections_in_handler_order(filename, section_tags, required_tags, other_tags, dependencies):
+    """ Stream the top-level elements parse_xml() needs, in an order its handlers can use.
+
+    Elements in required_tags or other_tags are yielded as soon as they are
+    parsed. Sections are held back until every required tag has been seen
+    and the section they depend on, if any, has been yielded. Sections
+    still held back at the end of the file are yielded in section_tags
+    order. Sections with the same tag keep their order in the file.
+    """
+    seen_tags = set()
+    done_tags = set()
+    pending = []
+    for child in iter_minigraph_sections(filename, section_tags + required_tags + other_tags):
+        if child.tag not in section_tags:
+            seen_tags.add(child.tag)
+            yield child
+        else:
+            pending.append(child)
+
+        if not all(tag in seen_tags for tag in required_tags):
+            continue
+        while True:
+            ready = [section for section in pending if dependencies.get(section.tag) in done_tags.union([None])]
+            if not ready:
+                break
+            pending.remove(ready[0])
+            done_tags.add(ready[0].tag)
+            yield ready[0]
+
+    for tag in section_tags:
+        for section in [section for section in pending if section.tag == tag]:
+            yield section
+
+def _load_port_config(hwsku, platform, port_config_file, asic_name, hwsku_config_file):
+    (ports, alias_map, alias_asic_map) = get_port_config(hwsku=hwsku, platform=platform, port_config_file=port_config_file, asic_name=asic_name, hwsku_config_file=hwsku_config_file)
+    port_alias_map.update(alias_map)
+    port_alias_asic_map.update(alias_asic_map)
+    return (ports, alias_map, alias_asic_map)
+
+def parse_xml(filename, platform=None, port_config_file=None, asic_name=None, hwsku_config_file=None, cache_dir=None):
     """ Parse minigraph xml file.
 
     Keyword arguments:
@@ -1164,9 +1335,16 @@ def parse_xml(filename, platform=None, port_config_file=None, asic_name=None, hw
     port_config_file -- port config file name
     asic_name -- asic name; to parse multi-asic device minigraph to 
     generate asic specific configuration.
+    cache_dir -- directory of the parsed minigraph cache; the result is
+    neither looked up nor stored if it is None.
      """
 
-    root = ET.parse(filename).getroot()
+    cache = None
+    if cache_dir is not None:
+        cache = MinigraphCache(cache_dir, filename, platform, port_config_file, asic_name, hwsku_config_file)
+        results = cache.load()
+        if results is not None:
+            return results
 
     u_neighbors = None
     u_devices = None
@@ -1224,22 +1402,35 @@ def parse_xml(filename, platform=None, port_config_file=None, asic_name=None, hw
     hwsku_qn = QName(ns, "HwSku")
     hostname_qn = QName(ns, "Hostname")
     docker_routing_config_mode_qn = QName(ns, "DockerRoutingConfigMode")
-    for child in root:
+
+    # Every section handler needs the hostname and the port config of the
+    # hwsku, but Hostname and HwSku usually come last in the file. Sections
+    # parsed before them are held back, the rest is handled while streaming.
+    section_tags = [str(QName(ns, tag)) for tag in MINIGRAPH_SECTIONS]
+    if asic_name is None:
+        # PngDec needs the ECMP content collected from DpgDec
+        dependencies = {str(QName(ns, "PngDec")): str(QName(ns, "DpgDec"))}
+    else:
+        # CpgDec needs the local devices listed in MetadataDeclaration
+        dependencies = {str(QName(ns, "CpgDec")): str(QName(ns, "MetadataDeclaration"))}
+    port_config = None
+    for child in _iter_sections_in_handler_order(filename, section_tags, [str(hwsku_qn), str(hostname_qn)], [str(docker_routing_config_mode_qn)], dependencies):
         if child.tag == str(hwsku_qn):
             hwsku = child.text
-        if child.tag == str(hostname_qn):
+            continue
+        elif child.tag == str(hostname_qn):
             hostname = child.text
-        if child.tag == str(docker_routing_config_mode_qn):
+            continue
+        elif child.tag == str(docker_routing_config_mode_qn):
             docker_routing_config_mode = child.text
+            continue
 
-    (ports, alias_map, alias_asic_map) = get_port_config(hwsku=hwsku, platform=platform, port_config_file=port_config_file, asic_name=asic_name, hwsku_config_file=hwsku_config_file)
-    port_alias_map.update(alias_map)
-    port_alias_asic_map.update(alias_asic_map)
-
-    # Get the local device node from DeviceMetadata
-    local_devices = parse_asic_meta_get_devices(root)
+        if port_config is None:
+            port_config = _load_port_config(hwsku, platform, port_config_file, asic_name, hwsku_config_file)
+        if child.tag == str(QName(ns, "MetadataDeclaration")):
+            # Get the local device node from DeviceMetadata
+            local_devices = parse_asic_meta_get_devices(child)
 
-    for child in root:
         if asic_name is None:
             if child.tag == str(QName(ns, "DpgDec")):
                 (intfs, lo_intfs, mvrf, mgmt_intf, voq_inband_intfs, vlans, vlan_members, dhcp_relay_table, pcs, pc_members, acls, vni, tunnel_intfs, dpg_ecmp_content, static_routes) = parse_dpg(child, hostname)
@@ -1269,6 +1460,15 @@ def parse_xml(filename, platform=None, port_config_file=None, asic_name=None, hw
                 linkmetas = parse_linkmeta(child, hostname)
             elif child.tag == str(QName(ns, "DeviceInfos")):
                 (port_speeds_default, port_descriptions, sys_ports) = parse_deviceinfo(child, hwsku)
+        # Release the section as soon as its handler is done with it
+        child.clear()
+
+    if port_config is None:
+        port_config = _load_port_config(hwsku, platform, port_config_file, asic_name, hwsku_config_file)
+    (ports, alias_map, alias_asic_map) = port_config
+    if cache is not None:
+        # ports is filled in below, take its digest while it is pristine
+        port_config_digest = _port_config_digest(ports, alias_map, alias_asic_map)
 
     # set the host device type in asic metadata also
     device_type = [devices[key]['type'] for key in devices if key.lower() == hostname.lower()][0]
@@ -1683,6 +1883,9 @@ def parse_xml(filename, platform=None, port_config_file=None, asic_name=None, hw
         }
     }
 
+    if cache is not None:
+        cache.store(hwsku, port_config_digest, results)
+
     return results
 
 def get_tunnel_entries(tunnel_intfs, lo_intfs, hostname):
@@ -1747,33 +1950,32 @@ def parse_device_desc_xml(filename):
 
     return results
 
+def parse_asic_metadata(filename, asic_name):
+    """ Return the (sub_role, switch_id, switch_type, max_cores) of an asic.
+
+    Only the minigraph up to its MetadataDeclaration section is parsed.
+    """
+    if os.path.isfile(filename):
+        for child in iter_minigraph_sections(filename, [str(QName(ns, "MetadataDeclaration"))]):
+            return parse_asic_meta(child, asic_name)
+    return None, None, None, None
+
 def parse_asic_sub_role(filename, asic_name):
-    if not os.path.isfile(filename):
-        return None
-    root = ET.parse(filename).getroot()
-    for child in root:
-        if child.tag == str(QName(ns, "MetadataDeclaration")):
-            sub_role, _, _, _ = parse_asic_meta(child, asic_name)
-            return sub_role
+    sub_role, _, _, _ = parse_asic_metadata(filename, asic_name)
+    return sub_role
 
 def parse_asic_switch_type(filename, asic_name):
-    if os.path.isfile(filename):
-        root = ET.parse(filename).getroot()
-        for child in root:
-            if child.tag == str(QName(ns, "MetadataDeclaration")):
-                _, _, switch_type, _ = parse_asic_meta(child, asic_name)
-                return switch_type
-    return None
-
-def parse_asic_meta_get_devices(root):
+    _, _, switch_type, _ = parse_asic_metadata(filename, asic_name)
+    return switch_type
+
+def parse_asic_meta_get_devices(meta):
     local_devices = []
 
-    for child in root:
-        if child.tag == str(QName(ns, "MetadataDeclaration")):
-            device_metas = child.find(str(QName(ns, "Devices")))
-            for device in device_metas.findall(str(QName(ns1, "DeviceMetadata"))):
-                name = device.find(str(QName(ns1, "Name"))).text.lower()
-                local_devices.append(name)
+    if meta is not None:
+        device_metas = meta.find(str(QName(ns, "Devices")))
+        for device in device_metas.findall(str(QName(ns1, "DeviceMetadata"))):
+            name = device.find(str(QName(ns1, "Name"))).text.lower()
+            local_devices.append(name)
 
     return local_devices
 
@@ -1,29 +1,168 @@
+import hashlib
+import json
+import os
+import tempfile
+
 import jinja2
 
 from base64 import b64encode, b64decode
 
+JINJA2_CACHE_DIR = '/var/cache/sonic/jinja2'
+
 class RedisBytecodeCache(jinja2.BytecodeCache):
-    """ A bytecode cache for jinja2 template that stores bytecode in Redis """
+    """ A bytecode cache for jinja2 template that stores bytecode in Redis
+
+    The client is only created and connected the first time the cache is
+    used, so that runs served from a faster tier never import swsscommon or
+    talk to redis.
+    """
 
     REDIS_HASH = 'JINJA2_CACHE'
 
-    def __init__(self, client):
-        self._client = client
-        try:
-            self._client.connect(self._client.LOGLEVEL_DB, retry_on=False)
-        except Exception:
-            self._client = None
+    def __init__(self, client_factory):
+        """ client_factory returns a SonicV2Connector """
+        self._client_factory = client_factory
+        self._client = None
+        self._connected = False
+
+    def _connect(self):
+        if not self._connected:
+            self._connected = True
+            try:
+                self._client = self._client_factory()
+                self._client.connect(self._client.LOGLEVEL_DB, retry_on=False)
+            except Exception:
+                self._client = None
+        return self._client
 
     def load_bytecode(self, bucket):
-        if self._client is None:
+        if self._connect() is None:
             return
         code = self._client.get(self._client.LOGLEVEL_DB, self.REDIS_HASH, bucket.key)
         if code is not None:
             bucket.bytecode_from_string(b64decode(code.encode()))
 
     def dump_bytecode(self, bucket):
-        if self._client is None:
+        if self._connect() is None:
             return
         self._client.set(self._client.LOGLEVEL_DB, self.REDIS_HASH,
                          bucket.key, b64encode(bucket.bytecode_to_string()).decode())
 
+class FileBytecodeCache(jinja2.BytecodeCache):
+    """ A bytecode cache for jinja2 template that stores bytecode in files
+
+    Each template gets one file holding its raw bytecode, replaced atomically.
+    Bytecode is executed when loaded, so files are only used if nobody but
+    the current user could have written them.
+    """
+
+    def __init__(self, directory=JINJA2_CACHE_DIR):
+        self.directory = directory
+
+    def _get_cache_file(self, bucket):
+        return os.path.join(self.directory, bucket.key + '.cache')
+
+    def _is_trusted(self, path):
+        st = os.stat(path)
+        return st.st_uid == os.getuid() and not st.st_mode & 0o022
+
+    def load_bytecode(self, bucket):
+        cache_file = self._get_cache_file(bucket)
+        try:
+            if not self._is_trusted(self.directory) or not self._is_trusted(cache_file):
+                return
+            with open(cache_file, 'rb') as f:
+                code = f.read()
+        except (IOError, OSError):
+            return
+        bucket.bytecode_from_string(code)
+
+    def dump_bytecode(self, bucket):
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory, 0o700)
+            (fd, tmp_file) = tempfile.mkstemp(dir=self.directory)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(bucket.bytecode_to_string())
+                os.rename(tmp_file, self._get_cache_file(bucket))
+            except Exception:
+                os.remove(tmp_file)
+                raise
+        except (IOError, OSError):
+            pass
+
+    def clear(self):
+        try:
+            cache_files = os.listdir(self.directory)
+        except OSError:
+            return
+        for cache_file in cache_files:
+            if cache_file.endswith('.cache'):
+                try:
+                    os.remove(os.path.join(self.directory, cache_file))
+                except OSError:
+                    pass
+
+class MemoryBytecodeCache(jinja2.BytecodeCache):
+    """ A bytecode cache for jinja2 template that keeps code objects in memory,
+    shared by all the jinja2 environments of a process """
+
+    def __init__(self):
+        self._code = {}
+
+    def load_bytecode(self, bucket):
+        entry = self._code.get(bucket.key)
+        if entry is not None and entry[0] == bucket.checksum:
+            bucket.code = entry[1]
+
+    def dump_bytecode(self, bucket):
+        self._code[bucket.key] = (bucket.checksum, bucket.code)
+
+    def clear(self):
+        self._code.clear()
+
+class TieredBytecodeCache(jinja2.BytecodeCache):
+    """ A bytecode cache for jinja2 template that looks up a list of caches,
+    fastest first
+
+    Entries are keyed by template path only, so a changed template replaces
+    its entry instead of adding one. jinja2 stores the checksum of the source
+    and its bytecode version with the bytecode, and discards it when they
+    don't match. Bytecode found in a slower tier is copied to the faster
+    ones, freshly compiled bytecode is stored in all of them. Hits per tier
+    and misses are counted in `hits` and `misses`.
+    """
+
+    def __init__(self, tiers):
+        """ tiers is a list of (name, cache) """
+        self.tiers = tiers
+        self.hits = dict((name, 0) for name, _ in tiers)
+        self.misses = 0
+
+    def get_cache_key(self, name, filename=None):
+        return hashlib.sha1(json.dumps([name, filename]).encode()).hexdigest()
+
+    def load_bytecode(self, bucket):
+        for index, (name, cache) in enumerate(self.tiers):
+            cache.load_bytecode(bucket)
+            if bucket.code is not None:
+                self.hits[name] += 1
+                for _, faster_cache in self.tiers[:index]:
+                    faster_cache.dump_bytecode(bucket)
+                return
+        self.misses += 1
+
+    def dump_bytecode(self, bucket):
+        for _, cache in self.tiers:
+            cache.dump_bytecode(bucket)
+
+    def clear(self):
+        for _, cache in self.tiers:
+            cache.clear()
+
+    def get_stats(self):
+        """ Return 'tier hits ... misses' counters as a string """
+        counters = ['{} hits {}'.format(name, self.hits[name]) for name, _ in self.tiers]
+        counters.append('misses {}'.format(self.misses))
+        return ', '.join(counters)
@@ -39,7 +39,10 @@ else:
 
 # Common modules for python2 and python3
 py_modules = [
+    'cfggen_server',
     'config_samples',
+    'configdb_diff',
+    'ip_filters',
     'minigraph',
     'openconfig_acl',
     'portconfig',
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+"""ip_filters_benchmark
+
+Measure the render time of a template that leans on the ip_filters filters,
+the way frr and ACL templates do on a 128 port device, with the memoized
+filters and with plain netaddr based ones.
+
+Usage (from src/sonic-config-engine):
+    python -m tests.ip_filters_benchmark [-n ROUNDS] [-p PORTS]
+"""
+
+from __future__ import print_function
+
+import argparse
+import sys
+import timeit
+
+from functools import partial
+
+import jinja2
+import netaddr
+
+import ip_filters
+
+TEMPLATE = """
+{% for (name, prefix) in INTERFACE|pfx_filter %}
+{% if prefix | ipv4 %}
+ip prefix-list PL_{{ name }} permit {{ prefix | ip_network }}/{{ prefix | prefixlen }}
+interface {{ name }} ip {{ prefix | ip }} mask {{ prefix | netmask }}
+{% elif prefix | ipv6 %}
+ipv6 prefix-list PL_{{ name }} permit {{ prefix | ip_network }}/{{ prefix | prefixlen }}
+interface {{ name }} ipv6 {{ prefix | ip }}
+{% endif %}
+{% endfor %}
+{% for (name, prefix) in INTERFACE|pfx_filter %}
+{% for (peer, peer_prefix) in INTERFACE|pfx_filter %}
+{% if prefix | ipv4 and peer_prefix | ipv4 and (prefix | network) == (peer_prefix | network) and name != peer %}
+neighbor {{ peer_prefix | ip }} interface {{ name }}
+{% endif %}
+{% endfor %}
+{% endfor %}
+"""
+
+
+def netaddr_is_version(version, value):
+    try:
+        return netaddr.IPNetwork(str(value)).version == version
+    except Exception:
+        return False
+
+
+def netaddr_prefix_attr(attr, value):
+    try:
+        return str(getattr(netaddr.IPNetwork(str(value)), attr))
+    except Exception:
+        return None
+
+
+def netaddr_pfx_filter(value):
+    table = {}
+    for key, val in value.items():
+        if not isinstance(key, tuple):
+            continue
+        intf, ip_address = key
+        if '/' not in ip_address:
+            if netaddr_is_version(4, ip_address):
+                ip_address += '/32'
+            elif netaddr_is_version(6, ip_address):
+                ip_address += '/128'
+        table[(intf, ip_address)] = val
+    return table
+
+
+def get_env(memoized):
+    env = jinja2.Environment(trim_blocks=True)
+    if memoized:
+        env.filters['ipv4'] = ip_filters.is_ipv4
+        env.filters['ipv6'] = ip_filters.is_ipv6
+        env.filters['pfx_filter'] = ip_filters.pfx_filter
+        env.filters['ip_network'] = ip_filters.ip_network
+        prefix_attr = ip_filters.prefix_attr
+    else:
+        env.filters['ipv4'] = partial(netaddr_is_version, 4)
+        env.filters['ipv6'] = partial(netaddr_is_version, 6)
+        env.filters['pfx_filter'] = netaddr_pfx_filter
+        env.filters['ip_network'] = lambda value: netaddr.IPNetwork(value).network
+        prefix_attr = netaddr_prefix_attr
+    for attr in ['ip', 'network', 'prefixlen', 'netmask']:
+        env.filters[attr] = partial(prefix_attr, attr)
+    return env
+
+
+def get_data(ports):
+    interfaces = {}
+    for index in range(ports):
+        name = 'Ethernet{}'.format(index * 4)
+        interfaces[name] = {}
+        interfaces[(name, '10.0.{}.{}/31'.format(index // 128, index * 2 % 256))] = {}
+        interfaces[(name, 'fc00::{:x}/126'.format(index * 4))] = {}
+    return {'INTERFACE': interfaces}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark template rendering with the ip filters.")
+    parser.add_argument("-n", "--rounds", type=int, default=5, help="number of timed rounds")
+    parser.add_argument("-p", "--ports", type=int, default=128, help="number of ports in the INTERFACE table")
+    args = parser.parse_args()
+
+    data = get_data(args.ports)
+    outputs = {}
+    print('{:<10} {:>12}'.format('filters', 'best (ms)'))
+    for name, memoized in [('netaddr', False), ('memoized', True)]:
+        template = get_env(memoized).from_string(TEMPLATE)
+        ip_filters.clear_caches()
+        best = min(timeit.repeat(lambda: template.render(data), number=1, repeat=args.rounds))
+        outputs[name] = template.render(data)
+        print('{:<10} {:>12.2f}'.format(name, best * 1000))
+
+    if outputs['netaddr'] != outputs['memoized']:
+        print('Rendered outputs differ')
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
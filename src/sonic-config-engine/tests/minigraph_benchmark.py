@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+"""minigraph_benchmark
+
+Measure minigraph.parse_xml() parse time and peak memory over the sample
+graphs shipped in this directory.
+
+Usage (from src/sonic-config-engine):
+    python -m tests.minigraph_benchmark [-n ROUNDS] [graph.xml ...]
+"""
+
+from __future__ import print_function
+
+import argparse
+import glob
+import os
+import sys
+import timeit
+import tracemalloc
+
+import minigraph
+
+TEST_DIR = os.path.dirname(os.path.realpath(__file__))
+
+# Sample graph -> (port config, asic name) needed to parse it
+SAMPLE_GRAPHS = {
+    'simple-sample-graph-case.xml': ('t0-sample-port-config.ini', None),
+    't0-sample-graph.xml': ('t0-sample-port-config.ini', None),
+    'sample-arista-7050-t0-minigraph.xml': ('t0-sample-port-config.ini', None),
+    't1-sample-graph-mlnx.xml': ('mellanox-sample-port-config.ini', None),
+    'sample-voq-graph.xml': ('voq-sample-port-config.ini', None),
+    't2-chassis-fe-graph.xml': ('t2-chassis-fe-port-config.ini', None),
+    'multi_npu_data/sample-minigraph.xml': ('multi_npu_data/sample_port_config-0.ini', 'asic0'),
+}
+
+
+def bench(graph, port_config, asic_name, rounds):
+    def parse():
+        minigraph.port_alias_map.clear()
+        minigraph.port_alias_asic_map.clear()
+        minigraph.parse_xml(graph, port_config_file=port_config, asic_name=asic_name)
+
+    best = min(timeit.repeat(parse, number=1, repeat=rounds))
+
+    tracemalloc.start()
+    parse()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark minigraph parsing over the sample graphs.")
+    parser.add_argument("-n", "--rounds", type=int, default=10, help="number of timed rounds per graph")
+    parser.add_argument("graphs", nargs='*', help="graphs to parse, relative to the tests directory")
+    args = parser.parse_args()
+
+    graphs = args.graphs or sorted(SAMPLE_GRAPHS)
+    print('{:<45} {:>8} {:>12} {:>12}'.format('graph', 'KiB', 'best (ms)', 'peak (KiB)'))
+    for graph in graphs:
+        port_config, asic_name = SAMPLE_GRAPHS.get(graph, ('t0-sample-port-config.ini', None))
+        graph_file = os.path.join(TEST_DIR, graph)
+        best, peak = bench(graph_file, os.path.join(TEST_DIR, port_config), asic_name, args.rounds)
+        print('{:<45} {:>8} {:>12.2f} {:>12}'.format(
+            graph, os.path.getsize(graph_file) // 1024, best * 1000, peak // 1024))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -71,6 +71,12 @@ class TestCfgGen(TestCase):
         output = self.run_script(argument)
         self.assertEqual(output, '')
 
+    def test_diff_requires_write(self):
+        argument = '-d --diff'
+        with self.assertRaises(subprocess.CalledProcessError) as cm:
+            self.run_script(argument, check_stderr=True)
+        self.assertIn('--diff requires -w', cm.exception.output.decode() if utils.PY3x else cm.exception.output)
+
     def test_device_desc(self):
         argument = '-v "DEVICE_METADATA[\'localhost\'][\'hwsku\']" -M "' + self.sample_device_desc + '"'
         output = self.run_script(argument)
@@ -198,6 +204,24 @@ class TestCfgGen(TestCase):
         for key, value in data.items():
             self.assertEqual(output_data[key.replace("key", "jk")], value)
 
+    def test_template_manifest_batch_mode(self):
+        manifest_file = os.path.join(self.test_dir, 'batch-manifest.json')
+        data_sources = ['-y', os.path.join(self.test_dir, 'test.yml'), '-a', '{"key1":"value"}']
+        manifest = [
+            {'data': data_sources, 'template': os.path.join(self.test_dir, 'test.j2'), 'destination': self.output_file},
+            {'data': data_sources, 'template': os.path.join(self.test_dir, 'test2.j2'), 'destination': self.output2_file},
+        ]
+        with open(manifest_file, 'w') as f:
+            json.dump(manifest, f)
+        try:
+            self.run_script('--batch ' + manifest_file)
+        finally:
+            os.remove(manifest_file)
+        with open(self.output_file) as tf:
+            self.assertEqual(tf.read().strip(), 'value1\nvalue2')
+        with open(self.output2_file) as tf:
+            self.assertEqual(tf.read().strip(), 'value')
+
     # FIXME: This test depends heavily on the ordering of the interfaces and
     # it is not at all intuitive what that ordering should be. Could make it
     # more robust by adding better parsing logic.
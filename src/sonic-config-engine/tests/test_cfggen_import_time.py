@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+
+import tests.common_utils as utils
+
+from unittest import TestCase, skipIf
+
+# Modules that only some modes of sonic-cfggen need and that must not be
+# imported when just reading the DB
+DEFERRED_MODULES = [
+    'config_samples',
+    'configdb_diff',
+    'ip_filters',
+    'lxml',
+    'minigraph',
+    'multiprocessing',
+    'netaddr',
+    'redis_bcc',
+    'sonic_yang_cfg_generator',
+]
+
+
+@skipIf(sys.version_info < (3, 7), "-X importtime requires Python 3.7")
+class TestCfgGenImportTime(TestCase):
+
+    def setUp(self):
+        self.test_dir = os.path.dirname(os.path.realpath(__file__))
+        self.script_file = os.path.join(self.test_dir, '..', 'sonic-cfggen')
+        # To ensure that mock config_db data is used for unit-test cases
+        os.environ["CFGGEN_UNIT_TESTING"] = "2"
+
+    def tearDown(self):
+        os.environ["CFGGEN_UNIT_TESTING"] = ""
+
+    def get_imported_modules(self, argument):
+        """ Run sonic-cfggen under -X importtime, return the set of imported modules
+
+        Import times vary too much between build hosts for a budget, so the
+        test checks that the expensive modules aren't imported at all.
+        """
+        process = subprocess.Popen([utils.PYTHON_INTERPRETTER, '-X', 'importtime', self.script_file] + argument,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        _, stderr = process.communicate()
+        self.assertEqual(process.returncode, 0, stderr)
+
+        modules = set()
+        for line in stderr.decode().splitlines():
+            if not line.startswith('import time:'):
+                continue
+            fields = line[len('import time:'):].split('|')
+            if len(fields) != 3 or not fields[1].strip().isdigit():
+                continue
+            modules.add(fields[2].strip())
+        return modules
+
+    def assert_deferred(self, modules):
+        for module in modules:
+            self.assertNotIn(module.split('.')[0], DEFERRED_MODULES, "{} was imported".format(module))
+
+    def test_from_db_var(self):
+        modules = self.get_imported_modules(['-d', '-v', 'PORT.Ethernet0.alias'])
+        self.assertIn('jinja2', modules)
+        self.assert_deferred(modules)
+
+    def test_from_db_print_data(self):
+        modules = self.get_imported_modules(['-d', '--print-data'])
+        self.assertNotIn('jinja2', modules)
+        self.assert_deferred(modules)
@@ -0,0 +1,246 @@
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import cfggen_server
+
+from importlib.machinery import SourceFileLoader
+from unittest import TestCase, mock
+
+
+class FakePubSub(object):
+    def __init__(self):
+        self.messages = []
+        self.subscribed = False
+        self.channel = None
+
+    def psubscribe(self, pattern):
+        # Subscribing takes a round-trip to redis
+        time.sleep(0.05)
+        self.subscribed = True
+
+    def subscribe(self, channel):
+        self.channel = channel
+
+    def listen_message(self):
+        while True:
+            if self.messages:
+                return self.messages.pop(0)
+            time.sleep(0.01)
+
+
+class FakeConfigDB(object):
+    TABLE_NAME_SEPARATOR = '|'
+    db_name = 'CONFIG_DB'
+
+    def __init__(self, db):
+        self.db = db
+        self.pubsubs = []
+        self.full_reads = 0
+        # Called in the middle of get_config(), after the DB was read
+        self.on_read = None
+
+    def get_dbid(self, db_name):
+        return 4
+
+    def get_redis_client(self, db_name):
+        return self
+
+    def pubsub(self):
+        pubsub = FakePubSub()
+        self.pubsubs.append(pubsub)
+        return pubsub
+
+    def get_config(self):
+        self.full_reads += 1
+        config = dict((table, dict(entries)) for table, entries in self.db.items())
+        if self.on_read is not None:
+            self.on_read()
+        return config
+
+    def get_entry(self, table, key):
+        return dict(self.db.get(table, {}).get(self.deserialize_key(key), {}))
+
+    @staticmethod
+    def deserialize_key(key):
+        return tuple(key.split('|')) if '|' in key else key
+
+    def publish(self, channel, message):
+        for pubsub in self.pubsubs:
+            if pubsub.channel == channel:
+                pubsub.messages.append({'type': 'message', 'channel': channel, 'data': message})
+
+    def notify(self, key):
+        # Like redis, only deliver to the clients subscribed at the time of the write
+        for pubsub in self.pubsubs:
+            if pubsub.subscribed:
+                pubsub.messages.append({'type': 'pmessage', 'channel': '__keyspace@4__:' + key, 'data': 'hset'})
+
+
+class TestConfigDBCache(TestCase):
+
+    def wait_for_notifications(self, configdb):
+        while any(pubsub.messages for pubsub in configdb.pubsubs):
+            time.sleep(0.01)
+        time.sleep(0.05)
+
+    def test_incremental_refresh(self):
+        configdb = FakeConfigDB({'PORT': {'Ethernet0': {'mtu': '9100'}}})
+        cache = cfggen_server.ConfigDBCache(lambda: configdb)
+        self.assertEqual(cache.get_config(), {'PORT': {'Ethernet0': {'mtu': '9100'}}})
+
+        configdb.db['PORT']['Ethernet0'] = {'mtu': '1500'}
+        configdb.db['VLAN_MEMBER'] = {('Vlan1000', 'Ethernet0'): {'tagging_mode': 'untagged'}}
+        configdb.notify('PORT|Ethernet0')
+        configdb.notify('VLAN_MEMBER|Vlan1000|Ethernet0')
+        self.wait_for_notifications(configdb)
+        self.assertEqual(cache.get_config(), {
+            'PORT': {'Ethernet0': {'mtu': '1500'}},
+            'VLAN_MEMBER': {('Vlan1000', 'Ethernet0'): {'tagging_mode': 'untagged'}},
+        })
+
+        del configdb.db['VLAN_MEMBER']
+        configdb.notify('VLAN_MEMBER|Vlan1000|Ethernet0')
+        self.wait_for_notifications(configdb)
+        self.assertEqual(cache.get_config(), {'PORT': {'Ethernet0': {'mtu': '1500'}}})
+
+        # Only the first request read the whole DB
+        self.assertEqual(configdb.full_reads, 1)
+
+    def test_read_after_write(self):
+        configdb = FakeConfigDB({'PORT': {'Ethernet0': {'mtu': '9100'}}})
+        cache = cfggen_server.ConfigDBCache(lambda: configdb)
+        cache.get_config()
+        for mtu in ['1500', '4000', '9000']:
+            # The listener hasn't handled the notification yet when the next request comes
+            configdb.db['PORT']['Ethernet0'] = {'mtu': mtu}
+            configdb.notify('PORT|Ethernet0')
+            self.assertEqual(cache.get_config(), {'PORT': {'Ethernet0': {'mtu': mtu}}})
+        self.assertEqual(configdb.full_reads, 1)
+
+    def test_write_during_start(self):
+        configdb = FakeConfigDB({'PORT': {'Ethernet0': {'mtu': '9100'}}})
+
+        def write():
+            configdb.on_read = None
+            configdb.db['PORT']['Ethernet0'] = {'mtu': '1500'}
+            configdb.notify('PORT|Ethernet0')
+
+        configdb.on_read = write
+        cache = cfggen_server.ConfigDBCache(lambda: configdb)
+        # The write raced with the whole DB read, so the first request may miss it
+        cache.get_config()
+        self.wait_for_notifications(configdb)
+        self.assertEqual(cache.get_config(), {'PORT': {'Ethernet0': {'mtu': '1500'}}})
+        self.assertEqual(configdb.full_reads, 1)
+
+    def test_private_copy(self):
+        configdb = FakeConfigDB({'PORT': {'Ethernet0': {'mtu': '9100'}}})
+        cache = cfggen_server.ConfigDBCache(lambda: configdb)
+        cache.get_config()['PORT']['Ethernet0']['mtu'] = '1500'
+        self.assertEqual(cache.get_config(), {'PORT': {'Ethernet0': {'mtu': '9100'}}})
+
+
+class TestRenderServer(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.tmp_dir, 'cfggen.sock')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def start_server(self, handler):
+        server = cfggen_server.RenderServer(handler, self.socket_path)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        while not os.path.exists(self.socket_path):
+            time.sleep(0.01)
+
+    def test_no_server(self):
+        self.assertIsNone(cfggen_server.render_on_server(['-d', '-v', 'PORT'], self.socket_path))
+
+    def test_request(self):
+        requests = []
+
+        def handler(argv):
+            requests.append((argv, os.getcwd()))
+            if '-w' in argv:
+                return None
+            return 3, '', ''
+
+        self.start_server(handler)
+        cwd = os.getcwd()
+        self.assertEqual(cfggen_server.render_on_server(['-d', '-v', 'PORT'], self.socket_path), 3)
+        self.assertIsNone(cfggen_server.render_on_server(['-d', '-w'], self.socket_path))
+        self.assertEqual(requests, [(['-d', '-v', 'PORT'], cwd), (['-d', '-w'], cwd)])
+
+
+class TestCfgGenServe(TestCase):
+    """ The request handler of sonic-cfggen --serve """
+
+    def setUp(self):
+        self.test_dir = os.path.dirname(os.path.realpath(__file__))
+        loader = SourceFileLoader('sonic_cfggen', os.path.join(self.test_dir, '..', 'sonic-cfggen'))
+        self.cfggen = importlib.util.module_from_spec(importlib.util.spec_from_loader(loader.name, loader))
+        loader.exec_module(self.cfggen)
+        self.caches = []
+
+    def get_handler(self, config):
+        handlers = []
+        caches = self.caches
+
+        class FakeConfigDBCache(object):
+            def __init__(self, connector_factory):
+                caches.append(self)
+
+            def get_config(self):
+                return dict((table, dict(entries)) for table, entries in config.items())
+
+        class FakeRenderServer(object):
+            def __init__(self, handler, socket_path):
+                handlers.append(handler)
+
+            def serve_forever(self):
+                pass
+
+        # The handler looks ConfigDBCache up when it serves a request
+        patcher = mock.patch.object(self.cfggen, 'ConfigDBCache', FakeConfigDBCache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        with mock.patch.object(self.cfggen, 'RenderServer', FakeRenderServer):
+            self.cfggen._serve('unused.sock')
+        return handlers[0]
+
+    def test_render(self):
+        handle = self.get_handler({'PORT': {'Ethernet0': {'mtu': '9100'}}})
+        saved_streams = (sys.stdout, sys.stderr)
+        self.assertEqual(handle(['-d', '-v', "PORT['Ethernet0']['mtu']"]), (0, '9100\n', ''))
+        self.assertEqual(handle(['-d', '-v', "PORT['Ethernet0']"]), (0, "{'mtu': '9100'}\n", ''))
+        self.assertEqual((sys.stdout, sys.stderr), saved_streams)
+        # The DB contents of a namespace are cached across requests
+        self.assertEqual(len(self.caches), 1)
+        handle(['-d', '-n', 'asic0', '-v', 'PORT'])
+        self.assertEqual(len(self.caches), 2)
+
+    def test_error(self):
+        handle = self.get_handler({})
+        rc, stdout, stderr = handle(['-d', '-t', os.path.join(self.test_dir, 'no-such-template.j2')])
+        self.assertEqual(rc, 1)
+        self.assertEqual(stdout, '')
+        self.assertIn('TemplateNotFound', stderr)
+
+    def test_fallback(self):
+        handle = self.get_handler({})
+        # Requests not reading from the DB, writing to it or not understood are run by the client
+        self.assertIsNone(handle(['-v', 'PORT']))
+        self.assertIsNone(handle(['-d', '-w']))
+        self.assertIsNone(handle(['-d', '--diff']))
+        self.assertIsNone(handle(['-d', '--no-such-option']))
+        self.assertIsNone(handle(['-d', '--serve']))
+        self.assertEqual(self.caches, [])
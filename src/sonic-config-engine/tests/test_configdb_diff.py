@@ -0,0 +1,76 @@
+from configdb_diff import apply_config_changes, get_config_changes
+from unittest import TestCase
+
+
+class FakeConfigDB(object):
+    def __init__(self):
+        self.writes = []
+
+    def mod_config(self, data):
+        self.writes.append(data)
+
+
+class TestConfigDBDiff(TestCase):
+
+    def setUp(self):
+        self.current = {
+            'DEVICE_METADATA': {'localhost': {'hostname': 'switch1', 'hwsku': 'Force10-S6000'}},
+            'PORT': {
+                'Ethernet0': {'mtu': '9100', 'lanes': '29,30,31,32'},
+                'Ethernet4': {'mtu': '9100', 'lanes': '25,26,27,28'},
+            },
+            'VLAN': {'Vlan1000': {'vlanid': '1000', 'members': ['Ethernet0', 'Ethernet4']}},
+            'VLAN_MEMBER': {('Vlan1000', 'Ethernet0'): {'tagging_mode': 'untagged'}},
+            'LOOPBACK_INTERFACE': {'Loopback0': {}},
+            'MIRROR_SESSION': {'everflow': {'src_ip': '1.1.1.1'}},
+        }
+
+    def test_no_change(self):
+        data = {
+            'DEVICE_METADATA': {'localhost': {'hostname': 'switch1'}},
+            'PORT': {'Ethernet0': {'mtu': 9100}},
+            'VLAN': {'Vlan1000': {'members': ['Ethernet0', 'Ethernet4']}},
+            'VLAN_MEMBER': {'Vlan1000|Ethernet0': {'tagging_mode': 'untagged'}},
+            'LOOPBACK_INTERFACE': {'Loopback0': {}},
+            'ACL_TABLE': None,
+        }
+        self.assertEqual(get_config_changes(self.current, data), ({}, 0))
+
+    def test_changes(self):
+        data = {
+            'DEVICE_METADATA': {'localhost': {'hostname': 'switch2', 'hwsku': 'Force10-S6000'}},
+            'PORT': {'Ethernet0': {'mtu': '9100'}, 'Ethernet4': None, 'Ethernet8': None},
+            'VLAN': {'Vlan1000': {'members': ['Ethernet0']}},
+            'VLAN_MEMBER': {('Vlan1000', 'Ethernet0'): {'tagging_mode': 'untagged'},
+                            ('Vlan1000', 'Ethernet4'): {'tagging_mode': 'tagged'}},
+            'LOOPBACK_INTERFACE': {'Loopback0': {}, 'Loopback0|10.1.0.32/32': {}},
+            'MIRROR_SESSION': None,
+        }
+        changes, count = get_config_changes(self.current, data)
+        self.assertEqual(changes, {
+            'DEVICE_METADATA': {'localhost': {'hostname': 'switch2'}},
+            'PORT': {'Ethernet4': None},
+            'VLAN': {'Vlan1000': {'members': ['Ethernet0']}},
+            'VLAN_MEMBER': {('Vlan1000', 'Ethernet4'): {'tagging_mode': 'tagged'}},
+            'LOOPBACK_INTERFACE': {'Loopback0|10.1.0.32/32': {}},
+            'MIRROR_SESSION': None,
+        })
+        self.assertEqual(count, 6)
+
+    def test_apply_in_chunks(self):
+        changes = {
+            'PORT': dict(('Ethernet{}'.format(i * 4), {'mtu': '1500'}) for i in range(5)),
+            'MIRROR_SESSION': None,
+        }
+        configdb = FakeConfigDB()
+        apply_config_changes(configdb, changes, chunk_size=2)
+        self.assertEqual([sum(len(table_data or [None]) for table_data in write.values()) for write in configdb.writes], [2, 2, 2])
+
+        written = {}
+        for write in configdb.writes:
+            for table, table_data in write.items():
+                if table_data is None:
+                    written[table] = None
+                else:
+                    written.setdefault(table, {}).update(table_data)
+        self.assertEqual(written, changes)
@@ -0,0 +1,78 @@
+import netaddr
+
+import ip_filters
+
+from collections import OrderedDict
+from unittest import TestCase
+
+VALUES = [
+    '10.0.0.1', '10.0.0.1/31', '10.0.0.0/8', '10.1.2.3/255.255.0.0', '192.168.0.1/32',
+    'fc00::1', 'fc00::2/64', '::1/128', '::ffff:10.0.0.1', 'fe80::1%Ethernet0',
+    '010.000.000.001', '10.0.0.1/33', 'fc00::/129', 'Vlan1000', '', None, 0, 'a.b.c.d',
+    netaddr.IPNetwork('10.0.0.1/24'), netaddr.IPNetwork('fc00::1/64'),
+]
+
+
+def netaddr_version(value):
+    if isinstance(value, netaddr.IPNetwork):
+        return value.version
+    try:
+        return netaddr.IPNetwork(str(value)).version
+    except Exception:
+        return None
+
+
+class TestIpFilters(TestCase):
+
+    def setUp(self):
+        ip_filters.clear_caches()
+
+    def test_address_family(self):
+        for _ in range(2):
+            for value in VALUES:
+                expected = netaddr_version(value) if value else None
+                self.assertEqual(ip_filters.is_ipv4(value), expected == 4, value)
+                self.assertEqual(ip_filters.is_ipv6(value), expected == 6, value)
+
+    def test_prefix_attr(self):
+        for attr in ['ip', 'network', 'prefixlen', 'netmask', 'broadcast']:
+            for value in VALUES:
+                try:
+                    expected = str(getattr(netaddr.IPNetwork(str(value)), attr)) if value else None
+                except Exception:
+                    expected = None
+                self.assertEqual(ip_filters.prefix_attr(attr, value), expected, (attr, value))
+
+    def test_ip_network(self):
+        self.assertEqual(str(ip_filters.ip_network('10.1.0.32/24')), '10.1.0.0')
+        self.assertEqual(str(ip_filters.ip_network('fc00:1::32/64')), 'fc00:1::')
+        self.assertEqual(ip_filters.ip_network('Vlan1000'), 'Invalid ip address Vlan1000')
+        # Callers get their own object
+        ip_filters.ip_network('10.1.0.32/24').value = 0
+        self.assertEqual(str(ip_filters.ip_network('10.1.0.32/24')), '10.1.0.0')
+
+    def test_pfx_filter(self):
+        table = {
+            'Vlan1': {},
+            ('Vlan1', '1.1.1.1/32'): {},
+            ('Vlan2', '2.2.2.2'): {},
+            ('Vlan3', 'fc00::1'): {'scope': 'global'},
+            ('Vlan4', 'fc00::2/64'): {},
+        }
+        self.assertEqual(ip_filters.pfx_filter(table), OrderedDict([
+            (('Vlan1', '1.1.1.1/32'), {}),
+            (('Vlan2', '2.2.2.2/32'), {}),
+            (('Vlan3', 'fc00::1/128'), {'scope': 'global'}),
+            (('Vlan4', 'fc00::2/64'), {}),
+        ]))
+        self.assertEqual(ip_filters.pfx_filter(None), OrderedDict())
+
+    def test_pfx_filter_invalid(self):
+        table = {('Vlan1', '1.1.1.1'): {}, ('Vlan2', 'invalid'): {}}
+        with self.assertRaises(ValueError):
+            ip_filters.pfx_filter(table)
+
+        messages = []
+        self.assertEqual(ip_filters.pfx_filter(table, log_invalid=messages.append),
+                         OrderedDict([(('Vlan1', '1.1.1.1/32'), {})]))
+        self.assertEqual(messages, ["'invalid' is invalid ip address"])
@@ -1,12 +1,20 @@
+import copy
 import json
 import os
+import shutil
 import subprocess
+import tempfile
 
 import tests.common_utils as utils
 import minigraph
 
 from unittest import TestCase
 
+if utils.PY3x:
+    from unittest import mock
+else:
+    import mock
+
 TOR_ROUTER = 'ToRRouter'
 BACKEND_TOR_ROUTER = 'BackEndToRRouter'
 
@@ -393,5 +401,74 @@ class TestCfgGenCaseInsensitive(TestCase):
             expected_ports.sort()
         )
 
+    def test_minigraph_section_order(self):
+        # Move Hostname/HwSku in front of the other sections and PngDec in
+        # front of DpgDec; the streaming parser must not depend on the order
+        expected = minigraph.parse_xml(self.sample_graph, port_config_file=self.port_config)
+
+        tree = minigraph.ET.parse(self.sample_graph)
+        root = tree.getroot()
+        for tag in ["DpgDec", "PngDec", "HwSku", "Hostname"]:
+            child = root.find(str(minigraph.QName(minigraph.ns, tag)))
+            root.remove(child)
+            root.insert(0, child)
+        reordered_graph = os.path.join(self.test_dir, 'reordered-sample-graph.xml')
+        tree.write(reordered_graph)
+        try:
+            result = minigraph.parse_xml(reordered_graph, port_config_file=self.port_config)
+        finally:
+            os.remove(reordered_graph)
+
+        self.assertEqual(result, expected)
+
+    def test_minigraph_sections_detached(self):
+        tags = [str(minigraph.QName(minigraph.ns, tag)) for tag in minigraph.MINIGRAPH_SECTIONS]
+        sections = list(minigraph.iter_minigraph_sections(self.sample_graph, tags))
+        self.assertEqual(len(sections), len(set(section.tag for section in sections)))
+        for section in sections:
+            self.assertIn(section.tag, tags)
+            self.assertIsNone(section.getparent())
+
+    def test_minigraph_repeated_section(self):
+        # Like a parse of the whole tree, the last of repeated sections wins
+        expected = minigraph.parse_xml(self.sample_graph, port_config_file=self.port_config)
+
+        tree = minigraph.ET.parse(self.sample_graph)
+        root = tree.getroot()
+        metadata = root.find(str(minigraph.QName(minigraph.ns, "MetadataDeclaration")))
+        stale_metadata = copy.deepcopy(metadata)
+        for value in stale_metadata.iter(str(minigraph.QName(minigraph.ns1, "Value"))):
+            value.text = '9'
+        root.insert(0, stale_metadata)
+        repeated_graph = os.path.join(self.test_dir, 'repeated-sample-graph.xml')
+        tree.write(repeated_graph)
+        try:
+            result = minigraph.parse_xml(repeated_graph, port_config_file=self.port_config)
+        finally:
+            os.remove(repeated_graph)
 
-    
+        self.assertEqual(result, expected)
+
+    def test_minigraph_cache(self):
+        cache_dir = tempfile.mkdtemp()
+        graph = os.path.join(cache_dir, 'minigraph.xml')
+        shutil.copy(self.sample_graph, graph)
+        try:
+            expected = minigraph.parse_xml(graph, port_config_file=self.port_config)
+            self.assertEqual(minigraph.parse_xml(graph, port_config_file=self.port_config, cache_dir=cache_dir), expected)
+            self.assertEqual(len([f for f in os.listdir(cache_dir) if f.endswith('.pickle')]), 1)
+
+            # A cache hit must not parse the minigraph again
+            with mock.patch('minigraph.iter_minigraph_sections', side_effect=AssertionError):
+                self.assertEqual(minigraph.parse_xml(graph, port_config_file=self.port_config, cache_dir=cache_dir), expected)
+
+            # Changing the minigraph invalidates the entry
+            with open(graph) as f:
+                content = f.read()
+            with open(graph, 'w') as f:
+                f.write(content.replace('<HwSku>Force10-S6000</HwSku>', '<HwSku>Force10-S6000-Q24S32</HwSku>'))
+            result = minigraph.parse_xml(graph, port_config_file=self.port_config, cache_dir=cache_dir)
+            self.assertEqual(result['DEVICE_METADATA']['localhost']['hwsku'], 'Force10-S6000-Q24S32')
+            self.assertEqual(len([f for f in os.listdir(cache_dir) if f.endswith('.pickle')]), 1)
+        finally:
+            shutil.rmtree(cache_dir)
@@ -7,6 +7,7 @@ import unittest
 import yaml
 
 import tests.common_utils as utils
+import minigraph
 
 from unittest import TestCase
 
@@ -424,5 +425,11 @@ class TestMultiNpuCfgGen(TestCase):
     def test_bgpd_frr_backendasic(self):
         self.assertTrue(*self.run_frr_asic_case('bgpd/bgpd.conf.j2', 'bgpd_frr_backend_asic.conf', "asic3", self.port_config[3]))
 
+    def test_asic_metadata(self):
+        self.assertEqual(minigraph.parse_asic_sub_role(self.sample_graph, 'asic0'), 'FrontEnd')
+        self.assertEqual(minigraph.parse_asic_sub_role(self.sample_graph, 'asic3'), 'BackEnd')
+        self.assertEqual(minigraph.parse_asic_switch_type(self.sample_graph, 'asic3'), None)
+        self.assertEqual(minigraph.parse_asic_metadata(os.path.join(self.test_data_dir, 'nonexistent.xml'), 'asic0'), (None, None, None, None))
+
     def tearDown(self):
         os.environ["CFGGEN_UNIT_TESTING"] = ""
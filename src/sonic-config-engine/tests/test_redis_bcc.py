@@ -0,0 +1,108 @@
+import os
+import shutil
+import tempfile
+
+import jinja2
+
+from redis_bcc import FileBytecodeCache, MemoryBytecodeCache, RedisBytecodeCache, TieredBytecodeCache
+from unittest import TestCase
+
+
+class FakeRedisClient(object):
+    LOGLEVEL_DB = 'LOGLEVEL_DB'
+
+    def __init__(self, up=True):
+        self.up = up
+        self.data = {}
+
+    def connect(self, db_name, retry_on=True):
+        if not self.up:
+            raise RuntimeError('redis is down')
+
+    def get(self, db_name, _hash, key):
+        return self.data.get(key)
+
+    def set(self, db_name, _hash, key, value):
+        self.data[key] = value
+
+
+class TestTieredBytecodeCache(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.template_dir = os.path.join(self.tmp_dir, 'templates')
+        self.cache_dir = os.path.join(self.tmp_dir, 'cache')
+        os.mkdir(self.template_dir)
+        self.template_file = os.path.join(self.template_dir, 'test.j2')
+        with open(self.template_file, 'w') as f:
+            f.write('{{ greeting }} {{ name }}')
+        self.clients_created = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def get_cache(self, redis_client):
+        return TieredBytecodeCache([
+            ('memory', MemoryBytecodeCache()),
+            ('filesystem', FileBytecodeCache(self.cache_dir)),
+            ('redis', RedisBytecodeCache(lambda: self.create_client(redis_client))),
+        ])
+
+    def create_client(self, redis_client):
+        self.clients_created += 1
+        return redis_client
+
+    def render(self, cache):
+        env = jinja2.Environment(loader=jinja2.FileSystemLoader(self.template_dir), bytecode_cache=cache)
+        return env.get_template('test.j2').render(greeting='hello', name='world')
+
+    def test_tiers(self):
+        redis_client = FakeRedisClient()
+        cache = self.get_cache(redis_client)
+        self.assertEqual(self.render(cache), 'hello world')
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(len(redis_client.data), 1)
+
+        # A new environment in the same process hits the memory tier
+        self.assertEqual(self.render(cache), 'hello world')
+        self.assertEqual(cache.hits['memory'], 1)
+
+        # A new process hits the filesystem without creating a redis client
+        self.clients_created = 0
+        cache = self.get_cache(redis_client)
+        self.assertEqual(self.render(cache), 'hello world')
+        self.assertEqual(cache.hits, {'memory': 0, 'filesystem': 1, 'redis': 0})
+        self.assertEqual(self.clients_created, 0)
+
+        # Without the filesystem entries, redis is used and the filesystem refilled
+        shutil.rmtree(self.cache_dir)
+        cache = self.get_cache(redis_client)
+        self.assertEqual(self.render(cache), 'hello world')
+        self.assertEqual(cache.hits['redis'], 1)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+    def test_template_change(self):
+        cache = self.get_cache(FakeRedisClient(up=False))
+        self.assertEqual(self.render(cache), 'hello world')
+
+        with open(self.template_file, 'w') as f:
+            f.write('{{ name }}')
+        os.utime(self.template_file, (0, 0))
+        cache = self.get_cache(FakeRedisClient(up=False))
+        self.assertEqual(self.render(cache), 'world')
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(cache.get_stats(), 'memory hits 0, filesystem hits 0, redis hits 0, misses 1')
+        # The entry of the old template is replaced
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+        cache = self.get_cache(FakeRedisClient(up=False))
+        self.assertEqual(self.render(cache), 'world')
+        self.assertEqual(cache.hits['filesystem'], 1)
+
+    def test_untrusted_cache_dir(self):
+        cache = self.get_cache(FakeRedisClient(up=False))
+        self.render(cache)
+        os.chmod(self.cache_dir, 0o777)
+        cache = self.get_cache(FakeRedisClient(up=False))
+        self.render(cache)
+        self.assertEqual(cache.hits['filesystem'], 0)
+        self.assertEqual(cache.misses, 1)
@@ -15,6 +15,7 @@ import logging
 import netaddr
 import io
 import struct
+from collections import OrderedDict
 
 class CachedDataWithOp:
     OP_NONE = 0
@@ -62,6 +63,31 @@ def g_run_command(table, command, use_bgpd_client, daemons, ignore_fail = False)
             return False
     return True
 
+def g_run_command_lists(table, prefix_list, cmd_lists, daemons):
+    """Run lists of vtysh config commands, which share the context commands in prefix_list.
+    With the bgpd client, the commands are sent to FRR as one block behind the context commands.
+    The commands of a list stop at its first failure.
+    Return a list with True for each command list that was applied successfully.
+    """
+    if bgpd_client is not None:
+        return bgpd_client.run_vtysh_command_block(table, prefix_list, cmd_lists, daemons)
+    cmd_prefix = 'vtysh '
+    for pfx in prefix_list:
+        cmd_prefix += "-c '%s' " % pfx
+    succ_list = []
+    for cmd_list in cmd_lists:
+        succ = True
+        for cmd in cmd_list:
+            ignore_fail = False
+            if type(cmd) is tuple:
+                cmd, ignore_fail = cmd
+            if not g_run_command(table, cmd_prefix + "-c '%s'" % cmd, True, daemons, ignore_fail):
+                syslog.syslog(syslog.LOG_ERR, 'failed running FRR command: %s' % cmd)
+                succ = False
+                break
+        succ_list.append(succ)
+    return succ_list
+
 def extract_cmd_daemons(cmd_str):
     # daemon list could be given within brackets at head of input lines
     dm_mark = re.match(r'\[(?P<daemons>.+)\]', cmd_str)
@@ -170,10 +196,61 @@ class BgpdClientMgr(threading.Thread):
         msg_buf.close()
         return (ret_code, reply_msg)
     @staticmethod
+    def __get_replies(sock, count):
+        replies = []
+        msg_buf = b''
+        while len(replies) < count:
+            pos = msg_buf.find(b'\0\0\0')
+            if pos >= 0 and len(msg_buf) > pos + 3:
+                replies.append((msg_buf[pos + 3], msg_buf[:pos].decode(errors = 'replace')))
+                msg_buf = msg_buf[pos + 4:]
+                continue
+            try:
+                rd_msg = sock.recv(16384)
+            except socket.timeout:
+                syslog.syslog(syslog.LOG_ERR, 'socket reading timeout')
+                break
+            if len(rd_msg) == 0:
+                syslog.syslog(syslog.LOG_ERR, 'connection closed by frr daemon')
+                break
+            msg_buf += rd_msg
+        replies += [(None, None)] * (count - len(replies))
+        return replies
+    @staticmethod
     def __send_data(sock, data):
         if isinstance(data, str):
             data = bytes(data, 'utf-8')
         sock.sendall(data)
+    def __connect_daemon(self, daemon):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect('/run/frr/%s.vty' % daemon)
+            sock.settimeout(120)
+            self.__send_data(sock, 'enable\0')
+        except socket.error as msg:
+            syslog.syslog(syslog.LOG_ERR, 'failed to connect to frr daemon %s: %s' % (daemon, msg))
+            sock.close()
+            return None
+        ret_code, _ = self.__get_reply(sock)
+        if ret_code != 0:
+            syslog.syslog(syslog.LOG_ERR, 'enable command failed for frr daemon %s' % daemon)
+            sock.close()
+            return None
+        return sock
+    def __reconnect_daemon(self, daemon):
+        # after a reply timeout or a partial read, the replies left on the socket would be taken
+        # for the replies of the next commands, so start a new vty session
+        syslog.syslog(syslog.LOG_INFO, 'reconnect to frr daemon %s' % daemon)
+        sock = self.client_socks.pop(daemon, None)
+        if sock is not None:
+            sock.close()
+        sock = self.__connect_daemon(daemon)
+        if sock is not None:
+            self.client_socks[daemon] = sock
+    def __get_client_sock(self, daemon):
+        if daemon not in self.client_socks:
+            self.__reconnect_daemon(daemon)
+        return self.client_socks.get(daemon, None)
     def __create_frr_client(self):
         self.client_socks = {}
         for daemon in self.ALL_DAEMONS:
@@ -250,7 +327,7 @@ class BgpdClientMgr(threading.Thread):
         resp = ''
         ret_val = False
         for daemon in daemons:
-            sock = self.client_socks.get(daemon, None)
+            sock = self.__get_client_sock(daemon)
             if sock is None:
                 syslog.syslog(syslog.LOG_ERR, 'daemon %s is not connected' % daemon)
                 continue
@@ -258,11 +335,13 @@ class BgpdClientMgr(threading.Thread):
                 self.__send_data(sock, command + '\0')
             except socket.error as msg:
                 syslog.syslog(syslog.LOG_ERR, 'failed to send command to frr daemon: %s' % msg)
+                self.__reconnect_daemon(daemon)
                 return (False, None)
             ret_code, reply = self.__get_reply(sock)
             if ret_code is None or ret_code != 0:
                 if ret_code is None:
                     syslog.syslog(syslog.LOG_ERR, 'failed to get reply from frr daemon')
+                    self.__reconnect_daemon(daemon)
                     continue
                 else:
                     syslog.syslog(syslog.LOG_DEBUG, '[%s] command return code: %d' % (daemon, ret_code))
@@ -272,6 +351,90 @@ class BgpdClientMgr(threading.Thread):
                 ret_val = True
             resp += reply
         return (ret_val, resp)
+    def __proc_command_block(self, cmd_list, daemons):
+        syslog.syslog(syslog.LOG_DEBUG, 'VTYSH CMD BLOCK: %s daemons: %s' % (cmd_list, daemons))
+        data = ''.join(cmd.strip() + '\0' for cmd in cmd_list)
+        succ_list = [False] * len(cmd_list)
+        # write the block to every daemon first, so that they run it at the same time
+        sent_socks = []
+        for daemon in daemons:
+            sock = self.__get_client_sock(daemon)
+            if sock is None:
+                syslog.syslog(syslog.LOG_ERR, 'daemon %s is not connected' % daemon)
+                continue
+            try:
+                self.__send_data(sock, data)
+            except socket.error as msg:
+                syslog.syslog(syslog.LOG_ERR, 'failed to send command to frr daemon: %s' % msg)
+                self.__reconnect_daemon(daemon)
+                continue
+            sent_socks.append((daemon, sock))
+        for daemon, sock in sent_socks:
+            replies = self.__get_replies(sock, len(cmd_list))
+            if replies[-1][0] is None:
+                self.__reconnect_daemon(daemon)
+            for idx, (ret_code, reply) in enumerate(replies):
+                if ret_code is None:
+                    syslog.syslog(syslog.LOG_ERR, 'failed to get reply from frr daemon')
+                elif ret_code != 0:
+                    syslog.syslog(syslog.LOG_DEBUG, '[%s] command %s return code: %d' % (daemon, cmd_list[idx], ret_code))
+                    syslog.syslog(syslog.LOG_DEBUG, reply)
+                else:
+                    # command is running successfully by at least one daemon
+                    succ_list[idx] = True
+        return succ_list
+    def run_vtysh_command_block(self, table, prefix_list, cmd_lists, daemons):
+        """Send lists of config commands to the daemons as one block: context commands in prefix_list,
+        the commands of all lists in order and 'end'. The replies are read back in order and mapped to
+        the list each command came from.
+        As the commands of a list stop at its first failure, a command which must wait for the reply
+        of the previous command of its list starts a new block, with the commands after it.
+        Return a list with True for each command list that was applied successfully.
+        """
+        cmd_list = []
+        for list_idx, cmds in enumerate(cmd_lists):
+            for cmd in cmds:
+                ignore_fail = False
+                if type(cmd) is tuple:
+                    cmd, ignore_fail = cmd
+                cmd_list.append((list_idx, cmd, ignore_fail))
+        if daemons is None:
+            daemons = self.TABLE_DAEMON.get(table, None)
+        if daemons is None:
+            daemons = self.__get_cmd_daemons(list(prefix_list) + [cmd for _, cmd, _ in cmd_list] + ['end'])
+        if daemons is None or len(daemons) == 0:
+            syslog.syslog(syslog.LOG_ERR, 'no common daemon list found for given commands')
+            return [False] * len(cmd_lists)
+        succ_list = [True] * len(cmd_lists)
+        cmd_idx = 0
+        with self.lock:
+            while cmd_idx < len(cmd_list):
+                block_cmds = []
+                # lists with a command in this block, whose failure stops the rest of the list
+                wait_lists = set()
+                while cmd_idx < len(cmd_list):
+                    list_idx, cmd, ignore_fail = cmd_list[cmd_idx]
+                    if list_idx in wait_lists:
+                        break
+                    cmd_idx += 1
+                    if not succ_list[list_idx]:
+                        continue
+                    block_cmds.append((list_idx, cmd, ignore_fail))
+                    if not ignore_fail:
+                        wait_lists.add(list_idx)
+                if len(block_cmds) == 0:
+                    continue
+                block = list(prefix_list) + [cmd for _, cmd, _ in block_cmds] + ['end']
+                block_succ = self.__proc_command_block(block, daemons)
+                if not all(block_succ[:len(prefix_list)]) or not block_succ[-1]:
+                    syslog.syslog(syslog.LOG_ERR, 'command execution failure. Context: "{}"'.format(prefix_list))
+                    for list_idx, _, _ in block_cmds:
+                        succ_list[list_idx] = False
+                for (list_idx, cmd, ignore_fail), succ in zip(block_cmds, block_succ[len(prefix_list):-1]):
+                    if not succ and not ignore_fail:
+                        syslog.syslog(syslog.LOG_ERR, 'failed running FRR command: %s' % cmd)
+                        succ_list[list_idx] = False
+        return succ_list
     def run_vtysh_command(self, table, command, daemons):
         if not command.startswith(self.VTYSH_MARK):
             syslog.syslog(syslog.LOG_ERR, 'command %s is not for vtysh config' % command)
@@ -644,6 +807,7 @@ class BGPKeyMapList(list):
         start_idx = len(upper_vals)
         ret_val = False
         run_cmd_cnt = 0
+        cmd_groups = []
         for db_field, key_map in self:
             merge_vals = False
             if type(db_field) is not list and type(db_field) is not tuple:
@@ -738,30 +902,33 @@ class BGPKeyMapList(list):
             for chk_list in cmd_list_list:
                if self.is_cmd_list_covered(cmd_list, chk_list):
                    cmd_list = chk_list
-            failed = False
             if len(cmd_list) > 0:
                 run_cmd_cnt += 1
-                cmd_prefix = 'vtysh '
-                for pfx in prefix_list:
-                    cmd_prefix += "-c '%s' " % pfx
-                for cmd in cmd_list:
-                    ignore_fail = False
-                    if type(cmd) is tuple:
-                        cmd, ignore_fail = cmd
-                    if not g_run_command(table, cmd_prefix + "-c '%s'" % cmd, True, key_map.daemons, ignore_fail):
-                        syslog.syslog(syslog.LOG_ERR, 'failed running FRR command: %s' % cmd)
-                        failed = True
-                        break
-                if not failed:
+                cmd_groups.append((key_map.daemons, cmd_list, key_list_list))
+            else:
+                self.set_status_succ(data, key_list_list)
+        # commands of consecutive key maps for the same daemons are sent as one block
+        grp_idx = 0
+        while grp_idx < len(cmd_groups):
+            daemons = cmd_groups[grp_idx][0]
+            block = [cmd_groups[grp_idx]]
+            while grp_idx + len(block) < len(cmd_groups) and cmd_groups[grp_idx + len(block)][0] == daemons:
+                block.append(cmd_groups[grp_idx + len(block)])
+            grp_idx += len(block)
+            succ_list = g_run_command_lists(table, prefix_list, [cmd_list for _, cmd_list, _ in block], daemons)
+            for (_, _, key_list_list), succ in zip(block, succ_list):
+                if succ:
                     ret_val = True
-            if not failed:
-                for key_list in key_list_list:
-                    for dkey in key_list:
-                        if dkey in data:
-                            data[dkey].status = CachedDataWithOp.STAT_SUCC
+                    self.set_status_succ(data, key_list_list)
         if run_cmd_cnt == 0:
             return True
         return ret_val
+    @staticmethod
+    def set_status_succ(data, key_list_list):
+        for key_list in key_list_list:
+            for dkey in key_list:
+                if dkey in data:
+                    data[dkey].status = CachedDataWithOp.STAT_SUCC
 
 class CommandArgument(object):
     def __init__(self, daemon, enabled, val = None):
@@ -1442,9 +1609,18 @@ def hdl_static_route(daemon, cmd_str, op, st_idx, args, data):
     return cmd_list
 
 class ExtConfigDBConnector(ConfigDBConnector):
+    # seconds to collect keyspace notifications before the changed keys are read and dispatched
+    NOTIFY_BATCH_WINDOW = 0.05
     def __init__(self, ns_attrs = None):
         super(ExtConfigDBConnector, self).__init__()
         self.nosort_attrs = ns_attrs if ns_attrs is not None else {}
+        self.dirty_keys = OrderedDict()     # redis key -> (table, row)
+        self.dirty_lock = threading.Lock()
+        self.dirty_event = threading.Event()
+        self.dispatch_thread = None
+        self.dispatch_running = False
+        self.events_received = 0
+        self.events_handled = 0
     def raw_to_typed(self, raw_data, table = ''):
         if len(raw_data) == 0:
             raw_data = None
@@ -1456,25 +1632,77 @@ class ExtConfigDBConnector(ConfigDBConnector):
                 val.sort()
         return data
     def sub_msg_handler(self, msg_item):
+        """Mark the key of a keyspace notification as dirty. Dirty keys are read and dispatched by the dispatch thread.
+        """
         if msg_item['type'] == 'pmessage':
             key = msg_item['channel'].split(':', 1)[1]
             try:
                 (table, row) = key.split(self.TABLE_NAME_SEPARATOR, 1)
-                if table in self.handlers:
-                    client = self.get_redis_client(self.db_name)
-                    data = self.raw_to_typed(client.hgetall(key), table)
-                    super(ExtConfigDBConnector, self)._ConfigDBConnector__fire(table, row, data)
             except ValueError:
-                pass    #Ignore non table-formated redis entries
+                return    #Ignore non table-formated redis entries
+            if table in self.handlers:
+                with self.dirty_lock:
+                    self.events_received += 1
+                    self.dirty_keys[key] = (table, row)
+                self.dirty_event.set()
+    def dispatch_dirty_keys(self):
+        """Read all dirty keys with one pipelined request and run the table handler once for each key.
+        """
+        with self.dirty_lock:
+            dirty_keys, self.dirty_keys = self.dirty_keys, OrderedDict()
+            self.dirty_event.clear()
+        if len(dirty_keys) == 0:
+            return
+        try:
+            pipe = self.get_redis_client(self.db_name).pipeline(transaction = False)
+            for key in dirty_keys:
+                pipe.hgetall(key)
+            raw_data_list = pipe.execute()
+        except Exception as e:
+            syslog.syslog(syslog.LOG_ERR, '[bgp cfgd] Failed reading {} changed keys from config DB with exception: {}'.format(len(dirty_keys), str(e)))
+            logging.exception(e)
+            return
+        for (table, row), raw_data in zip(dirty_keys.values(), raw_data_list):
+            try:
+                data = self.raw_to_typed(raw_data, table)
+                self._ConfigDBConnector__fire(table, row, data)
             except Exception as e:
                 syslog.syslog(syslog.LOG_ERR, '[bgp cfgd] Failed handling config DB update with exception:' + str(e))
                 logging.exception(e)
+            self.events_handled += 1
+        syslog.syslog(syslog.LOG_DEBUG, '[bgp cfgd] config DB notifications received {} handled {}'.format(
+                      self.events_received, self.events_handled))
+    def get_event_counters(self):
+        """Return the number of received keyspace notifications and the number of handled keys.
+        """
+        with self.dirty_lock:
+            return {'received': self.events_received, 'handled': self.events_handled}
+    def dispatch_loop(self):
+        while True:
+            self.dirty_event.wait()
+            if not self.dispatch_running:
+                break
+            time.sleep(self.NOTIFY_BATCH_WINDOW)
+            self.dispatch_dirty_keys()
     def listen(self):
         """Start listen Redis keyspace events and will trigger corresponding handlers when content of a table changes.
         """
+        self.dispatch_running = True
+        self.dispatch_thread = threading.Thread(target = self.dispatch_loop, name = 'config_db_dispatch')
+        self.dispatch_thread.daemon = True
+        self.dispatch_thread.start()
         self.pubsub = self.get_redis_client(self.db_name).pubsub()
         self.pubsub.psubscribe(**{"__keyspace@{}__:*".format(self.get_dbid(self.db_name)): self.sub_msg_handler})
         self.sub_thread = self.pubsub.run_in_thread(sleep_time = 0.01)
+    def stop_dispatch(self):
+        """Stop the dispatch thread. Keys which are dirty at this moment are not dispatched.
+        """
+        if self.dispatch_thread is None:
+            return
+        self.dispatch_running = False
+        self.dirty_event.set()
+        self.dispatch_thread.join()
+        self.dispatch_thread = None
     @staticmethod
     def get_table_key(table, key):
         return table + '&&' + key
@@ -3777,6 +4005,10 @@ class BGPConfigDaemon:
         self.config_db.sub_thread.stop()
         if self.config_db.sub_thread.is_alive():
             self.config_db.sub_thread.join()
+        self.config_db.stop_dispatch()
+        counters = self.config_db.get_event_counters()
+        syslog.syslog(syslog.LOG_INFO, '[bgp cfgd] config DB notifications received {} handled {}'.format(
+                      counters['received'], counters['handled']))
 
 main_loop = True
 
@@ -17,6 +17,26 @@ def test_contructor():
     daemon.config_db.sub_thread.is_alive.assert_called_once()
     daemon.config_db.sub_thread.join.assert_called_once()
 
+@patch.dict('sys.modules', swsssdk = swsssdk_module_mock)
+def test_notification_coalescing():
+    from frrcfgd.frrcfgd import ExtConfigDBConnector
+    config_db = ExtConfigDBConnector()
+    config_db.TABLE_NAME_SEPARATOR = '|'
+    config_db.handlers = {'BGP_GLOBALS': MagicMock(), 'BGP_NEIGHBOR': MagicMock()}
+    config_db.raw_to_typed = lambda raw_data, table: raw_data if len(raw_data) > 0 else None
+    for channel in ['__keyspace@4__:BGP_GLOBALS|default', '__keyspace@4__:BGP_NEIGHBOR|default|10.0.0.1',
+                    '__keyspace@4__:BGP_GLOBALS|default', '__keyspace@4__:PORT|Ethernet0', '__keyspace@4__:BGP_GLOBALS']:
+        config_db.sub_msg_handler({'type': 'pmessage', 'channel': channel})
+    pipe = config_db.get_redis_client.return_value.pipeline.return_value
+    pipe.execute.return_value = [{'local_asn': '100'}, {}]
+    config_db.dispatch_dirty_keys()
+    assert pipe.hgetall.call_args_list == [(('BGP_GLOBALS|default',),), (('BGP_NEIGHBOR|default|10.0.0.1',),)]
+    assert config_db._ConfigDBConnector__fire.call_args_list == [(('BGP_GLOBALS', 'default', {'local_asn': '100'}),),
+                                                                 (('BGP_NEIGHBOR', 'default|10.0.0.1', None),)]
+    assert config_db.get_event_counters() == {'received': 3, 'handled': 2}
+    config_db.dispatch_dirty_keys()
+    assert pipe.execute.call_count == 1
+
 class CmdMapTestInfo:
     data_buf = {}
     def __init__(self, table, key, data, exp_cmd, no_del = False, neg_cmd = None,
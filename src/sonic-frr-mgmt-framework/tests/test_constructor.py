@@ -1,4 +1,5 @@
 import socket
+import threading
 import pytest
 from unittest.mock import MagicMock, NonCallableMagicMock, patch
 
@@ -16,6 +17,7 @@ with patch.dict('sys.modules', swsssdk = swsssdk_module_mock):
     from frrcfgd.frrcfgd import AggregateAddr
     from frrcfgd.frrcfgd import IpNextHop
     from frrcfgd.frrcfgd import IpNextHopSet
+    from frrcfgd.frrcfgd import BgpdClientMgr
 
 def test_data_with_op():
     data = CachedDataWithOp()
@@ -232,3 +234,75 @@ def test_nexthop_set():
             test_set.add(IpNextHop(af, bkh_list[idx], ip_list[idx] if af == socket.AF_INET else ip6_list[idx],
                                    None, intf_list[idx], tag_list[idx], None, vrf_list[idx]))
         assert(nh_set == test_set)
+
+def run_command_block(prefix, cmd_lists):
+    def serve(sock, blocks):
+        data = b''
+        while True:
+            rd_data = sock.recv(4096)
+            if len(rd_data) == 0:
+                break
+            data += rd_data
+            while b'end\0' in data:
+                block, data = data.split(b'end\0', 1)
+                commands = [cmd.decode() for cmd in block.split(b'\0')[:-1]] + ['end']
+                blocks.append(commands)
+                replies = b''
+                for cmd in commands:
+                    ret_code = 1 if cmd.startswith('neighbor 10.0.0.2') else 0
+                    replies += b'\0\0\0' + bytes([ret_code])
+                # reply in small pieces to check reassembling
+                for idx in range(0, len(replies), 3):
+                    sock.sendall(replies[idx:idx + 3])
+    client_mgr = BgpdClientMgr.__new__(BgpdClientMgr)
+    client_mgr.lock = threading.Lock()
+    bgpd_sock, server_sock = socket.socketpair()
+    client_mgr.client_socks = {'bgpd': bgpd_sock}
+    blocks = []
+    server = threading.Thread(target = serve, args = (server_sock, blocks))
+    server.start()
+    succ_list = client_mgr.run_vtysh_command_block('BGP_NEIGHBOR', prefix, cmd_lists, None)
+    bgpd_sock.close()
+    server.join()
+    server_sock.close()
+    return succ_list, blocks
+
+def test_vtysh_command_block():
+    prefix = ['configure terminal', 'router bgp 100 vrf default']
+    succ_list, blocks = run_command_block(prefix, [['neighbor 10.0.0.1 remote-as 200'],
+                                                   ['neighbor 10.0.0.2 remote-as 300'],
+                                                   [('neighbor 10.0.0.2 shutdown', True)],
+                                                   ['neighbor 10.0.0.3 remote-as 400']])
+    # the commands of all lists are sent in one block
+    assert(blocks == [prefix + ['neighbor 10.0.0.1 remote-as 200', 'neighbor 10.0.0.2 remote-as 300',
+                                'neighbor 10.0.0.2 shutdown', 'neighbor 10.0.0.3 remote-as 400', 'end']])
+    assert(succ_list == [True, False, True, True])
+
+def test_vtysh_command_block_stop_list():
+    prefix = ['configure terminal', 'router bgp 100 vrf default']
+    succ_list, blocks = run_command_block(prefix, [['neighbor 10.0.0.1 remote-as 200', 'neighbor 10.0.0.1 ebgp-multihop'],
+                                                   ['neighbor 10.0.0.2 remote-as 300', 'neighbor 10.0.0.2 ebgp-multihop'],
+                                                   [('neighbor 10.0.0.2 shutdown', True), 'neighbor 10.0.0.2 description test']])
+    # a command waits for the previous command of its list, the rest of a list is dropped after a failure
+    assert(blocks == [prefix + ['neighbor 10.0.0.1 remote-as 200', 'end'],
+                      prefix + ['neighbor 10.0.0.1 ebgp-multihop', 'neighbor 10.0.0.2 remote-as 300', 'end'],
+                      prefix + ['neighbor 10.0.0.2 shutdown', 'neighbor 10.0.0.2 description test', 'end']])
+    assert(succ_list == [True, False, False])
+
+def test_vtysh_command_block_timeout():
+    client_mgr = BgpdClientMgr.__new__(BgpdClientMgr)
+    client_mgr.lock = threading.Lock()
+    bgpd_sock, server_sock = socket.socketpair()
+    bgpd_sock.settimeout(0.1)
+    new_sock = MagicMock()
+    client_mgr.client_socks = {'bgpd': bgpd_sock}
+    with patch.object(BgpdClientMgr, '_BgpdClientMgr__connect_daemon', return_value = new_sock) as connect_daemon:
+        # only the reply of the context command arrives before the timeout
+        server_sock.sendall(b'\0\0\0\0')
+        succ_list = client_mgr.run_vtysh_command_block('BGP_NEIGHBOR', ['configure terminal'],
+                                                       [['neighbor 10.0.0.1 remote-as 200']], None)
+        connect_daemon.assert_called_once_with('bgpd')
+    server_sock.close()
+    assert(succ_list == [False])
+    assert(bgpd_sock.fileno() == -1)
+    assert(client_mgr.client_socks == {'bgpd': new_sock})
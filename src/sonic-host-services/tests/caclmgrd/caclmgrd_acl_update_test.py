@@ -0,0 +1,131 @@
+import os
+import sys
+import swsscommon
+
+from sonic_py_common.general import load_module_from_source
+from unittest import TestCase, mock
+from pyfakefs.fake_filesystem_unittest import patchfs
+
+from tests.common.mock_configdb import MockConfigDb
+
+
+DBCONFIG_PATH = '/var/run/redis/sonic-db/database_config.json'
+
+
+swsscommon.swsscommon.ConfigDBConnector = MockConfigDb
+test_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+modules_path = os.path.dirname(test_path)
+scripts_path = os.path.join(modules_path, "scripts")
+sys.path.insert(0, modules_path)
+caclmgrd_path = os.path.join(scripts_path, 'caclmgrd')
+
+
+CONFIG_DB = {
+    "DEVICE_METADATA": {
+        "localhost": {
+            "type": "ToRRouter",
+        }
+    },
+    "ACL_TABLE": {
+        "SSH_ONLY": {
+            "type": "CTRLPLANE",
+            "services": ["SSH"],
+        },
+        "DATAACL": {
+            "type": "L3",
+            "ports": ["Ethernet0"],
+        }
+    },
+    "ACL_RULE": {
+        ("SSH_ONLY", "RULE_1"): {
+            "PRIORITY": "9999",
+            "SRC_IP": "10.0.0.0/8",
+            "PACKET_ACTION": "ACCEPT",
+        }
+    },
+    "LOOPBACK_INTERFACE": {
+        "Loopback0": {},
+        ("Loopback0", "10.1.0.32/32"): {},
+    },
+    "MGMT_INTERFACE": {},
+    "VLAN_INTERFACE": {},
+    "PORTCHANNEL_INTERFACE": {},
+    "INTERFACE": {},
+}
+
+
+class TestCaclmgrdAclUpdate(TestCase):
+    """
+        Test incremental updates of control plane ACLs
+    """
+    @patchfs
+    def test_caclmgrd_acl_update(self, fs):
+        if not os.path.exists(DBCONFIG_PATH):
+            fs.create_file(DBCONFIG_PATH) # fake database_config.json
+
+        MockConfigDb.set_config_db(CONFIG_DB)
+        with mock.patch.dict(sys.modules):
+            caclmgrd = load_module_from_source('caclmgrd', caclmgrd_path)
+
+        with mock.patch.object(caclmgrd, "subprocess") as mocked_subprocess, \
+                mock.patch.object(MockConfigDb, "get_table", autospec=True, side_effect=MockConfigDb.get_table) as mocked_get_table:
+            chain_popen_mock = mock.Mock()
+            chain_popen_mock.configure_mock(**{'communicate.return_value': ('INPUT\nFORWARD\nOUTPUT', ''), 'returncode': 0})
+            restore_popen_mock = mock.Mock()
+            restore_popen_mock.configure_mock(**{'communicate.return_value': ('', ''), 'returncode': 0})
+            mocked_subprocess.Popen.side_effect = \
+                lambda cmd, **kwargs: restore_popen_mock if '-restore' in cmd else chain_popen_mock
+
+            caclmgrd_daemon = caclmgrd.ControlPlaneAclManager("caclmgrd")
+            caclmgrd_daemon.update_control_plane_acls('')
+            num_get_table_calls = mocked_get_table.call_count
+
+            # notifications which don't change the control plane ACLs
+            self.assertFalse(caclmgrd_daemon.update_acl_config('', "ACL_RULE", "SSH_ONLY|RULE_1", "SET",
+                                                               {"PRIORITY": "9999", "SRC_IP": "10.0.0.0/8", "PACKET_ACTION": "ACCEPT"}))
+            self.assertFalse(caclmgrd_daemon.update_acl_config('', "ACL_TABLE", "DATAACL", "SET",
+                                                               {"type": "L3", "ports@": "Ethernet0,Ethernet4"}))
+            self.assertFalse(caclmgrd_daemon.update_acl_config('', "ACL_RULE", "DATAACL|RULE_1", "SET",
+                                                               {"PRIORITY": "10", "PACKET_ACTION": "DROP"}))
+            self.assertFalse(caclmgrd_daemon.update_acl_config('', "INTERFACE", "Ethernet0", "SET", {"NULL": "NULL"}))
+            self.assertFalse(caclmgrd_daemon.update_acl_config('', "ACL_RULE", "SSH_ONLY|RULE_3", "DEL", {}))
+
+            # a rule change rewrites only the chain of the service
+            self.assertTrue(caclmgrd_daemon.update_acl_config('', "ACL_RULE", "SSH_ONLY|RULE_2", "SET",
+                                                              {"PRIORITY": "9998", "SRC_IP": "10.2.0.0/16", "PACKET_ACTION": "DROP"}))
+            restore_popen_mock.communicate.reset_mock()
+            caclmgrd_daemon.update_control_plane_acls('')
+            payloads = [c[0][0] for c in restore_popen_mock.communicate.call_args_list]
+            self.assertEqual(payloads, [
+                "*filter\n-F CTRLPLANE_ACL_SSH\nCOMMIT\n",
+                "*filter\n-F CTRLPLANE_ACL_SSH\n"
+                "-A CTRLPLANE_ACL_SSH -p tcp -s 10.0.0.0/8 --dport 22 -j ACCEPT\n"
+                "-A CTRLPLANE_ACL_SSH -p tcp -s 10.2.0.0/16 --dport 22 -j DROP\n"
+                "COMMIT\n",
+            ])
+
+            # an interface address change rewrites only the chain blocking ip2me traffic
+            self.assertTrue(caclmgrd_daemon.update_acl_config('', "INTERFACE", "Ethernet0|10.0.0.0/31", "SET", {"NULL": "NULL"}))
+            restore_popen_mock.communicate.reset_mock()
+            caclmgrd_daemon.update_control_plane_acls('')
+            payloads = [c[0][0] for c in restore_popen_mock.communicate.call_args_list]
+            self.assertEqual(payloads, [
+                "*filter\n-F CTRLPLANE_IP2ME\nCOMMIT\n",
+                "*filter\n-F CTRLPLANE_IP2ME\n"
+                "-A CTRLPLANE_IP2ME -d 10.1.0.32/32 -j DROP\n"
+                "-A CTRLPLANE_IP2ME -d 10.0.0.0/32 -j DROP\n"
+                "COMMIT\n",
+            ])
+
+            # a new service rebuilds all rules
+            self.assertTrue(caclmgrd_daemon.update_acl_config('', "ACL_TABLE", "NTP_ONLY", "SET",
+                                                              {"type": "CTRLPLANE", "services@": "NTP"}))
+            restore_popen_mock.communicate.reset_mock()
+            caclmgrd_daemon.update_control_plane_acls('')
+            ipv4_payload = restore_popen_mock.communicate.call_args_list[1][0][0].splitlines()
+            self.assertIn("-P INPUT ACCEPT", ipv4_payload)
+            self.assertIn("-N CTRLPLANE_ACL_NTP", ipv4_payload)
+            self.assertIn("-A INPUT -j CTRLPLANE_ACL_NTP", ipv4_payload)
+
+            # the tables are not read from Config DB after the first update
+            self.assertEqual(mocked_get_table.call_count, num_get_table_calls)
@@ -0,0 +1,108 @@
+import os
+import sys
+import swsscommon
+
+from sonic_py_common.general import load_module_from_source
+from unittest import TestCase, mock
+from pyfakefs.fake_filesystem_unittest import patchfs
+
+from tests.common.mock_configdb import MockConfigDb
+
+
+DBCONFIG_PATH = '/var/run/redis/sonic-db/database_config.json'
+
+
+swsscommon.swsscommon.ConfigDBConnector = MockConfigDb
+test_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+modules_path = os.path.dirname(test_path)
+scripts_path = os.path.join(modules_path, "scripts")
+sys.path.insert(0, modules_path)
+caclmgrd_path = os.path.join(scripts_path, 'caclmgrd')
+
+
+CONFIG_DB = {
+    "DEVICE_METADATA": {
+        "localhost": {
+            "type": "ToRRouter",
+        }
+    },
+    "ACL_TABLE": {
+        "SSH_ONLY": {
+            "type": "CTRLPLANE",
+            "services": ["SSH"],
+        }
+    },
+    "ACL_RULE": {
+        ("SSH_ONLY", "RULE_1"): {
+            "PRIORITY": "9999",
+            "SRC_IP": "10.0.0.0/8",
+            "PACKET_ACTION": "ACCEPT",
+        }
+    },
+    "LOOPBACK_INTERFACE": {
+        ("Loopback0", "10.1.0.32/32"): {},
+    },
+    "MGMT_INTERFACE": {},
+    "VLAN_INTERFACE": {},
+    "PORTCHANNEL_INTERFACE": {},
+    "INTERFACE": {},
+}
+
+
+class TestCaclmgrdIptablesRestore(TestCase):
+    """
+        Test programming of caclmgrd rules with iptables-restore
+    """
+    @patchfs
+    def test_caclmgrd_iptables_restore(self, fs):
+        if not os.path.exists(DBCONFIG_PATH):
+            fs.create_file(DBCONFIG_PATH) # fake database_config.json
+
+        MockConfigDb.set_config_db(CONFIG_DB)
+        with mock.patch.dict(sys.modules):
+            caclmgrd = load_module_from_source('caclmgrd', caclmgrd_path)
+
+        with mock.patch.object(caclmgrd, "subprocess") as mocked_subprocess:
+            chain_popen_mock = mock.Mock()
+            chain_popen_mock.configure_mock(**{'communicate.return_value': ('INPUT\nFORWARD\nOUTPUT', ''), 'returncode': 0})
+            popen_mock = mock.Mock()
+            popen_mock.configure_mock(**{'communicate.return_value': ('', ''), 'returncode': 0})
+            restore_popen_mock = mock.Mock()
+            restore_popen_mock.configure_mock(**{'communicate.return_value': ('', ''), 'returncode': 0})
+
+            def popen(cmd, **kwargs):
+                if '-restore' in cmd:
+                    return restore_popen_mock
+                return chain_popen_mock if ' -L ' in cmd else popen_mock
+            mocked_subprocess.Popen.side_effect = popen
+
+            caclmgrd_daemon = caclmgrd.ControlPlaneAclManager("caclmgrd")
+            caclmgrd_daemon.update_control_plane_acls('')
+
+            restore_calls = [c for c in mocked_subprocess.Popen.call_args_list if '-restore' in c[0][0]]
+            self.assertEqual([c[0][0] for c in restore_calls], ["ip6tables-restore --noflush", "iptables-restore --noflush"])
+            payloads = [c[0][0] for c in restore_popen_mock.communicate.call_args_list]
+            self.assertEqual(len(payloads), 2)
+            ipv4_payload = payloads[1].splitlines()
+            self.assertEqual(ipv4_payload[0], "*filter")
+            self.assertEqual(ipv4_payload[-1], "COMMIT")
+            self.assertIn("-P INPUT ACCEPT", ipv4_payload)
+            self.assertIn("-A CTRLPLANE_ACL_SSH -p tcp -s 10.0.0.0/8 --dport 22 -j ACCEPT", ipv4_payload)
+            self.assertIn("-A CTRLPLANE_IP2ME -d 10.1.0.32/32 -j DROP", ipv4_payload)
+            self.assertEqual(ipv4_payload[-2], "-A INPUT -j DROP")
+
+            # the same ruleset is not applied again
+            mocked_subprocess.Popen.reset_mock()
+            caclmgrd_daemon.update_control_plane_acls('')
+            restore_calls = [c for c in mocked_subprocess.Popen.call_args_list if '-restore' in c[0][0]]
+            self.assertEqual(restore_calls, [])
+
+            # a failed restore falls back to running the commands one by one
+            caclmgrd_daemon.update_acl_config('', "ACL_RULE", "SSH_ONLY|RULE_1", "SET",
+                                              {"PRIORITY": "9999", "SRC_IP": "10.0.0.0/16", "PACKET_ACTION": "ACCEPT"})
+            restore_popen_mock.returncode = 1
+            mocked_subprocess.Popen.reset_mock()
+            caclmgrd_daemon.update_control_plane_acls('')
+            commands = [c[0][0] for c in mocked_subprocess.Popen.call_args_list]
+            self.assertIn("iptables -A CTRLPLANE_ACL_SSH -p tcp -s 10.0.0.0/16 --dport 22 -j ACCEPT", commands)
+            self.assertIsNone(caclmgrd_daemon.last_ruleset_hash[''])
@@ -112,6 +112,9 @@ class MockSubscriberStateTable():
             fvs = table.get(self.next_key, {})
         return self.next_key, op, fvs
 
+    def pops(self):
+        return [self.pop()]
+
 
 class MockDBConnector():
     def __init__(self, db, val):
@@ -198,6 +198,124 @@ class TesNtpCfgd(TestCase):
             mocked_subprocess.check_call.assert_has_calls([call('systemctl restart ntp-config', shell=True)])
 
 
+class FakeDBusException(Exception):
+    def __init__(self, name):
+        super(FakeDBusException, self).__init__(name)
+        self.name = name
+
+    def get_dbus_name(self):
+        return self.name
+
+
+class TestSystemdManager(TestCase):
+    """
+        Test hostcfgd feature handling over D-Bus
+    """
+    def setUp(self):
+        self.dbus = mock.MagicMock()
+        self.dbus.exceptions.DBusException = FakeDBusException
+        self.dbus_patcher = mock.patch.object(hostcfgd, 'dbus', self.dbus)
+        self.dbus_patcher.start()
+
+    def tearDown(self):
+        self.dbus_patcher.stop()
+        MockConfigDb.CONFIG_DB = {}
+
+    @patchfs
+    def test_feature_batch(self, fs):
+        fs.create_dir(hostcfgd.FeatureHandler.SYSTEMD_SYSTEM_DIR)
+        MockConfigDb.set_config_db(HOSTCFG_DAEMON_CFG_DB)
+        systemd = mock.MagicMock()
+        systemd.get_unit_file_states.side_effect = lambda units: {unit: 'masked' for unit in units}
+        device_config = {'DEVICE_METADATA': MockConfigDb.CONFIG_DB['DEVICE_METADATA']}
+        feature_handler = hostcfgd.FeatureHandler(MockConfigDb(), device_config, systemd)
+        with mock.patch('hostcfgd.subprocess') as mocked_subprocess:
+            feature_handler.sync_state_field()
+            for key, fvs in MockConfigDb.CONFIG_DB['FEATURE'].items():
+                feature_handler.handle(key, 'SET', fvs)
+            # Units are started only after the systemd configuration is reloaded
+            systemd.start.assert_not_called()
+            feature_handler.commit()
+            mocked_subprocess.check_call.assert_not_called()
+
+        systemd.unmask.assert_has_calls([call(['dhcp_relay.service']),
+                                         call(['mux.service']),
+                                         call(['telemetry.service', 'telemetry.timer'])])
+        systemd.enable.assert_has_calls([call(['dhcp_relay.service']), call(['mux.service']), call(['telemetry.timer'])])
+        systemd.reload.assert_called_once_with()
+        systemd.start.assert_has_calls([call('dhcp_relay.service'), call('mux.service'), call('telemetry.timer')])
+
+        # Disable telemetry
+        systemd.reset_mock()
+        systemd.get_unit_file_states.side_effect = lambda units: {unit: 'enabled' for unit in units}
+        feature_handler.handle('telemetry', 'SET', dict(MockConfigDb.CONFIG_DB['FEATURE']['telemetry'], state='disabled'))
+        feature_handler.commit()
+        systemd.stop.assert_has_calls([call('telemetry.timer'), call('telemetry.service')])
+        systemd.disable.assert_called_once_with(['telemetry.timer'])
+        systemd.mask.assert_called_once_with(['telemetry.timer'])
+        systemd.reload.assert_called_once_with()
+        systemd.start.assert_not_called()
+
+        # Nothing to do after the batch is committed
+        systemd.reset_mock()
+        feature_handler.commit()
+        systemd.reload.assert_not_called()
+
+        # Enabled and disabled again in the same batch, the units are not started
+        systemd.reset_mock()
+        unit_file_states = {'telemetry.timer': 'masked'}
+        systemd.get_unit_file_states.side_effect = lambda units: {unit: unit_file_states[unit] for unit in units}
+        feature_handler.handle('telemetry', 'SET', dict(MockConfigDb.CONFIG_DB['FEATURE']['telemetry'], state='enabled'))
+        unit_file_states['telemetry.timer'] = 'enabled'
+        feature_handler.handle('telemetry', 'SET', dict(MockConfigDb.CONFIG_DB['FEATURE']['telemetry'], state='disabled'))
+        feature_handler.commit()
+        systemd.enable.assert_called_once_with(['telemetry.timer'])
+        systemd.mask.assert_called_once_with(['telemetry.timer'])
+        systemd.reload.assert_called_once_with()
+        systemd.start.assert_not_called()
+
+    def test_poll_jobs(self):
+        bus = mock.MagicMock()
+        manager = self.dbus.Interface.return_value
+        manager.StartUnit.return_value = '/org/freedesktop/systemd1/job/1'
+        manager.StopUnit.return_value = '/org/freedesktop/systemd1/job/2'
+        manager.LoadUnit.side_effect = lambda unit: '/unit/' + unit
+        states = {'/unit/a.service': 'active', '/unit/b.service': 'active'}
+        running_jobs = {'/org/freedesktop/systemd1/job/1', '/org/freedesktop/systemd1/job/2'}
+
+        def get_object(bus_name, path):
+            obj = mock.MagicMock()
+            if path.startswith('/unit/'):
+                obj.Get.return_value = states[path]
+            elif path not in running_jobs:
+                obj.Get.side_effect = FakeDBusException(hostcfgd.SystemdManager.UNKNOWN_OBJECT_ERROR)
+            return obj
+        bus.get_object.side_effect = get_object
+
+        systemd = hostcfgd.SystemdManager(bus)
+        systemd.start('a.service')
+        systemd.stop('b.service')
+        assert systemd.has_jobs()
+        assert systemd.poll_jobs() == []
+
+        running_jobs.clear()
+        assert systemd.poll_jobs() == [('a.service', 'start', True), ('b.service', 'stop', False)]
+        assert not systemd.has_jobs()
+
+    def test_get_unit_file_states(self):
+        manager = self.dbus.Interface.return_value
+        manager.ListUnitFilesByPatterns.return_value = [('/lib/systemd/system/a.service', 'enabled'),
+                                                        ('/etc/systemd/system/b.service', 'masked')]
+        manager.GetUnitFileState.side_effect = FakeDBusException('org.freedesktop.systemd1.NoSuchUnit')
+        systemd = hostcfgd.SystemdManager(mock.MagicMock())
+        states = systemd.get_unit_file_states(['a.service', 'b.service', 'c@0.service'])
+        assert states == {'a.service': 'enabled', 'b.service': 'masked', 'c@0.service': 'invalid'}
+
+    def test_connect_without_dbus(self):
+        with mock.patch.object(hostcfgd, 'dbus', None):
+            assert hostcfgd.SystemdManager.connect() is None
+
+
 class TestHostcfgdDaemon(TestCase):
 
     def setUp(self):
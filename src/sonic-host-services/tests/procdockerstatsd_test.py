@@ -1,6 +1,9 @@
 import sys
 import os
+import re
+import json
 import pytest
+from unittest import mock
 
 from swsscommon import swsscommon
 from sonic_py_common.general import load_module_from_source
@@ -41,3 +44,120 @@ class TestProcDockerStatsDaemon(object):
         for test_input, expected_output in test_data:
             res = pdstatsd.convert_to_bytes(test_input)
             assert res == expected_output
+
+    def test_collect_process_stats(self, fs):
+        fs.create_file('/proc/uptime', contents='1000.00 900.00\n')
+        fs.create_file('/proc/meminfo', contents='MemTotal:           1000 kB\nMemFree:             500 kB\n')
+        fs.create_file('/proc/1/stat', contents='1 (systemd) S 0 1 1 0 -1 4194560 0 0 0 0 500 300 0 0 20 0 1 0 100 1000 25\n')
+        fs.create_file('/proc/1/status', contents='Name:\tsystemd\nUid:\t0\t0\t0\t0\n')
+        fs.create_file('/proc/1/cmdline', contents='/sbin/init\0splash\0')
+        fs.create_file('/proc/2/stat', contents='2 (my (proc)) R 1 2 2 34816 -1 4194560 0 0 0 0 9000 1000 0 0 20 0 1 0 90000 1000 50\n')
+        fs.create_file('/proc/2/status', contents='Name:\tmy (proc)\nUid:\t1000\t1001\t1001\t1001\n')
+        fs.create_file('/proc/2/cmdline', contents='')
+        fs.create_file('/proc/self/stat', contents='')
+
+        pdstatsd = procdockerstatsd.ProcDockerStats(procdockerstatsd.SYSLOG_IDENTIFIER)
+        pdstatsd.clock_ticks = 100
+        pdstatsd.page_size = 4096
+
+        processes = pdstatsd.collect_process_stats()
+        assert list(processes.keys()) == ['2', '1']
+        assert processes['1']['UID'] == '0'
+        assert processes['1']['PPID'] == '0'
+        # 8 seconds of CPU time since the start of the process 999 seconds ago
+        assert processes['1']['%CPU'] == '0.8'
+        assert processes['1']['%MEM'] == '10.0'
+        assert re.match(r'^\d\d:\d\d$', processes['1']['STIME'])
+        assert processes['1']['TT'] == '?'
+        assert processes['1']['TIME'] == '00:00:08'
+        assert processes['1']['CMD'] == '/sbin/init splash'
+        assert processes['2']['UID'] == '1001'
+        assert processes['2']['%CPU'] == '100.0'
+        assert processes['2']['TT'] == 'pts/0'
+        assert processes['2']['TIME'] == '00:01:40'
+        assert processes['2']['CMD'] == '[my (proc)]'
+
+        # CPU utilization is calculated for the time since the previous sample
+        fs.get_object('/proc/uptime').set_contents('1010.00 900.00\n')
+        fs.get_object('/proc/1/stat').set_contents('1 (systemd) S 0 1 1 0 -1 4194560 0 0 0 0 800 500 0 0 20 0 1 0 100 1000 25\n')
+        processes = pdstatsd.collect_process_stats()
+        assert processes['1']['%CPU'] == '50.0'
+        assert processes['2']['%CPU'] == '0.0'
+
+    def test_collect_docker_stats(self, fs):
+        running_id = 'a' * 64
+        stopped_id = 'b' * 64
+        fs.create_file('/proc/meminfo', contents='MemTotal:        1048576 kB\n')
+        fs.create_file('/var/lib/docker/containers/{}/config.v2.json'.format(running_id),
+                       contents=json.dumps({'Name': '/syncd', 'State': {'Running': True, 'Pid': 10}}))
+        fs.create_file('/var/lib/docker/containers/{}/config.v2.json'.format(stopped_id),
+                       contents=json.dumps({'Name': '/dhcp_relay', 'State': {'Running': False, 'Pid': 0}}))
+        cgroup_dir = '/sys/fs/cgroup/{}/docker/' + running_id
+        fs.create_file(os.path.join(cgroup_dir.format('cpuacct'), 'cpuacct.usage'), contents='5000000000\n')
+        fs.create_file(os.path.join(cgroup_dir.format('memory'), 'memory.usage_in_bytes'), contents='104857600\n')
+        fs.create_file(os.path.join(cgroup_dir.format('memory'), 'memory.limit_in_bytes'), contents='9223372036854771712\n')
+        fs.create_file(os.path.join(cgroup_dir.format('memory'), 'memory.stat'), contents='cache 20971520\ntotal_inactive_file 52428800\n')
+        fs.create_file(os.path.join(cgroup_dir.format('blkio'), 'blkio.throttle.io_service_bytes'),
+                       contents='8:0 Read 4096\n8:0 Write 8192\n8:0 Total 12288\nTotal 12288\n')
+        fs.create_file(os.path.join(cgroup_dir.format('pids'), 'pids.current'), contents='12\n')
+        fs.create_symlink('/proc/1/ns/net', 'net:[4026531992]')
+        fs.create_symlink('/proc/10/ns/net', 'net:[4026532290]')
+        fs.create_file('/proc/10/net/dev', contents=(
+            'Inter-|   Receive                                                |  Transmit\n'
+            ' face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed\n'
+            '    lo:    1000      10    0    0    0     0          0         0     1000      10    0    0    0     0       0          0\n'
+            '  eth0:    2000      20    0    0    0     0          0         0     3000      30    0    0    0     0       0          0\n'))
+
+        pdstatsd = procdockerstatsd.ProcDockerStats(procdockerstatsd.SYSLOG_IDENTIFIER)
+        with mock.patch.object(procdockerstatsd.time, 'monotonic', side_effect=[100.0, 102.0]):
+            dockerdata = pdstatsd.collect_docker_stats()
+            assert dockerdata == {
+                'aaaaaaaaaaaa': {
+                    'NAME': 'syncd',
+                    'CPU%': '0.00',
+                    'MEM_BYTES': '52428800',
+                    'MEM_LIMIT_BYTES': '1073741824',
+                    'MEM%': '4.88',
+                    'NET_IN_BYTES': '2000',
+                    'NET_OUT_BYTES': '3000',
+                    'BLOCK_IN_BYTES': '4096',
+                    'BLOCK_OUT_BYTES': '8192',
+                    'PIDS': '12',
+                },
+                'bbbbbbbbbbbb': {
+                    'NAME': 'dhcp_relay',
+                    'CPU%': '0.00',
+                    'MEM_BYTES': '0',
+                    'MEM_LIMIT_BYTES': '0',
+                    'MEM%': '0.00',
+                    'NET_IN_BYTES': '0',
+                    'NET_OUT_BYTES': '0',
+                    'BLOCK_IN_BYTES': '0',
+                    'BLOCK_OUT_BYTES': '0',
+                    'PIDS': '0',
+                },
+            }
+
+            # 1 second of CPU time in 2 seconds
+            fs.get_object(os.path.join(cgroup_dir.format('cpuacct'), 'cpuacct.usage')).set_contents('6000000000\n')
+            dockerdata = pdstatsd.collect_docker_stats()
+            assert dockerdata['aaaaaaaaaaaa']['CPU%'] == '50.00'
+
+    def test_collect_docker_stats_unsupported(self, fs):
+        fs.create_dir('/var/lib/docker/containers')
+        pdstatsd = procdockerstatsd.ProcDockerStats(procdockerstatsd.SYSLOG_IDENTIFIER)
+        # cgroup v1 hierarchy is not mounted
+        assert pdstatsd.collect_docker_stats() is None
+
+    def test_update_state_db_table(self):
+        pdstatsd = procdockerstatsd.ProcDockerStats(procdockerstatsd.SYSLOG_IDENTIFIER)
+        table = mock.MagicMock()
+        pdstatsd.state_db_tables['PROCESS_STATS'] = table
+        pdstatsd.state_db_keys['PROCESS_STATS'] = {'1', '2'}
+
+        pdstatsd.update_state_db_table('PROCESS_STATS', {'2': {'PPID': '1'}, '3': {'PPID': '2', 'UID': '0'}})
+        table.delete.assert_called_once_with('1')
+        table.set.assert_has_calls([mock.call('2', [('PPID', '1')]), mock.call('3', [('PPID', '2'), ('UID', '0')])],
+                                   any_order=True)
+        assert table.set.call_count == 2
+        assert pdstatsd.state_db_keys['PROCESS_STATS'] == {'2', '3'}
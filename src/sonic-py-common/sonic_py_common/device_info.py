@@ -1,3 +1,4 @@
+import copy
 import glob
 import json
 import os
@@ -40,6 +41,90 @@ CHASSIS_INFO_SERIAL_FIELD = 'serial'
 CHASSIS_INFO_MODEL_FIELD = 'model'
 CHASSIS_INFO_REV_FIELD = 'revision'
 
+# Facts about the device which don't change at run time are cached for the life of the process.
+# The cache is seeded from a snapshot, which is written once after boot by write_device_info_snapshot().
+# /run is cleared on reboot, so the snapshot doesn't outlive the image and the hardware it describes.
+# The system MAC is left out: early in boot some platforms can't decode the EEPROM yet and fall back
+# to the eth0 MAC, which must not be served for the whole boot.
+DEVICE_INFO_SNAPSHOT_PATH = "/run/sonic-device-info.json"
+DEVICE_INFO_SNAPSHOT_FACTS = ('machine_info', 'platform', 'sonic_version_info', 'num_npus', 'is_supervisor')
+
+# Cached facts: name -> value. None is not cached, so a fact which can't be determined yet is retried
+_device_info_cache = {}
+_snapshot_loaded = False
+
+
+def _load_snapshot():
+    try:
+        with open(DEVICE_INFO_SNAPSHOT_PATH) as snapshot_file:
+            snapshot = json.load(snapshot_file)
+    except (IOError, OSError, ValueError):
+        return
+
+    for name in DEVICE_INFO_SNAPSHOT_FACTS:
+        if snapshot.get(name) is not None:
+            _device_info_cache.setdefault(name, snapshot[name])
+
+
+def _get_cached(name, get_value):
+    """
+    Retrieves a cached fact about the device
+
+    Args:
+        name: name of the fact
+        get_value: function which determines the fact, called if the fact isn't cached yet
+
+    Returns:
+        The value of the fact
+    """
+    global _snapshot_loaded
+
+    if not _snapshot_loaded:
+        _snapshot_loaded = True
+        _load_snapshot()
+
+    if name in _device_info_cache:
+        return _device_info_cache[name]
+
+    value = get_value()
+    if value is not None:
+        _device_info_cache[name] = value
+    return value
+
+
+def clear_cache():
+    """
+    Drops the cached facts about the device. The snapshot is read again on the next use
+    """
+    global _snapshot_loaded
+
+    _device_info_cache.clear()
+    _snapshot_loaded = False
+
+
+def write_device_info_snapshot():
+    """
+    Writes the facts about the device to DEVICE_INFO_SNAPSHOT_PATH, so other processes
+    don't need to read and parse the files, decode the EEPROM etc. again.
+    Should be called once after boot
+    """
+    snapshot = {}
+    for name, get_value in (('machine_info', get_machine_info),
+                            ('platform', get_platform),
+                            ('sonic_version_info', get_sonic_version_info),
+                            ('num_npus', get_num_npus),
+                            ('is_supervisor', is_supervisor)):
+        value = get_value()
+        if value is not None:
+            snapshot[name] = value
+
+    # Replace the file atomically, readers never see a partially written snapshot
+    tmp_path = DEVICE_INFO_SNAPSHOT_PATH + '.tmp'
+    with open(tmp_path, 'w') as snapshot_file:
+        json.dump(snapshot, snapshot_file, default=str)
+    os.chmod(tmp_path, 0o644)
+    os.rename(tmp_path, DEVICE_INFO_SNAPSHOT_PATH)
+
 
 def get_localhost_info(field):
     try:
@@ -68,6 +153,11 @@ def get_machine_info():
         A dictionary containing the key/value pairs as found in the machine
         configuration file
     """
+    machine_vars = _get_cached('machine_info', _read_machine_info)
+    return dict(machine_vars) if machine_vars is not None else None
+
+
+def _read_machine_info():
     if not os.path.isfile(MACHINE_CONF_PATH):
         return None
 
@@ -97,6 +187,10 @@ def get_platform():
     if platform_env:
         return platform_env
 
+    return _get_cached('platform', _get_platform_from_machine_info_or_db)
+
+
+def _get_platform_from_machine_info_or_db():
     # If 'PLATFORM' env variable is not defined, we try to read the platform
     # identifier from machine.conf. This is critical for sonic-config-engine,
     # because it is responsible for populating this value in Config DB.
@@ -123,7 +217,7 @@ def get_hwsku():
         A string containing the device's hardware SKU identifier
     """
 
-    return get_localhost_info('hwsku')
+    return _get_cached('hwsku', lambda: get_localhost_info('hwsku'))
 
 
 def get_platform_and_hwsku():
@@ -319,6 +413,11 @@ def get_path_to_port_config_file(hwsku=None, asic=None):
     return None
 
 def get_sonic_version_info():
+    data = _get_cached('sonic_version_info', _read_sonic_version_info)
+    return copy.deepcopy(data)
+
+
+def _read_sonic_version_info():
     if not os.path.isfile(SONIC_VERSION_YAML_PATH):
         return None
 
@@ -394,6 +493,10 @@ def get_chassis_info():
 #
 
 def get_num_npus():
+    return _get_cached('num_npus', _read_num_npus)
+
+
+def _read_num_npus():
     asic_conf_file_path = get_asic_conf_file_path()
     if asic_conf_file_path is None:
         return 1
@@ -427,6 +530,10 @@ def is_chassis():
 
 
 def is_supervisor():
+    return _get_cached('is_supervisor', _read_is_supervisor)
+
+
+def _read_is_supervisor():
     platform_env_conf_file_path = get_platform_env_conf_file_path()
     if platform_env_conf_file_path is None:
         return False
@@ -492,6 +599,15 @@ def _valid_mac_address(mac):
 
 
 def get_system_mac(namespace=None):
+    if namespace is None:
+        name = 'system_mac'
+    else:
+        name = 'system_mac|{}'.format(namespace)
+
+    return _get_cached(name, lambda: _get_system_mac(namespace))
+
+
+def _get_system_mac(namespace):
     version_info = get_sonic_version_info()
 
     if (version_info['asic_type'] == 'mellanox'):
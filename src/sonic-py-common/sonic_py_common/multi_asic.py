@@ -1,6 +1,7 @@
 import glob
 import os
 import subprocess
+import threading
 
 from natsort import natsorted
 from swsscommon import swsscommon
@@ -26,6 +27,15 @@ NEIGH_DEVICE_METADATA_CFG_DB_TABLE = 'DEVICE_NEIGHBOR_METADATA'
 DEFAULT_NAMESPACE = ''
 PORT_ROLE = 'role'
 
+# Parsed asic.conf files: path -> (mtime, list of (key, value))
+_asic_conf_cache = {}
+
+# Network namespace of the current process: (pid, namespace)
+_current_namespace = None
+
+# Connections and the port index are kept per thread, because connectors are not thread safe
+_thread_state = threading.local()
+
 
 def connect_config_db_for_ns(namespace=DEFAULT_NAMESPACE):
     """
@@ -44,6 +54,153 @@ def connect_config_db_for_ns(namespace=DEFAULT_NAMESPACE):
     return config_db
 
 
+def _get_thread_state():
+    """
+    Get the connections and the port index of the calling thread. They are
+    dropped in a child process after fork, because sockets can't be shared
+    """
+    pid = os.getpid()
+    if getattr(_thread_state, 'pid', None) != pid:
+        _thread_state.pid = pid
+        _thread_state.config_dbs = {}
+        _thread_state.port_index = None
+    return _thread_state
+
+
+def get_config_db_for_ns(namespace=DEFAULT_NAMESPACE):
+    """
+    The function returns a pooled handle to the config DB for a given namespace.
+    Unlike connect_config_db_for_ns(), the connection is created on the first
+    call in a thread and reused by the following calls
+
+    Returns:
+      handle to the config_db for a namespace
+    """
+    config_dbs = _get_thread_state().config_dbs
+    config_db = config_dbs.get(namespace)
+    if config_db is None:
+        config_db = connect_config_db_for_ns(namespace)
+        config_dbs[namespace] = config_db
+    return config_db
+
+
+def _query_config_db(namespace, query):
+    """
+    Run a query on the pooled connection to the config DB of a namespace.
+    The pooled connection may be broken, e.g. after a restart of the database,
+    so if the query fails, the connection is dropped and the query is retried
+    once on a new connection
+
+    Args:
+      namespace: namespace of the config DB
+      query: function which takes the config DB handle and returns the result
+
+    Returns:
+      the result of the query
+    """
+    try:
+        return query(get_config_db_for_ns(namespace))
+    except Exception:
+        _get_thread_state().config_dbs.pop(namespace, None)
+
+    try:
+        return query(get_config_db_for_ns(namespace))
+    except Exception:
+        _get_thread_state().config_dbs.pop(namespace, None)
+        raise
+
+
+def clear_cache():
+    """
+    Drop the pooled connections of the calling thread, the port index and the
+    parsed asic.conf. Should be called when the configuration is reloaded
+    """
+    global _current_namespace
+
+    state = _get_thread_state()
+    state.config_dbs = {}
+    state.port_index = None
+    _asic_conf_cache.clear()
+    _current_namespace = None
+
+
+class PortIndex(object):
+    """
+    Index of PORT tables of config DBs of namespaces. A table is read on first
+    use, and read again after a keyspace notification of a change in the table.
+    If notifications aren't available, the table is read on every use
+    """
+    NOTIFICATION_TYPES = ('message', 'pmessage')
+
+    def __init__(self):
+        self.tables = {}   # namespace -> PORT table
+        self.pubsubs = {}  # namespace -> subscription to changes of PORT table or None
+
+    def _subscribe(self, namespace, config_db):
+        try:
+            db_name = config_db.db_name
+            pubsub = config_db.get_redis_client(db_name).pubsub()
+            pubsub.psubscribe("__keyspace@{}__:{}{}*".format(config_db.get_dbid(db_name),
+                                                             PORT_CFG_DB_TABLE, config_db.KEY_SEPARATOR))
+        except Exception:
+            pubsub = None
+        self.pubsubs[namespace] = pubsub
+
+    def _is_changed(self, namespace):
+        pubsub = self.pubsubs.get(namespace)
+        if pubsub is None:
+            return True
+
+        changed = False
+        try:
+            while True:
+                message = pubsub.get_message()
+                if not message:
+                    break
+                if message.get('type') in self.NOTIFICATION_TYPES:
+                    changed = True
+        except Exception:
+            self.pubsubs[namespace] = None
+            changed = True
+        return changed
+
+    def get_table(self, namespace):
+        """
+        Returns:
+          the PORT table of a namespace. It must not be modified by the caller
+        """
+        if namespace in self.tables and not self._is_changed(namespace):
+            return self.tables[namespace]
+
+        def read_table(config_db):
+            if namespace not in self.pubsubs:
+                # Subscribe before reading, so a change during the read isn't missed
+                self._subscribe(namespace, config_db)
+            try:
+                return config_db.get_table(PORT_CFG_DB_TABLE)
+            except Exception:
+                # Subscribe again with the new connection
+                self.pubsubs.pop(namespace, None)
+                raise
+
+        table = _query_config_db(namespace, read_table)
+        self.tables[namespace] = table
+        return table
+
+
+def get_port_index():
+    """
+    Get the index of PORT tables of the calling thread
+
+    Returns:
+      PortIndex object
+    """
+    state = _get_thread_state()
+    if state.port_index is None:
+        state.port_index = PortIndex()
+    return state.port_index
+
+
 def connect_to_all_dbs_for_ns(namespace=DEFAULT_NAMESPACE):
     """
     The function connects to the DBs for a given namespace and
@@ -100,6 +257,31 @@ def get_asic_conf_file_path():
     return None
 
 
+def _read_asic_conf(asic_conf_file_path):
+    """
+    Parse the ASIC conguration file. The result is cached until the
+    modification time of the file changes
+
+    Returns:
+        A list of tuples (key, value)
+    """
+    mtime = os.stat(asic_conf_file_path).st_mtime
+    cached = _asic_conf_cache.get(asic_conf_file_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    asic_conf = []
+    with open(asic_conf_file_path) as asic_conf_file:
+        for line in asic_conf_file:
+            tokens = line.split('=')
+            if len(tokens) < 2:
+                continue
+            asic_conf.append((tokens[0], tokens[1].strip()))
+
+    _asic_conf_cache[asic_conf_file_path] = (mtime, asic_conf)
+    return asic_conf
+
+
 def get_num_asics():
     """
     Retrieves the num of asics present in the multi ASIC platform
@@ -112,14 +294,10 @@ def get_num_asics():
     if asic_conf_file_path is None:
         return 1
 
-    with open(asic_conf_file_path) as asic_conf_file:
-        for line in asic_conf_file:
-            tokens = line.split('=')
-            if len(tokens) < 2:
-                continue
-            if tokens[0].lower() == 'num_asic':
-                num_asics = tokens[1].strip()
-        return int(num_asics)
+    for key, value in _read_asic_conf(asic_conf_file_path):
+        if key.lower() == 'num_asic':
+            num_asics = value
+    return int(num_asics)
 
 
 def is_multi_asic():
@@ -160,14 +338,9 @@ def get_asic_device_id(asic_id):
     # DEV_ID_ASIC_1=04:00.0
     device_str = "DEV_ID_ASIC_{}".format(asic_id)
 
-    with open(asic_conf_file_path) as asic_conf_file:
-        for line in asic_conf_file:
-            tokens = line.split('=')
-            if len(tokens) < 2:
-               continue
-            if tokens[0] == device_str:
-                device_id = tokens[1].strip()
-                return device_id
+    for key, value in _read_asic_conf(asic_conf_file_path):
+        if key == device_str:
+            return value
 
     return None
 
@@ -175,7 +348,12 @@ def get_current_namespace(pid=None):
     """
     This API returns the network namespace in which it is
     invoked. In case of global namepace the API returns None
+    The namespace of the current process is cached
     """
+    global _current_namespace
+
+    if pid is None and _current_namespace is not None and _current_namespace[0] == os.getpid():
+        return _current_namespace[1]
 
     net_namespace = None
     command = ["sudo /bin/ip netns identify {}".format(os.getpid() if not pid else pid)]
@@ -197,6 +375,8 @@ def get_current_namespace(pid=None):
     except OSError as e:
         raise OSError("Error running command {}".format(command))
 
+    if pid is None:
+        _current_namespace = (os.getpid(), net_namespace)
     return net_namespace
 
 
@@ -237,9 +417,7 @@ def get_all_namespaces():
     if is_multi_asic():
         for asic in range(num_asics):
             namespace = "{}{}".format(ASIC_NAME_PREFIX, asic)
-            config_db = connect_config_db_for_ns(namespace)
-
-            metadata = config_db.get_table('DEVICE_METADATA')
+            metadata = _query_config_db(namespace, lambda config_db: config_db.get_table('DEVICE_METADATA'))
             if metadata['localhost']['sub_role'] == FRONTEND_ASIC_SUB_ROLE:
                 front_ns.append(namespace)
             elif metadata['localhost']['sub_role'] == BACKEND_ASIC_SUB_ROLE:
@@ -299,25 +477,24 @@ def get_port_table(namespace=None):
 
 def get_port_entry_for_asic(port, namespace):
 
-    config_db = connect_config_db_for_ns(namespace)
-    ports = config_db.get_entry(PORT_CFG_DB_TABLE, port)
-    return ports
+    ports = get_port_index().get_table(namespace)
+    return dict(ports.get(port, {}))
 
 
 def get_port_table_for_asic(namespace):
 
-    config_db = connect_config_db_for_ns(namespace)
-    ports = config_db.get_table(PORT_CFG_DB_TABLE)
-    return ports
+    ports = get_port_index().get_table(namespace)
+    return {port: dict(entry) for port, entry in ports.items()}
 
 
 def get_namespace_for_port(port_name):
 
     ns_list = get_namespace_list()
     port_namespace = None
+    port_index = get_port_index()
 
     for ns in ns_list:
-        ports = get_port_table_for_asic(ns)
+        ports = port_index.get_table(ns)
         if port_name in ports:
             port_namespace = ns
             break
@@ -370,8 +547,7 @@ def is_port_channel_internal(port_channel, namespace=None):
     ns_list = get_namespace_list(namespace)
 
     for ns in ns_list:
-        config_db = connect_config_db_for_ns(ns)
-        port_channels = config_db.get_entry(PORT_CHANNEL_CFG_DB_TABLE, port_channel)
+        port_channels = _query_config_db(ns, lambda config_db: config_db.get_entry(PORT_CHANNEL_CFG_DB_TABLE, port_channel))
 
         if port_channels:
             if 'members' in port_channels:
@@ -396,8 +572,7 @@ def get_back_end_interface_set(namespace=None):
     if len(bk_end_intf_list):
         ns_list = get_namespace_list(namespace)
         for ns in ns_list:
-            config_db = connect_config_db_for_ns(ns)
-            port_channels = config_db.get_table(PORT_CHANNEL_CFG_DB_TABLE)
+            port_channels = _query_config_db(ns, lambda config_db: config_db.get_table(PORT_CHANNEL_CFG_DB_TABLE))
             # a back-end LAG must be configured with all of its member from back-end interfaces.
             # mixing back-end and front-end interfaces is miss configuration and not allowed.
             # To determine if a LAG is back-end LAG, just need to check its first member is back-end or not
@@ -418,16 +593,15 @@ def is_bgp_session_internal(bgp_neigh_ip, namespace=None):
 
     for ns in ns_list:
 
-        config_db = connect_config_db_for_ns(ns)
-        bgp_sessions = config_db.get_entry(
+        bgp_sessions = _query_config_db(ns, lambda config_db: config_db.get_entry(
             BGP_INTERNAL_NEIGH_CFG_DB_TABLE, bgp_neigh_ip
-        )
+        ))
         if bgp_sessions:
             return True
 
-        bgp_sessions = config_db.get_entry(
+        bgp_sessions = _query_config_db(ns, lambda config_db: config_db.get_entry(
             'BGP_VOQ_CHASSIS_NEIGHBOR', bgp_neigh_ip
-        )
+        ))
         if bgp_sessions:
             return True
 
@@ -1,3 +1,4 @@
+import json
 import os
 import sys
 
@@ -15,6 +16,9 @@ from sonic_py_common import device_info
 
 from .mock_swsssdk import SonicV2Connector
 
+# The tests replace it to not read the snapshot of the test host
+LOAD_SNAPSHOT = device_info._load_snapshot
+
 # TODO: Remove this if/else block once we no longer support Python 2
 if sys.version_info.major == 3:
     BUILTINS = "builtins"
@@ -60,6 +64,14 @@ class TestDeviceInfo(object):
         with mock.patch.dict(os.environ, {}, clear=True):
             yield
 
+    @pytest.fixture(autouse=True)
+    def clear_device_info_cache(self):
+        # Start each test with an empty cache and without the snapshot of the test host
+        device_info.clear_cache()
+        with mock.patch("sonic_py_common.device_info._load_snapshot"):
+            yield
+        device_info.clear_cache()
+
     def test_get_machine_info(self):
         with mock.patch("os.path.isfile") as mock_isfile:
             mock_isfile.return_value = True
@@ -75,6 +87,65 @@ class TestDeviceInfo(object):
             result = device_info.get_platform()
             assert result == "x86_64-mlnx_msn2700-r0"
 
+    def test_get_machine_info_cached(self):
+        with mock.patch("os.path.isfile") as mock_isfile:
+            mock_isfile.return_value = True
+            open_mocked = mock.mock_open(read_data=MACHINE_CONF_CONTENTS)
+            with mock.patch("{}.open".format(BUILTINS), open_mocked):
+                result = device_info.get_machine_info()
+                result['onie_platform'] = 'modified'
+                assert device_info.get_machine_info() == EXPECTED_GET_MACHINE_INFO_RESULT
+                open_mocked.assert_called_once_with("/host/machine.conf")
+
+    def test_get_platform_not_cached_if_unknown(self):
+        with mock.patch("sonic_py_common.device_info.get_machine_info") as get_machine_info_mocked, \
+                mock.patch("sonic_py_common.device_info.get_localhost_info") as get_localhost_info_mocked:
+            get_machine_info_mocked.return_value = None
+            get_localhost_info_mocked.return_value = None
+            assert device_info.get_platform() is None
+            get_machine_info_mocked.return_value = EXPECTED_GET_MACHINE_INFO_RESULT
+            assert device_info.get_platform() == "x86_64-mlnx_msn2700-r0"
+            assert device_info.get_platform() == "x86_64-mlnx_msn2700-r0"
+            assert get_machine_info_mocked.call_count == 2
+
+    def test_device_info_snapshot(self, tmp_path):
+        snapshot_path = str(tmp_path / "device-info.json")
+        with mock.patch("sonic_py_common.device_info.DEVICE_INFO_SNAPSHOT_PATH", snapshot_path), \
+                mock.patch("sonic_py_common.device_info.get_machine_info") as get_machine_info_mocked, \
+                mock.patch("sonic_py_common.device_info.get_sonic_version_info") as get_sonic_version_info_mocked, \
+                mock.patch("sonic_py_common.device_info.get_system_mac") as get_system_mac_mocked, \
+                mock.patch("sonic_py_common.device_info.get_num_npus") as get_num_npus_mocked, \
+                mock.patch("sonic_py_common.device_info.is_supervisor") as is_supervisor_mocked:
+            get_machine_info_mocked.return_value = EXPECTED_GET_MACHINE_INFO_RESULT
+            get_sonic_version_info_mocked.return_value = {'asic_type': 'mellanox'}
+            get_system_mac_mocked.return_value = '00:11:22:33:44:55'
+            get_num_npus_mocked.return_value = 1
+            is_supervisor_mocked.return_value = False
+            device_info.write_device_info_snapshot()
+            assert not get_system_mac_mocked.called
+
+        with open(snapshot_path) as snapshot_file:
+            assert json.load(snapshot_file) == {
+                'machine_info': EXPECTED_GET_MACHINE_INFO_RESULT,
+                'platform': 'x86_64-mlnx_msn2700-r0',
+                'sonic_version_info': {'asic_type': 'mellanox'},
+                'num_npus': 1,
+                'is_supervisor': False,
+            }
+
+        # Another process takes the facts from the snapshot without reading the files
+        device_info.clear_cache()
+        with mock.patch("sonic_py_common.device_info.DEVICE_INFO_SNAPSHOT_PATH", snapshot_path), \
+                mock.patch("sonic_py_common.device_info._load_snapshot", LOAD_SNAPSHOT), \
+                mock.patch("os.path.isfile") as mock_isfile:
+            mock_isfile.return_value = False
+            assert device_info.get_platform() == "x86_64-mlnx_msn2700-r0"
+            assert device_info.get_machine_info() == EXPECTED_GET_MACHINE_INFO_RESULT
+            assert device_info.get_sonic_version_info() == {'asic_type': 'mellanox'}
+            assert device_info.get_num_npus() == 1
+            assert device_info.is_supervisor() is False
+            assert not mock_isfile.called
+
     def test_get_chassis_info(self):
         with mock.patch("sonic_py_common.device_info.SonicV2Connector", new=SonicV2Connector):
             result = device_info.get_chassis_info()
@@ -0,0 +1,166 @@
+import os
+import sys
+
+# TODO: Remove this if/else block once we no longer support Python 2
+if sys.version_info.major == 3:
+    from unittest import mock
+else:
+    # Expect the 'mock' package for python 2
+    # https://pypi.python.org/pypi/mock
+    import mock
+
+import pytest
+
+from sonic_py_common import multi_asic
+
+ASIC_CONF_CONTENTS = """\
+NUM_ASIC=3
+DEV_ID_ASIC_0=03:00.0
+DEV_ID_ASIC_1=04:00.0
+DEV_ID_ASIC_2=05:00.0
+"""
+
+
+class MockPubSub(object):
+    def __init__(self):
+        self.messages = []
+
+    def psubscribe(self, pattern):
+        self.pattern = pattern
+        self.messages.append({'type': 'psubscribe', 'channel': pattern, 'data': 1})
+
+    def get_message(self):
+        return self.messages.pop(0) if self.messages else None
+
+
+class MockConfigDBConnector(object):
+    KEY_SEPARATOR = '|'
+    instances = []
+    tables = {}
+
+    def __init__(self, namespace=''):
+        self.namespace = namespace
+        self.db_name = 'CONFIG_DB'
+        self.pubsub = MockPubSub()
+        self.get_table_calls = 0
+        self.broken = False
+        MockConfigDBConnector.instances.append(self)
+
+    def connect(self):
+        pass
+
+    def get_redis_client(self, db_name):
+        return mock.Mock(pubsub=mock.Mock(return_value=self.pubsub))
+
+    def get_dbid(self, db_name):
+        return 4
+
+    def get_table(self, table):
+        self.get_table_calls += 1
+        if self.broken:
+            raise RuntimeError('database restarted')
+        return MockConfigDBConnector.tables[self.namespace].get(table, {})
+
+    def get_entry(self, table, key):
+        return self.get_table(table).get(key, {})
+
+
+class TestMultiAsic(object):
+    @pytest.fixture(autouse=True)
+    def setup_cache(self):
+        multi_asic.clear_cache()
+        MockConfigDBConnector.instances = []
+        MockConfigDBConnector.tables = {
+            'asic0': {'PORT': {'Ethernet0': {'role': 'Ext'}, 'Ethernet-BP0': {'role': 'Int'}}},
+            'asic1': {'PORT': {'Ethernet4': {'alias': 'etp2'}}},
+        }
+        with mock.patch.object(multi_asic.swsscommon, 'ConfigDBConnector', MockConfigDBConnector):
+            yield
+        multi_asic.clear_cache()
+
+    def test_asic_conf(self, tmp_path):
+        asic_conf = tmp_path / 'asic.conf'
+        asic_conf.write_text(ASIC_CONF_CONTENTS)
+        with mock.patch('sonic_py_common.multi_asic.get_asic_conf_file_path', return_value=str(asic_conf)):
+            assert multi_asic.get_num_asics() == 3
+            with mock.patch('sonic_py_common.multi_asic.open', side_effect=AssertionError('asic.conf is read again')):
+                assert multi_asic.is_multi_asic()
+                assert multi_asic.get_asic_device_id(1) == '04:00.0'
+
+            asic_conf.write_text(ASIC_CONF_CONTENTS.replace('NUM_ASIC=3', 'NUM_ASIC=1'))
+            os.utime(str(asic_conf), (0, 0))
+            assert multi_asic.get_num_asics() == 1
+
+    @mock.patch('sonic_py_common.multi_asic.is_multi_asic', mock.MagicMock(return_value=True))
+    @mock.patch('sonic_py_common.multi_asic.get_namespaces_from_linux', mock.MagicMock(return_value=['asic0', 'asic1']))
+    def test_port_index(self):
+        assert multi_asic.get_namespace_for_port('Ethernet4') == 'asic1'
+        assert multi_asic.get_port_role('Ethernet0') == 'Ext'
+        assert multi_asic.is_port_internal('Ethernet-BP0')
+        assert multi_asic.get_port_role('Ethernet4') == 'Ext'
+        with pytest.raises(ValueError):
+            multi_asic.get_port_role('Ethernet8')
+
+        # One connection and one read of PORT table per namespace
+        assert [config_db.namespace for config_db in MockConfigDBConnector.instances] == ['asic0', 'asic1']
+        assert all(config_db.get_table_calls == 1 for config_db in MockConfigDBConnector.instances)
+
+        # Changing the returned entries doesn't affect the index
+        multi_asic.get_port_entry('Ethernet0', 'asic0')['role'] = 'Int'
+        assert not multi_asic.is_port_internal('Ethernet0')
+
+        # A change of PORT table is notified
+        asic1 = MockConfigDBConnector.instances[1]
+        MockConfigDBConnector.tables['asic1']['PORT']['Ethernet8'] = {'role': 'Int'}
+        asic1.pubsub.messages.append({'type': 'pmessage', 'channel': '__keyspace@4__:PORT|Ethernet8', 'data': 'hset'})
+        assert multi_asic.get_namespace_for_port('Ethernet8') == 'asic1'
+        assert asic1.pubsub.pattern == '__keyspace@4__:PORT|*'
+        assert asic1.get_table_calls == 2
+
+        # Explicit refresh
+        multi_asic.clear_cache()
+        assert multi_asic.get_port_table() == {
+            'Ethernet0': {'role': 'Ext'},
+            'Ethernet-BP0': {'role': 'Int'},
+            'Ethernet4': {'alias': 'etp2'},
+            'Ethernet8': {'role': 'Int'},
+        }
+        assert len(MockConfigDBConnector.instances) == 4
+
+    @mock.patch('sonic_py_common.multi_asic.is_multi_asic', mock.MagicMock(return_value=True))
+    @mock.patch('sonic_py_common.multi_asic.get_namespaces_from_linux', mock.MagicMock(return_value=['asic0', 'asic1']))
+    def test_broken_connection(self):
+        MockConfigDBConnector.tables['asic0']['PORTCHANNEL'] = {'PortChannel01': {'members': ['Ethernet-BP0']}}
+        assert multi_asic.is_port_channel_internal('PortChannel01', 'asic0')
+        assert len(MockConfigDBConnector.instances) == 1
+
+        # The pooled connection is replaced and the query is retried
+        MockConfigDBConnector.instances[0].broken = True
+        assert multi_asic.get_back_end_interface_set('asic0') == {'Ethernet-BP0', 'PortChannel01'}
+        assert len(MockConfigDBConnector.instances) == 2
+        assert multi_asic.is_port_channel_internal('PortChannel01', 'asic0')
+        assert len(MockConfigDBConnector.instances) == 2
+
+        # The PORT index subscribes again with the new connection
+        MockConfigDBConnector.instances[1].broken = True
+        multi_asic.get_port_index().tables.clear()
+        assert multi_asic.get_port_role('Ethernet0', 'asic0') == 'Ext'
+        assert len(MockConfigDBConnector.instances) == 3
+        assert MockConfigDBConnector.instances[2].pubsub.pattern == '__keyspace@4__:PORT|*'
+
+        # The error is raised if the new connection fails as well
+        MockConfigDBConnector.instances[2].broken = True
+        with mock.patch.object(MockConfigDBConnector, 'get_table', side_effect=RuntimeError('database is down')):
+            with pytest.raises(RuntimeError):
+                multi_asic.is_port_channel_internal('PortChannel01', 'asic0')
+        assert 'asic0' not in multi_asic._get_thread_state().config_dbs
+
+    def test_current_namespace(self):
+        with mock.patch('sonic_py_common.multi_asic.subprocess.Popen') as mock_popen:
+            mock_popen.return_value.communicate.return_value = ('asic0\n', None)
+            mock_popen.return_value.returncode = 0
+            assert multi_asic.get_current_namespace() == 'asic0'
+            assert multi_asic.get_current_namespace() == 'asic0'
+            assert mock_popen.call_count == 1
+            assert multi_asic.get_current_namespace(pid=1) == 'asic0'
+            assert mock_popen.call_count == 2
@@ -12,6 +12,15 @@ class Config(object):
     # Default system health check interval
     DEFAULT_INTERVAL = 60
 
+    # Default time budget in seconds of one checker. A checker which doesn't finish in time is reported as not OK.
+    DEFAULT_CHECKER_TIMEOUT = 30
+
+    # Default timeout in seconds of a command executed by a checker, e.g. a user defined checker or "docker exec".
+    DEFAULT_COMMAND_TIMEOUT = 10
+
+    # Default maximum number of checkers and probes which run at the same time.
+    DEFAULT_MAX_WORKERS = 8
+
     # Default boot up timeout. When reboot system, system health will wait a few seconds before starting to work.
     DEFAULT_BOOTUP_TIMEOUT = 300
 
@@ -44,6 +53,9 @@ class Config(object):
         self.ignore_services = None
         self.ignore_devices = None
         self.user_defined_checkers = None
+        self.checker_timeout = Config.DEFAULT_CHECKER_TIMEOUT
+        self.command_timeout = Config.DEFAULT_COMMAND_TIMEOUT
+        self.max_workers = Config.DEFAULT_MAX_WORKERS
 
     def config_file_exists(self):
         return os.path.exists(self._config_file)
@@ -72,6 +84,9 @@ class Config(object):
                 self.ignore_services = self._get_list_data('services_to_ignore')
                 self.ignore_devices = self._get_list_data('devices_to_ignore')
                 self.user_defined_checkers = self._get_list_data('user_defined_checkers')
+                self.checker_timeout = self.config_data.get('checker_timeout', Config.DEFAULT_CHECKER_TIMEOUT)
+                self.command_timeout = self.config_data.get('command_timeout', Config.DEFAULT_COMMAND_TIMEOUT)
+                self.max_workers = self.config_data.get('max_workers', Config.DEFAULT_MAX_WORKERS)
             except Exception as e:
                 self._reset()
 
@@ -86,6 +101,9 @@ class Config(object):
         self.ignore_services = None
         self.ignore_devices = None
         self.user_defined_checkers = None
+        self.checker_timeout = Config.DEFAULT_CHECKER_TIMEOUT
+        self.command_timeout = Config.DEFAULT_COMMAND_TIMEOUT
+        self.max_workers = Config.DEFAULT_MAX_WORKERS
 
     def get_led_color(self, status):
         """
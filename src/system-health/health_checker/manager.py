@@ -1,3 +1,6 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
 from . import utils
 from .config import Config
 from .health_checker import HealthChecker
@@ -9,14 +12,30 @@ from .user_defined_checker import UserDefinedChecker
 class HealthCheckerManager(object):
     """
     Manage all system health checkers and system health configuration.
+
+    Checkers run concurrently on a bounded thread pool. Each checker has a time budget, a checker which doesn't finish
+    in time is reported as not OK and is not started again until the running check completes. Results are merged in
+    the order of checkers, so they don't depend on the order in which the checkers complete.
     """
     STATE_BOOTING = 'booting'
     STATE_RUNNING = 'running'
     boot_timeout = None
 
+    # Results of a checker in checker_stats
+    RESULT_OK = 'OK'
+    RESULT_ERROR = 'Error'
+    RESULT_TIMEOUT = 'Timeout'
+    RESULT_BUSY = 'Busy'
+
     def __init__(self):
         self._checkers = []
         self._state = self.STATE_BOOTING
+        self._executor = None
+        self._max_workers = None
+        # Checks which exceeded their time budget and are still running. checker name -> future
+        self._running_checks = {}
+        # Statistic of the last check. checker name -> dict with 'result' and 'latency' in milliseconds
+        self.checker_stats = {}
 
         self.config = Config()
         self.initialize()
@@ -45,28 +64,96 @@ class HealthCheckerManager(object):
             self._set_system_led(chassis, self.config, 'booting')
             return self._state, stats
 
-        for checker in self._checkers:
-            self._do_check(checker, stats)
-
+        checkers = list(self._checkers)
         if self.config.user_defined_checkers:
-            for udc in self.config.user_defined_checkers:
-                checker = UserDefinedChecker(udc)
-                self._do_check(checker, stats)
+            for udc in sorted(self.config.user_defined_checkers):
+                checkers.append(UserDefinedChecker(udc))
+
+        self._run_checkers(checkers, stats)
 
         led_status = 'normal' if HealthChecker.summary == HealthChecker.STATUS_OK else 'fault'
         self._set_system_led(chassis, self.config, led_status)
 
         return self._state, stats
 
+    def _get_executor(self):
+        if self._executor is None or self._max_workers != self.config.max_workers:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._max_workers = self.config.max_workers
+            self._executor = ThreadPoolExecutor(max_workers=self._max_workers)
+        return self._executor
+
+    def _run_checkers(self, checkers, stats):
+        """
+        Run checkers concurrently and collect the check statistic in the order of checkers.
+        :param checkers: A list of checker objects.
+        :param stats: Check statistic.
+        :return:
+        """
+        executor = self._get_executor()
+        self.checker_stats = {}
+        futures = []
+        for checker in checkers:
+            running_check = self._running_checks.get(str(checker))
+            if running_check is not None and not running_check.done():
+                futures.append(None)
+                continue
+            self._running_checks.pop(str(checker), None)
+            futures.append(executor.submit(self._timed_check, checker))
+
+        deadline = time.monotonic() + self.config.checker_timeout
+        for checker, future in zip(checkers, futures):
+            if future is None:
+                self._set_checker_stats(checker, self.RESULT_BUSY, 0)
+                self._set_internal_error(checker, stats, 'Health check for {} is still running'.format(checker))
+                continue
+
+            try:
+                latency, error = future.result(timeout=max(deadline - time.monotonic(), 0))
+            except TimeoutError:
+                self._running_checks[str(checker)] = future
+                self._set_checker_stats(checker, self.RESULT_TIMEOUT, self.config.checker_timeout)
+                self._set_internal_error(checker, stats, 'Health check for {} did not finish in {} seconds'.format(
+                    checker, self.config.checker_timeout))
+                continue
+
+            if error is not None:
+                self._set_checker_stats(checker, self.RESULT_ERROR, latency)
+                self._set_internal_error(checker, stats, 'Failed to perform health check for {} due to exception - {}'.format(
+                    checker, repr(error)))
+                continue
+
+            self._set_checker_stats(checker, self.RESULT_OK, latency)
+            self._do_check(checker, stats)
+
+    def _timed_check(self, checker):
+        """
+        Perform the check of a checker. Called in a thread of the pool.
+        :param checker: A checker object.
+        :return: A tuple. Duration of the check in seconds and the exception raised by the check or None.
+        """
+        start = time.monotonic()
+        try:
+            checker.check(self.config)
+        except Exception as e:
+            return time.monotonic() - start, e
+        return time.monotonic() - start, None
+
+    def _set_checker_stats(self, checker, result, latency):
+        self.checker_stats[str(checker)] = {
+            'result': result,
+            'latency': int(latency * 1000)
+        }
+
     def _do_check(self, checker, stats):
         """
-        Do check for a particular checker and collect the check statistic.
+        Collect the check statistic of a particular checker which has performed the check.
         :param checker: A checker object.
         :param stats: Check statistic.
         :return:
         """
         try:
-            checker.check(self.config)
             category = checker.get_category()
             info = checker.get_info()
             if category not in stats:
@@ -74,17 +161,29 @@ class HealthCheckerManager(object):
             else:
                 stats[category].update(info)
         except Exception as e:
-            HealthChecker.summary = HealthChecker.STATUS_NOT_OK
             error_msg = 'Failed to perform health check for {} due to exception - {}'.format(checker, repr(e))
-            entry = {str(checker): {
-                HealthChecker.INFO_FIELD_OBJECT_STATUS: HealthChecker.STATUS_NOT_OK,
-                HealthChecker.INFO_FIELD_OBJECT_MSG: error_msg,
-                HealthChecker.INFO_FIELD_OBJECT_TYPE: "Internal"
-            }}
-            if 'Internal' not in stats:
-                stats['Internal'] = entry
-            else:
-                stats['Internal'].update(entry)
+            self._set_internal_error(checker, stats, error_msg)
+
+    def _set_internal_error(self, checker, stats, error_msg):
+        HealthChecker.summary = HealthChecker.STATUS_NOT_OK
+        entry = {str(checker): {
+            HealthChecker.INFO_FIELD_OBJECT_STATUS: HealthChecker.STATUS_NOT_OK,
+            HealthChecker.INFO_FIELD_OBJECT_MSG: error_msg,
+            HealthChecker.INFO_FIELD_OBJECT_TYPE: "Internal"
+        }}
+        if 'Internal' not in stats:
+            stats['Internal'] = entry
+        else:
+            stats['Internal'].update(entry)
+
+    def shutdown(self):
+        """
+        Stop the thread pool. Checks which are still running are not waited for.
+        :return:
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
 
     def _is_system_booting(self):
         uptime = utils.get_uptime()
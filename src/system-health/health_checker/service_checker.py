@@ -2,6 +2,7 @@ import docker
 import os
 import pickle
 import re
+from concurrent.futures import ThreadPoolExecutor
 
 from swsscommon import swsscommon
 from sonic_py_common import multi_asic
@@ -31,6 +32,17 @@ class ServiceChecker(HealthChecker):
 
     # Command to get summary of critical system service.
     CHECK_CMD = 'monit summary -B'
+
+    # Command to get status of processes in a container.
+    SUPERVISOR_STATUS_CMD = 'docker exec {} bash -c "supervisorctl status"'
+
+    # Table in STATE_DB with state of processes of containers. It's updated by supervisor-proc-exit-listener
+    # in every container. Key format: PROCESS_STATE|<container_name>|<process_name>
+    PROCESS_STATE_TABLE = 'PROCESS_STATE'
+
+    # Table in STATE_DB with the containers whose processes are all in PROCESS_STATE_TABLE.
+    # Key format: PROCESS_STATE_SNAPSHOT|<container_name>
+    PROCESS_STATE_SNAPSHOT_TABLE = 'PROCESS_STATE_SNAPSHOT'
     MIN_CHECK_CMD_LINES = 3
 
     # Expect status for different system service category.
@@ -210,12 +222,16 @@ class ServiceChecker(HealthChecker):
         :param config: Health checker configuration.
         :return:
         """
-        output = utils.run_command(ServiceChecker.CHECK_MONIT_SERVICE_CMD)
+        output = utils.run_command(ServiceChecker.CHECK_MONIT_SERVICE_CMD, self._get_command_timeout(config))
         if not output or output.strip() != 'active':
             self.set_object_not_ok('Service', 'monit', 'monit service is not running')
             return
 
-        output = utils.run_command(ServiceChecker.CHECK_CMD)
+        output = utils.run_command(ServiceChecker.CHECK_CMD, self._get_command_timeout(config))
+        if output is None:
+            self.set_object_not_ok('Service', 'monit', 'failed to get output of \"monit summary -B\"')
+            return
+
         lines = output.splitlines()
         if not lines or len(lines) < ServiceChecker.MIN_CHECK_CMD_LINES:
             self.set_object_not_ok('Service', 'monit', 'output of \"monit summary -B\" is invalid or incompatible')
@@ -269,8 +285,22 @@ class ServiceChecker(HealthChecker):
             self.set_object_not_ok('Service', 'system', 'no critical process found')
             return
 
-        for container, critical_process_list in self.container_critical_processes.items():
-            self.check_process_existence(container, critical_process_list, config, feature_table)
+        containers = sorted(container for container in self.container_critical_processes
+                            if self._is_container_enabled(container, feature_table))
+
+        # Process states published to STATE_DB are used for running containers. Other containers are queried
+        # all at the same time. The results are handled in the order of container names, so the result of the
+        # check doesn't depend on the order in which the queries complete.
+        process_states = self.get_process_states_from_db()
+        query_containers = [container for container in containers
+                            if container not in process_states or container not in current_running_containers]
+        process_statuses = self.get_process_statuses(query_containers, config)
+        for container in containers:
+            critical_process_list = self.container_critical_processes[container]
+            if container in process_statuses:
+                self.check_process_existence(container, critical_process_list, config, process_statuses[container])
+            else:
+                self.check_process_states(container, critical_process_list, config, process_states[container])
 
         for bad_container in self.bad_containers:
             self.set_object_not_ok('Service', bad_container, 'Syntax of critical_processes file is incorrect')
@@ -305,41 +335,126 @@ class ServiceChecker(HealthChecker):
             data[items[0].strip()] = items[1].strip()
         return data
 
-    def check_process_existence(self, container_name, critical_process_list, config, feature_table):
+    def _is_container_enabled(self, container_name, feature_table):
+        """Check whether the feature of a container is enabled in the FEATURE table.
+
+        Args:
+            container_name (str): Container name
+            feature_table (object): Feature table
+        """
+        feature_name = self.container_feature_dict[container_name]
+        # We look into the 'FEATURE' table to verify whether the container is disabled or not.
+        return (feature_name in feature_table
+                and "state" in feature_table[feature_name]
+                and feature_table[feature_name]["state"] not in ["disabled", "always_disabled"])
+
+    @staticmethod
+    def _get_command_timeout(config):
+        return config.command_timeout if config else None
+
+    def get_process_states_from_db(self):
+        """Get state of processes of all containers from STATE_DB of the host and of every namespace.
+        Containers whose listener hasn't published the states of all of their processes are left out,
+        as the states of processes which didn't change since the listener started are missing.
+
+        Returns:
+            A dictionary {<container_name>:{<process_name>:<state>}}
+        """
+        namespaces = [multi_asic.DEFAULT_NAMESPACE]
+        if multi_asic.is_multi_asic():
+            namespaces.extend(multi_asic.get_namespace_list())
+
+        process_states = {}
+        for namespace in namespaces:
+            try:
+                db = swsscommon.SonicV2Connector(use_unix_socket_path=True, namespace=namespace)
+                db.connect(db.STATE_DB)
+                redis_client = db.get_redis_client(db.STATE_DB)
+                # One pattern covers both PROCESS_STATE_TABLE and PROCESS_STATE_SNAPSHOT_TABLE
+                keys = redis_client.keys(ServiceChecker.PROCESS_STATE_TABLE + '*')
+                complete_containers = set()
+                process_keys = []
+                for key in keys or []:
+                    table, _, name = key.partition('|')
+                    if table == ServiceChecker.PROCESS_STATE_SNAPSHOT_TABLE:
+                        complete_containers.add(name)
+                    elif table == ServiceChecker.PROCESS_STATE_TABLE:
+                        process_keys.append(name)
+                # Read the states of all processes of the namespace in one round trip
+                pipe = redis_client.pipeline(transaction=False)
+                for name in process_keys:
+                    pipe.hgetall('{}|{}'.format(ServiceChecker.PROCESS_STATE_TABLE, name))
+                namespace_process_states = {}
+                for name, fvs in zip(process_keys, pipe.execute() if process_keys else []):
+                    container, _, process_name = name.partition('|')
+                    state = fvs.get('state')
+                    if state:
+                        namespace_process_states.setdefault(container, {})[process_name] = state
+                for container, states in namespace_process_states.items():
+                    if container in complete_containers:
+                        process_states[container] = states
+            except Exception as e:
+                logger.log_warning("Failed to get process states from STATE_DB of namespace '{}': {}".format(namespace, repr(e)))
+
+        return process_states
+
+    def get_process_statuses(self, containers, config):
+        """Get output of "supervisorctl status" of containers. The containers are queried concurrently.
+
+        Args:
+            containers (list): Container names
+            config (object): Health checker configuration.
+
+        Returns:
+            A dictionary {<container_name>:<output of supervisorctl status or None on failure>}
+        """
+        if not containers:
+            return {}
+
+        # We are using supervisorctl status to check the critical process status. We cannot leverage psutil here because
+        # it not always possible to get process cmdline in supervisor.conf. E.g, cmdline of orchagent is "/usr/bin/orchagent",
+        # however, in supervisor.conf it is "/usr/bin/orchagent.sh"
+        timeout = self._get_command_timeout(config)
+        max_workers = min(config.max_workers if config else 1, len(containers))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            outputs = executor.map(lambda container: utils.run_command(ServiceChecker.SUPERVISOR_STATUS_CMD.format(container), timeout),
+                                   containers)
+            return dict(zip(containers, outputs))
+
+    def check_process_existence(self, container_name, critical_process_list, config, process_status):
         """Check whether the process in the specified container is running or not.
 
         Args:
             container_name (str): Container name
             critical_process_list (list): Critical processes
             config (object): Health checker configuration.
-            feature_table (object): Feature table
+            process_status (str): Output of "supervisorctl status" in the container, None if it failed
         """
-        feature_name = self.container_feature_dict[container_name]
-        if feature_name in feature_table:
-            # We look into the 'FEATURE' table to verify whether the container is disabled or not.
-            # If the container is diabled, we exit.
-            if ("state" in feature_table[feature_name]
-                    and feature_table[feature_name]["state"] not in ["disabled", "always_disabled"]):
-
-                # We are using supervisorctl status to check the critical process status. We cannot leverage psutil here because
-                # it not always possible to get process cmdline in supervisor.conf. E.g, cmdline of orchagent is "/usr/bin/orchagent",
-                # however, in supervisor.conf it is "/usr/bin/orchagent.sh"
-                cmd = 'docker exec {} bash -c "supervisorctl status"'.format(container_name)
-                process_status = utils.run_command(cmd)
-                if process_status is None:
-                    for process_name in critical_process_list:
-                        self.set_object_not_ok('Process', '{}:{}'.format(container_name, process_name), "'{}' is not running".format(process_name))
-                    return
-
-                process_status = self._parse_supervisorctl_status(process_status.strip().splitlines())
-                for process_name in critical_process_list:
-                    if config and config.ignore_services and process_name in config.ignore_services:
-                        continue
-
-                    # Sometimes process_name is in critical_processes file, but it is not in supervisor.conf, such process will not run in container.
-                    # and it is safe to ignore such process. E.g, radv. So here we only check those processes which are in process_status.
-                    if process_name in process_status:
-                        if process_status[process_name] != 'RUNNING':
-                            self.set_object_not_ok('Process', '{}:{}'.format(container_name, process_name), "'{}' is not running".format(process_name))
-                        else:
-                            self.set_object_ok('Process', '{}:{}'.format(container_name, process_name))
+        if process_status is None:
+            for process_name in critical_process_list:
+                self.set_object_not_ok('Process', '{}:{}'.format(container_name, process_name), "'{}' is not running".format(process_name))
+            return
+
+        process_status = self._parse_supervisorctl_status(process_status.strip().splitlines())
+        self.check_process_states(container_name, critical_process_list, config, process_status)
+
+    def check_process_states(self, container_name, critical_process_list, config, process_status):
+        """Check whether the critical processes in the specified container are running or not.
+
+        Args:
+            container_name (str): Container name
+            critical_process_list (list): Critical processes
+            config (object): Health checker configuration.
+            process_status (dict): A dictionary {<process_name>:<supervisor state of the process>}
+        """
+        for process_name in critical_process_list:
+            if config and config.ignore_services and process_name in config.ignore_services:
+                continue
+
+            # Sometimes process_name is in critical_processes file, but it is not in supervisor.conf, such process will not run in container.
+            # and it is safe to ignore such process. E.g, radv. So here we only check those processes which are in process_status.
+            if process_name in process_status:
+                if process_status[process_name] != 'RUNNING':
+                    self.set_object_not_ok('Process', '{}:{}'.format(container_name, process_name), "'{}' is not running".format(process_name))
+                else:
+                    self.set_object_ok('Process', '{}:{}'.format(container_name, process_name))
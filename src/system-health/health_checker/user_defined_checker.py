@@ -44,7 +44,7 @@ class UserDefinedChecker(HealthChecker):
         """
         self.reset()
 
-        output = utils.run_command(self._cmd)
+        output = utils.run_command(self._cmd, config.command_timeout if config else None)
         if not output:
             self.set_object_not_ok('UserDefine', str(self), 'Failed to get output of command \"{}\"'.format(self._cmd))
             return
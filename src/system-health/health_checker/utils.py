@@ -1,15 +1,28 @@
+import os
+import signal
 import subprocess
 
 
-def run_command(command):
+def run_command(command, timeout=None):
     """
     Utility function to run an shell command and return the output.
     :param command: Shell command string.
-    :return: Output of the shell command.
+    :param timeout: Seconds to wait for the command. The command is killed if it doesn't finish in time.
+    :return: Output of the shell command. None if the command failed to run or timed out.
     """
     try:
-        process = subprocess.Popen(command, shell=True, universal_newlines=True, stdout=subprocess.PIPE)
-        return process.communicate()[0]
+        process = subprocess.Popen(command, shell=True, universal_newlines=True, stdout=subprocess.PIPE,
+                                   start_new_session=timeout is not None)
+    except Exception:
+        return None
+
+    try:
+        return process.communicate(timeout=timeout)[0]
+    except subprocess.TimeoutExpired:
+        # Kill the whole process group, the shell may have started children
+        os.killpg(process.pid, signal.SIGKILL)
+        process.communicate()
+        return None
     except Exception:
         return None
 
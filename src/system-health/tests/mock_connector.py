@@ -2,7 +2,7 @@ class MockConnector(object):
     STATE_DB = None
     data = {}
 
-    def __init__(self, host):
+    def __init__(self, host=None, namespace=None, use_unix_socket_path=False):
         pass
 
     def connect(self, db_id):
@@ -22,3 +22,29 @@ class MockConnector(object):
 
     def get_all(self, db_id, key):
         return MockConnector.data[key]
+
+    def get_redis_client(self, db_id):
+        return MockRedisClient()
+
+
+class MockRedisClient(object):
+    def keys(self, pattern):
+        return MockConnector().keys(None, pattern)
+
+    def pipeline(self, transaction=True):
+        return MockRedisPipeline()
+
+
+class MockRedisPipeline(object):
+    execute_count = 0
+
+    def __init__(self):
+        self.results = []
+
+    def hgetall(self, key):
+        self.results.append(dict(MockConnector.data.get(key, {})))
+
+    def execute(self):
+        MockRedisPipeline.execute_count += 1
+        results, self.results = self.results, []
+        return results
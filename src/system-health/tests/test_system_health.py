@@ -11,12 +11,14 @@
 import copy
 import os
 import sys
+import threading
+import time
 from swsscommon import swsscommon
 
 from mock import Mock, MagicMock, patch
 from sonic_py_common import device_info
 
-from .mock_connector import MockConnector
+from .mock_connector import MockConnector, MockRedisPipeline
 
 swsscommon.SonicV2Connector = MockConnector
 
@@ -521,3 +523,183 @@ def test_utils():
 
     uptime = utils.get_uptime()
     assert uptime > 0
+
+    output = utils.run_command('sleep 10; echo done', timeout=0.1)
+    assert output is None
+
+
+class SlowChecker(HealthChecker):
+    def __init__(self, name, delay, event=None):
+        HealthChecker.__init__(self)
+        self._name = name
+        self._delay = delay
+        self._event = event
+
+    def get_category(self):
+        return 'Slow'
+
+    def check(self, config):
+        self._info = {}
+        if self._event:
+            self._event.wait(self._delay)
+        else:
+            time.sleep(self._delay)
+        self.set_object_ok('Slow', self._name)
+
+    def __str__(self):
+        return self._name
+
+
+@patch('health_checker.utils.get_uptime', MagicMock(return_value=1000))
+def test_manager_concurrent_checkers():
+    chassis = MagicMock()
+    manager = HealthCheckerManager()
+    manager.config.checker_timeout = 0.5
+    blocked = threading.Event()
+    manager._checkers = [SlowChecker('slow1', 0.2), SlowChecker('slow2', 0.2), SlowChecker('blocked', 10, blocked)]
+
+    try:
+        start = time.monotonic()
+        state, stat = manager.check(chassis)
+        # Checkers ran at the same time
+        assert time.monotonic() - start < 0.9
+        assert state == HealthCheckerManager.STATE_RUNNING
+        assert list(stat['Slow'].keys()) == ['slow1', 'slow2']
+        assert stat['Internal']['blocked']['status'] == HealthChecker.STATUS_NOT_OK
+        assert HealthChecker.summary == HealthChecker.STATUS_NOT_OK
+        assert manager.checker_stats['slow1']['result'] == HealthCheckerManager.RESULT_OK
+        assert manager.checker_stats['slow1']['latency'] >= 200
+        assert manager.checker_stats['blocked']['result'] == HealthCheckerManager.RESULT_TIMEOUT
+
+        # The blocked checker is not started again while it's running
+        state, stat = manager.check(chassis)
+        assert manager.checker_stats['blocked']['result'] == HealthCheckerManager.RESULT_BUSY
+        assert 'blocked' in stat['Internal']
+
+        blocked.set()
+        time.sleep(0.1)
+        state, stat = manager.check(chassis)
+        assert 'Internal' not in stat
+        assert list(stat['Slow'].keys()) == ['slow1', 'slow2', 'blocked']
+        assert HealthChecker.summary == HealthChecker.STATUS_OK
+    finally:
+        blocked.set()
+        manager.shutdown()
+
+
+@patch('health_checker.utils.run_command')
+def test_service_checker_process_statuses(mock_run):
+    def run_command(cmd, timeout=None):
+        # Query of the first container completes last
+        if 'ctr0' in cmd:
+            time.sleep(0.1)
+        return cmd
+    mock_run.side_effect = run_command
+
+    checker = ServiceChecker()
+    config = Config()
+    containers = ['ctr{}'.format(i) for i in range(10)]
+    statuses = checker.get_process_statuses(containers, config)
+    assert list(statuses.keys()) == containers
+    for container in containers:
+        assert statuses[container] == ServiceChecker.SUPERVISOR_STATUS_CMD.format(container)
+    assert all(call[0][1] == config.command_timeout for call in mock_run.call_args_list)
+
+
+@patch('swsscommon.swsscommon.ConfigDBConnector.connect', MagicMock())
+@patch('health_checker.service_checker.ServiceChecker._get_container_folder', MagicMock(return_value=test_path))
+@patch('health_checker.service_checker.ServiceChecker.check_by_monit', MagicMock())
+@patch('sonic_py_common.multi_asic.is_multi_asic', MagicMock(return_value=False))
+@patch('docker.DockerClient')
+@patch('health_checker.utils.run_command')
+@patch('swsscommon.swsscommon.ConfigDBConnector')
+def test_service_checker_process_state_table(mock_config_db, mock_run, mock_docker_client):
+    mock_config_db.return_value.get_table.return_value = {
+        'snmp': {
+            'state': 'enabled',
+            'has_global_scope': 'True',
+            'has_per_asic_scope': 'False',
+        },
+        'lldp': {
+            'state': 'enabled',
+            'has_global_scope': 'True',
+            'has_per_asic_scope': 'False',
+        }
+    }
+    containers = []
+    for name in ['snmp', 'lldp']:
+        container = MagicMock()
+        container.name = name
+        containers.append(container)
+    mock_docker_client.return_value.containers.list = MagicMock(return_value=containers)
+    mock_run.return_value = mock_supervisorctl_output
+
+    origin_data = MockConnector.data
+    MockConnector.data = {
+        'PROCESS_STATE_SNAPSHOT|snmp': {'timestamp': '1000.0'},
+        'PROCESS_STATE|snmp|snmpd': {'state': 'FATAL', 'group': 'snmpd', 'timestamp': '1000.0'},
+        'PROCESS_STATE|snmp|snmp-subagent': {'state': 'RUNNING', 'group': 'snmp-subagent', 'timestamp': '1000.0'},
+        # The listener of lldp failed to publish all states at start, only a later transition was published
+        'PROCESS_STATE|lldp|snmpd': {'state': 'RUNNING', 'group': 'snmpd', 'timestamp': '1000.0'},
+    }
+    MockRedisPipeline.execute_count = 0
+    try:
+        checker = ServiceChecker()
+        checker.check(Config())
+    finally:
+        MockConnector.data = origin_data
+
+    # The states are read with one pipelined request
+    assert MockRedisPipeline.execute_count == 1
+
+    # snmp states are read from STATE_DB, lldp has no complete published states and is queried with supervisorctl
+    assert checker._info['snmp:snmpd'][HealthChecker.INFO_FIELD_OBJECT_STATUS] == HealthChecker.STATUS_NOT_OK
+    assert checker._info['snmp:snmp-subagent'][HealthChecker.INFO_FIELD_OBJECT_STATUS] == HealthChecker.STATUS_OK
+    assert checker._info['lldp:snmpd'][HealthChecker.INFO_FIELD_OBJECT_STATUS] == HealthChecker.STATUS_OK
+    assert checker._info['lldp:snmp-subagent'][HealthChecker.INFO_FIELD_OBJECT_STATUS] == HealthChecker.STATUS_NOT_OK
+    exec_commands = [call[0][0] for call in mock_run.call_args_list if 'supervisorctl' in call[0][0]]
+    assert exec_commands == [ServiceChecker.SUPERVISOR_STATUS_CMD.format('lldp')]
+
+
+class StrictConnector(MockConnector):
+    """ Rejects non-string values like the swsscommon binding of SonicV2Connector """
+    def __init__(self, data):
+        self.data = data
+
+    def set(self, db_id, key, field, value):
+        self.hmset(db_id, key, {field: value})
+
+    def hmset(self, db_id, key, values):
+        for value in values.values():
+            if not isinstance(value, str):
+                raise TypeError('value must be a string')
+        self.data.setdefault(key, {}).update(values)
+
+    def delete(self, db_id, key):
+        self.data.pop(key, None)
+
+
+def test_healthd_checker_stats():
+    from importlib.machinery import SourceFileLoader
+    import importlib.util
+    loader = SourceFileLoader('healthd', os.path.join(modules_path, 'scripts', 'healthd'))
+    healthd = importlib.util.module_from_spec(importlib.util.spec_from_loader(loader.name, loader))
+    loader.exec_module(healthd)
+
+    daemon = healthd.HealthDaemon()
+    data = {}
+    daemon._db = StrictConnector(data)
+    daemon._process_checker_stats({
+        'ServiceChecker': {'result': HealthCheckerManager.RESULT_OK, 'latency': 120},
+        'HardwareChecker': {'result': HealthCheckerManager.RESULT_TIMEOUT, 'latency': 20000},
+    })
+    assert data == {
+        'SYSTEM_HEALTH_CHECKER_STATS|ServiceChecker': {'result': HealthCheckerManager.RESULT_OK, 'latency': '120'},
+        'SYSTEM_HEALTH_CHECKER_STATS|HardwareChecker': {'result': HealthCheckerManager.RESULT_TIMEOUT, 'latency': '20000'},
+    }
+
+    # The stats of a checker which is gone are removed
+    daemon._process_checker_stats({'ServiceChecker': {'result': HealthCheckerManager.RESULT_OK, 'latency': 80}})
+    assert data == {
+        'SYSTEM_HEALTH_CHECKER_STATS|ServiceChecker': {'result': HealthCheckerManager.RESULT_OK, 'latency': '80'},
+    }